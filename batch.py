@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+Batch mode: generate Kaspi feeds for several merchants from one process.
+
+Merchant profiles come from a JSON or TOML file (see merchants.example.json).
+All merchants share one pooled HTTP session and are built in parallel, each
+into its own output file; a failing merchant does not stop the others.
+"""
+
+import json
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from config import (
+    WIPON_API_URL, API_PARAMS, STOCK_ID, STORE_ID, FETCH_CONCURRENCY
+)
+from pricing import PriceRules, load_rules_file
+from wipon_client import WiponClient, new_session
+from fetch_and_convert import iter_wipon_offers, iter_store_offers
+from xml_writer import write_kaspi_xml_file
+from validate_xml import RecordValidator
+
+WIPON_ITEM_URL = "https://api.wipon.kz/v2/employee/{employee_id}/item"
+BATCH_WORKERS = 4  # Merchants built in parallel unless the profile file says otherwise
+
+def read_profile_file(path):
+    """Read a profile file; ``.toml`` files need Python 3.11+ (tomllib)."""
+    if path.endswith('.toml'):
+        try:
+            import tomllib
+        except ImportError:
+            print("❌ TOML profiles need Python 3.11+, use a JSON file instead")
+            sys.exit(1)
+        with open(path, 'rb') as f:
+            return tomllib.load(f)
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def normalize_profile(profile):
+    """Fill in a merchant profile with defaults from config.py.
+
+    ``name``, ``company`` and ``merchant_id`` are required, so a feed is
+    never published under another merchant's identity. The API URL is taken
+    from ``api_url`` or built from ``employee_id``. ``stores`` maps Wipon
+    stock ids to Kaspi storeIds; without it the merchant has the single
+    store ``{stock_id: store_id}``. ``stock_id`` and ``store_id`` in the
+    result are the first store's. ``pricing_rules`` is a list of pricing
+    rules or the path of a JSON rules file; without it the merchant gets
+    PRICING_RULES from config.py.
+    """
+    name = profile.get('name')
+    if not name:
+        raise ValueError("merchant profile without a name")
+    for key in ('company', 'merchant_id'):
+        if not profile.get(key):
+            raise ValueError(f"merchant {name!r} has no {key}")
+
+    if profile.get('api_url'):
+        api_url = profile['api_url']
+    elif profile.get('employee_id'):
+        api_url = WIPON_ITEM_URL.format(employee_id=profile['employee_id'])
+    else:
+        api_url = WIPON_API_URL
+
+    if profile.get('stores'):
+        if 'stock_id' in profile or 'store_id' in profile:
+            raise ValueError(f"merchant {name!r} sets both stores and stock_id/store_id")
+        stores = {str(stock): str(store) for stock, store in profile['stores'].items()}
+    else:
+        stores = {str(profile.get('stock_id', STOCK_ID)): str(profile.get('store_id', STORE_ID))}
+    stock_id, store_id = next(iter(stores.items()))
+
+    rules = profile.get('pricing_rules')
+    if isinstance(rules, str):
+        rules = load_rules_file(rules)
+
+    return {
+        'name': name,
+        'company': profile['company'],
+        'merchant_id': str(profile['merchant_id']),
+        'api_url': api_url,
+        'token_env': profile.get('token_env', 'WIPON_API_TOKEN'),
+        'stock_id': stock_id,
+        'store_id': store_id,
+        'stores': stores,
+        'pricing_rules': PriceRules(rules) if rules is not None else None,
+        'output': profile.get('output', os.path.join('feeds', name, 'price.xml')),
+    }
+
+def load_profiles(path):
+    """Load merchant profiles; returns ``(profiles, workers)``."""
+    data = read_profile_file(path)
+    profiles = [normalize_profile(profile) for profile in data.get('merchants', [])]
+    names = [profile['name'] for profile in profiles]
+    duplicates = sorted({name for name in names if names.count(name) > 1})
+    if duplicates:
+        raise ValueError(f"duplicate merchant names: {', '.join(duplicates)}")
+    outputs = [profile['output'] for profile in profiles]
+    if len(set(outputs)) != len(outputs):
+        raise ValueError("merchants must have distinct output paths")
+    return profiles, data.get('workers', BATCH_WORKERS)
+
+def build_feed(profile, session, validate=False, if_changed=False):
+    """Fetch and write the feed of one merchant.
+
+    Returns a result dict with ``name``, ``status`` (``ok``, ``invalid`` or
+    ``failed``), ``offers``, ``invalid`` (offers left out by validation),
+    ``changed`` and ``error``. Exceptions are caught here so one merchant
+    cannot fail the batch.
+    """
+    name = profile['name']
+    result = {'name': name, 'output': profile['output'], 'status': 'failed',
+              'offers': 0, 'invalid': 0, 'changed': False, 'error': None}
+    token = os.getenv(profile['token_env'])
+    client = WiponClient(url=profile['api_url'], token=token, session=session)
+    try:
+        fetch_stats = {}
+        if len(profile['stores']) > 1:
+            products = iter_store_offers(profile['stores'], client=client, stats=fetch_stats,
+                                         rules=profile['pricing_rules'])
+        else:
+            params = dict(API_PARAMS)
+            params['stock_id'] = profile['stock_id']
+            products = iter_wipon_offers(client=client, params=params, stats=fetch_stats,
+                                         rules=profile['pricing_rules'])
+
+        validator = RecordValidator(profile['company'], profile['merchant_id']) if validate else None
+        output_dir = os.path.dirname(profile['output'])
+        if output_dir:
+            os.makedirs(output_dir, exist_ok=True)
+
+        stats = {}
+        result['offers'] = write_kaspi_xml_file(
+            products, profile['output'], if_changed=if_changed, stats=stats, validator=validator,
+            company=profile['company'], merchant_id=profile['merchant_id'],
+            store_id=profile['store_id'])
+        result['changed'] = stats['changed']
+        result['invalid'] = stats['invalid']
+        result['status'] = 'ok' if stats['valid'] else 'invalid'
+        if not stats['valid']:
+            result['error'] = validator.report['error']
+    except requests.exceptions.RequestException as e:
+        result['error'] = f"Wipon API error: {e}"
+    except Exception as e:  # isolate unexpected failures to this merchant
+        result['error'] = f"{type(e).__name__}: {e}"
+    finally:
+        client.close()
+    return result
+
+def run_batch(profiles, workers=BATCH_WORKERS, validate=False, if_changed=False):
+    """Build every merchant's feed, up to ``workers`` at a time.
+
+    All merchants share one pooled session sized for their combined page
+    concurrency. Returns the result dicts in profile order.
+    """
+    workers = max(1, min(workers, len(profiles) or 1))
+    max_stores = max((len(profile['stores']) for profile in profiles), default=1)
+    session = new_session(workers * max_stores * FETCH_CONCURRENCY)
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(build_feed, profile, session, validate, if_changed)
+                       for profile in profiles]
+            return [future.result() for future in futures]
+    finally:
+        session.close()
+
+def main():
+    """Build the feeds of every merchant in a profile file."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Generate Kaspi XML price lists for several merchants')
+    parser.add_argument('profiles', help='JSON or TOML file with merchant profiles')
+    parser.add_argument('--workers', type=int,
+                        help=f'Merchants built in parallel (default: from the file, or {BATCH_WORKERS})')
+    parser.add_argument('--only', action='append', metavar='NAME',
+                        help='Only build this merchant (can be repeated)')
+    parser.add_argument('--validate', action='store_true',
+                        help='Validate offers and leave invalid ones out of the feeds')
+    parser.add_argument('--if-changed', action='store_true',
+                        help='Keep existing output files when no offer changed')
+    args = parser.parse_args()
+
+    try:
+        profiles, workers = load_profiles(args.profiles)
+    except (OSError, ValueError) as e:
+        print(f"❌ Cannot load merchant profiles: {e}")
+        sys.exit(1)
+    if args.only:
+        profiles = [profile for profile in profiles if profile['name'] in args.only]
+    if not profiles:
+        print("❌ No merchants to build")
+        sys.exit(1)
+
+    workers = args.workers or workers
+    print(f"Building {len(profiles)} feeds with {min(workers, len(profiles))} workers...")
+    results = run_batch(profiles, workers, validate=args.validate, if_changed=args.if_changed)
+
+    print("\n" + "=" * 50)
+    for result in results:
+        if result['status'] == 'ok':
+            state = 'updated' if result['changed'] else 'unchanged'
+            left_out = f", {result['invalid']} invalid left out" if result['invalid'] else ''
+            print(f"✅ {result['name']}: {result['offers']} offers{left_out}, {state} ({result['output']})")
+        else:
+            print(f"❌ {result['name']}: {result['error']}")
+
+    failed = sum(1 for result in results if result['status'] != 'ok')
+    if failed:
+        print(f"❌ {failed}/{len(results)} merchants failed")
+        sys.exit(1)
+    print(f"✅ All {len(results)} feeds generated")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Benchmark interpreter cold start of the feed commands on sample data
+
+Every command runs in a fresh interpreter in a scratch copy of the tree, so
+generated files never touch the working copy. Point ``--tree`` at an
+export of another commit (e.g. ``git archive``) to compare before/after.
+"""
+
+import glob
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# name -> commands run one after another
+SCENARIOS = {
+    'import fetch_and_convert': [['-c', 'import fetch_and_convert']],
+    'separate scripts': [['fetch_and_convert.py', '--sample', '--validate'],
+                         ['validate_xml.py', 'price.xml', '--quiet'],
+                         ['deploy.py']],
+    'kaspi_feed.py --help': [['kaspi_feed.py', '--help']],
+    'kaspi_feed.py validate': [['kaspi_feed.py', 'validate', 'price.xml', '--quiet']],
+    'kaspi_feed.py run-all': [['kaspi_feed.py', 'run-all', '--sample']],
+}
+
+def copy_tree(tree, workdir):
+    for path in glob.glob(os.path.join(tree, '*.py')) + [os.path.join(tree, 'sample_data.json')]:
+        shutil.copy(path, workdir)
+
+def run_scenario(commands, workdir):
+    start = time.perf_counter()
+    for command in commands:
+        subprocess.run([sys.executable] + command, cwd=workdir, check=True,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    return time.perf_counter() - start
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Benchmark cold start of the feed commands')
+    parser.add_argument('--tree', default=ROOT_DIR, help='Source tree to run (default: this one)')
+    parser.add_argument('--repeat', type=int, default=10)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        copy_tree(args.tree, workdir)
+        # A first run creates price.xml for the commands that read it
+        run_scenario(SCENARIOS['separate scripts'][:1], workdir)
+        print(f"📊 {args.tree}, best of {args.repeat}")
+        for name, commands in SCENARIOS.items():
+            if not all(command[0] == '-c' or os.path.exists(os.path.join(workdir, command[0]))
+                       for command in commands):
+                continue
+            seconds = min(run_scenario(commands, workdir) for _ in range(args.repeat))
+            print(f"  {name:<26} {seconds * 1000:7.1f} ms")
+
+if __name__ == "__main__":
+    main()
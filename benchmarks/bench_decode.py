@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark Wipon page decoding: JSON backend and field projection
+"""
+
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fake_wipon import make_catalog
+import wipon_client
+from config import WIPON_FIELDS
+
+def decoders():
+    """(name, decode function) pairs for every available backend."""
+    backends = [('json', None)]
+    if wipon_client.orjson is not None:
+        backends.append(('orjson', wipon_client.orjson))
+    
+    result = []
+    for backend, module in backends:
+        for fields in (None, WIPON_FIELDS):
+            def decode(body, module=module, fields=fields):
+                saved = wipon_client.orjson
+                wipon_client.orjson = module
+                try:
+                    return wipon_client.decode_page(body, fields)
+                finally:
+                    wipon_client.orjson = saved
+            label = f"{backend}{' + projection' if fields else ''}"
+            result.append((label, decode))
+    return result
+
+def main():
+    import argparse
+    
+    parser = argparse.ArgumentParser(description='Benchmark Wipon page decoding')
+    parser.add_argument('--items', type=int, default=1000, help='Items per page')
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+    
+    payload = {'data': make_catalog(args.items),
+               'meta': {'current_page': 1, 'last_page': 1, 'total': args.items}}
+    body = json.dumps(payload).encode('utf-8')
+    print(f"📊 {args.items}-item page, {len(body) / 1024:.0f} KB")
+    print(f"  {'decoder':<22} {'time':>9}  {'peak alloc':>10}  {'retained':>9}")
+    
+    for label, decode in decoders():
+        best = None
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            decode(body)
+            seconds = time.perf_counter() - start
+            best = seconds if best is None else min(best, seconds)
+        
+        tracemalloc.start()
+        page = decode(body)
+        retained, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        del page
+        
+        print(f"  {label:<22} {best * 1000:7.2f}ms  {peak / 1024 / 1024:8.2f}MB  "
+              f"{retained / 1024 / 1024:7.2f}MB")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""
+Benchmark the offer diff engine on large synthetic catalogs
+"""
+
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fake_wipon import make_catalog
+from offers import iter_offers
+from delta import diff_offers, delta_offers
+
+def main():
+    import argparse
+    
+    parser = argparse.ArgumentParser(description='Benchmark delta feed diffing')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000])
+    parser.add_argument('--change-rate', type=float, default=0.01, help='Fraction of SKUs changed')
+    args = parser.parse_args()
+    
+    rng = random.Random(42)
+    for count in args.sizes:
+        previous = {offer.sku: offer for offer in iter_offers(make_catalog(count))}
+        current = dict(previous)
+        for sku in rng.sample(list(previous), int(count * args.change_rate)):
+            offer = current[sku]
+            current[sku] = offer._replace(price=offer.price + 100)
+        for sku in rng.sample(list(previous), int(count * args.change_rate)):
+            del current[sku]
+        
+        start = time.perf_counter()
+        report = diff_offers(previous, current)
+        delta = list(delta_offers(previous, current, report))
+        seconds = time.perf_counter() - start
+        
+        summary = report['summary']
+        print(f"{count:>8} SKUs  {seconds * 1000:8.1f} ms  "
+              f"{summary['changed']} changed, {summary['removed']} removed, {len(delta)} delta offers")
+
+if __name__ == "__main__":
+    main()
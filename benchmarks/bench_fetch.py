@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Benchmark sequential vs concurrent page fetching against a fake Wipon server
+"""
+
+import contextlib
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fake_wipon import FakeWiponServer, make_catalog
+from fetch_and_convert import fetch_wipon_data
+
+def run(url, concurrency):
+    """Fetch the whole catalog and return (seconds, products)."""
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        data = fetch_wipon_data(url=url, concurrency=concurrency)
+    return time.perf_counter() - start, data['data']
+
+def main():
+    import argparse
+    
+    parser = argparse.ArgumentParser(description='Benchmark Wipon page fetching')
+    parser.add_argument('--pages', type=int, default=40, help='Number of pages in the fake catalog')
+    parser.add_argument('--latency', type=float, default=0.05, help='Seconds of delay per request')
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 4, 8])
+    args = parser.parse_args()
+    
+    # The fake server pages by the per_page value sent in API_PARAMS
+    from config import API_PARAMS
+    catalog = make_catalog(args.pages * API_PARAMS['per_page'])
+    expected = [item['id'] for item in catalog]
+    
+    with FakeWiponServer(catalog, latency=args.latency) as server:
+        print(f"📊 {args.pages} pages, {len(catalog)} products, {args.latency * 1000:.0f} ms latency")
+        run(server.url, max(args.concurrency))  # warm the server's page cache
+        baseline = None
+        for concurrency in args.concurrency:
+            seconds, products = run(server.url, concurrency)
+            ordered = [item['id'] for item in products] == expected
+            baseline = baseline or seconds
+            print(f"  concurrency={concurrency:<3} {seconds:7.3f}s  "
+                  f"speedup x{baseline / seconds:4.1f}  order {'✅' if ordered else '❌'}")
+            if not ordered:
+                sys.exit(1)
+
+if __name__ == "__main__":
+    main()
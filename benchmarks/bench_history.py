@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Benchmark the price/stock history store over a simulated year of runs
+"""
+
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from synthetic import generate_catalog
+from offers import page_to_offers
+from history import HistoryStore
+
+RUN_SECONDS = 6 * 3600
+
+def simulate(store, offers, runs, change_rate, seed, start):
+    """Append ``runs`` runs in which ``change_rate`` of the offers change."""
+    rng = random.Random(seed)
+    offers = list(offers)
+    append_seconds = []
+    for run in range(runs):
+        if run:
+            for i in rng.sample(range(len(offers)), int(len(offers) * change_rate)):
+                offer = offers[i]
+                if rng.random() < 0.7:
+                    offers[i] = offer._replace(stock=max(0, offer.stock + rng.choice([-2, -1, 1, 3])))
+                else:
+                    offers[i] = offer._replace(price=offer.price + rng.choice([-1000, -500, 500, 1000]))
+        begin = time.perf_counter()
+        store.append(offers, timestamp=start + run * RUN_SECONDS)
+        append_seconds.append(time.perf_counter() - begin)
+    return offers, append_seconds
+
+def best_of(function, repeat=5):
+    best = None
+    for _ in range(repeat):
+        begin = time.perf_counter()
+        result = function()
+        seconds = time.perf_counter() - begin
+        best = seconds if best is None else min(best, seconds)
+    return best, result
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Benchmark the price/stock history store')
+    parser.add_argument('--products', type=int, default=20000)
+    parser.add_argument('--runs', type=int, default=1460, help='Runs to simulate (default: a year every 6h)')
+    parser.add_argument('--change-rate', type=float, default=0.01, help='Share of offers changed per run')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    offers = page_to_offers(generate_catalog(args.products, args.seed))
+    start = 1767225600  # 2026-01-01
+    with tempfile.TemporaryDirectory() as directory:
+        store = HistoryStore(directory)
+        offers, append_seconds = simulate(store, offers, args.runs, args.change_rate, args.seed, start)
+        size = sum(os.path.getsize(os.path.join(directory, name)) for name in os.listdir(directory))
+
+        print(f"📊 {len(offers)} offers, {args.runs} runs, {args.change_rate:.1%} changed per run")
+        print(f"  history size        {size / 1024 / 1024:8.2f} MB")
+        print(f"  first append        {append_seconds[0] * 1000:8.1f} ms")
+        print(f"  later appends       {sum(append_seconds[1:]) / max(1, len(append_seconds) - 1) * 1000:8.1f} ms avg")
+
+        sku = offers[len(offers) // 2].sku
+        seconds, history = best_of(lambda: HistoryStore(directory).sku_history(sku))
+        print(f"  one SKU             {seconds * 1000:8.1f} ms  ({len(history)} changes)")
+        window = (start + 100 * RUN_SECONDS, start + 128 * RUN_SECONDS)
+        seconds, rows = best_of(lambda: HistoryStore(directory).changes(*window))
+        print(f"  one week of changes {seconds * 1000:8.1f} ms  ({len(rows)} rows)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Benchmark per-product vs batched offer projection and Offer record size
+"""
+
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fake_wipon import make_catalog
+from offers import iter_offers, page_to_offers
+
+def best_of(function, repeat=5):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        seconds = time.perf_counter() - start
+        best = seconds if best is None else min(best, seconds)
+    return best, result
+
+def allocated(build):
+    """Bytes still allocated by the object ``build()`` returns."""
+    tracemalloc.start()
+    result = build()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return size, result
+
+def main():
+    import argparse
+    
+    parser = argparse.ArgumentParser(description='Benchmark product-to-offer projection')
+    parser.add_argument('--products', type=int, default=100000)
+    parser.add_argument('--page-size', type=int, default=1000)
+    args = parser.parse_args()
+    
+    catalog = make_catalog(args.products)
+    pages = [catalog[i:i + args.page_size] for i in range(0, len(catalog), args.page_size)]
+    
+    per_product, expected = best_of(lambda: list(iter_offers(catalog)))
+    batched, offers = best_of(lambda: [offer for page in pages for offer in page_to_offers(page)])
+    assert offers == expected
+    
+    print(f"📊 {args.products} products in pages of {args.page_size}")
+    print(f"  per-product  {per_product:7.3f}s")
+    print(f"  batched      {batched:7.3f}s  x{per_product / batched:4.2f}")
+    
+    # Decode one page from JSON so the raw dicts are freshly allocated
+    body = json.dumps(pages[0])
+    raw_size, raw = allocated(lambda: json.loads(body))
+    offer_size, _ = allocated(lambda: page_to_offers(raw))
+    print(f"  memory per item: raw dict {raw_size / len(raw):7.0f} B, "
+          f"Offer {offer_size / len(raw):5.0f} B")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Benchmark Wipon pagination: full walks of large catalogs, capped pages and
+adaptive vs fixed request windows against a rate-limited fake server
+"""
+
+import contextlib
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fake_wipon import FakeWiponServer, make_catalog
+from fetch_and_convert import iter_wipon_pages
+from wipon_client import WiponClient, RateController
+
+class FixedWindow(RateController):
+    """A window that never adapts, like the fetcher before the RateController."""
+
+    def record(self, started, seconds, status=None, items=None):
+        pass
+
+def walk(server, concurrency, controller=None):
+    """Fetch every page; returns (seconds, product ids, requests, 429s)."""
+    served, limited = server.requests_served, server.rate_limited
+    client = WiponClient(url=server.url, pool_size=concurrency,
+                         controller=controller or RateController(concurrency))
+    start = time.perf_counter()
+    with client, contextlib.redirect_stdout(io.StringIO()):
+        ids = [item['id'] for page in iter_wipon_pages(client=client, concurrency=concurrency)
+               for item in page]
+    return (time.perf_counter() - start, ids,
+            server.requests_served - served, server.rate_limited - limited)
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Benchmark Wipon pagination')
+    parser.add_argument('--items', type=int, default=120000, help='Catalog size (120 pages of 1000)')
+    parser.add_argument('--latency', type=float, default=0.05, help='Seconds of delay per request')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--max-in-flight', type=int, default=3, help='Concurrent requests the rate-limited server allows')
+    args = parser.parse_args()
+
+    catalog = make_catalog(args.items)
+    expected = [item['id'] for item in catalog]
+
+    scenarios = [
+        ('meta, 1000 per page', {}, None),
+        ('meta, capped at 250', {'max_per_page': 250}, None),
+        ('no meta, capped at 250', {'max_per_page': 250, 'meta': False}, None),
+        (f'rate limit {args.max_in_flight}, fixed', {'max_in_flight': args.max_in_flight}, FixedWindow),
+        (f'rate limit {args.max_in_flight}, adaptive', {'max_in_flight': args.max_in_flight}, RateController),
+    ]
+    print(f"📊 {args.items} products, {args.latency * 1000:.0f} ms latency, concurrency {args.concurrency}")
+    for name, options, controller_class in scenarios:
+        with FakeWiponServer(catalog, latency=args.latency, **options) as server:
+            controller = controller_class(args.concurrency) if controller_class else None
+            seconds, ids, requests, limited = walk(server, args.concurrency, controller)
+        complete = '✅ complete' if ids == expected else f'❌ {len(ids)} products'
+        print(f"  {name:<28} {seconds:7.2f}s  {requests:>5} requests  {limited:>4} x 429  {complete}")
+
+if __name__ == "__main__":
+    main()
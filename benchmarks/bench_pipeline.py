@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Benchmark peak memory of the collect-then-convert and streaming pipelines
+"""
+
+import contextlib
+import io
+import json
+import os
+import subprocess
+import sys
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from benchutil import peak_rss_kb
+from fake_wipon import FakeWiponServer, make_catalog
+
+def child(mode, url):
+    """Run one pipeline in a fresh process so peak RSS is its own."""
+    from fetch_and_convert import fetch_wipon_data, iter_wipon_offers
+    from xml_writer import write_kaspi_xml
+    
+    baseline_rss = peak_rss_kb()
+    start = time.perf_counter()
+    with open(os.devnull, 'wb') as sink, contextlib.redirect_stdout(io.StringIO()):
+        if mode == 'collect':
+            products = fetch_wipon_data(url=url)['data']
+        else:
+            products = iter_wipon_offers(url=url)
+        offers = write_kaspi_xml(products, sink)
+    seconds = time.perf_counter() - start
+    peak_rss = peak_rss_kb()
+    print(json.dumps({'seconds': seconds, 'offers': offers,
+                      'extra_rss_kb': peak_rss - baseline_rss}))
+
+def measure(mode, url):
+    output = subprocess.run(
+        [sys.executable, __file__, '--child', mode, url],
+        check=True, capture_output=True, text=True
+    ).stdout
+    return json.loads(output)
+
+def main():
+    import argparse
+    
+    parser = argparse.ArgumentParser(description='Benchmark pipeline memory use')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[5000, 20000, 50000])
+    parser.add_argument('--child', nargs=2, metavar=('MODE', 'URL'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    
+    if args.child:
+        child(*args.child)
+        return
+    
+    print(f"{'products':>9}  {'mode':<8} {'time':>8}  {'RSS growth':>10}")
+    for count in args.sizes:
+        with FakeWiponServer(make_catalog(count)) as server:
+            for mode in ('collect', 'stream'):
+                result = measure(mode, server.url)
+                print(f"{count:>9}  {mode:<8} {result['seconds']:7.3f}s  "
+                      f"{result['extra_rss_kb'] / 1024:8.1f}MB")
+
+if __name__ == "__main__":
+    main()
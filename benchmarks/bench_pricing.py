@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Benchmark the overhead of pricing rules on batched offer projection
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pricing
+from synthetic import BRANDS, GARMENTS, generate_catalog
+from offers import page_to_offers
+
+def make_rules(count):
+    """A default rule plus ``count`` brand, category and brand+category rules."""
+    rules = [{'markup_percent': 5, 'min_margin_percent': 30, 'round_to': 100, 'ending': 90}]
+    pairs = [(brand, None) for brand in BRANDS] + [(None, garment) for garment in GARMENTS] + \
+            [(brand, garment) for brand in BRANDS for garment in GARMENTS]
+    for i, (brand, category) in enumerate(pairs[:count]):
+        rule = {'markup_percent': i % 20, 'item_margin_floor': i % 2 == 0, 'round_to': 1000, 'ending': 990}
+        if brand is not None:
+            rule['brand'] = brand
+        if category is not None:
+            rule['category'] = category
+        rules.append(rule)
+    return rules
+
+def project(pages):
+    start = time.perf_counter()
+    offers = [offer for page in pages for offer in page_to_offers(page)]
+    return time.perf_counter() - start, offers
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Benchmark the overhead of pricing rules')
+    parser.add_argument('--products', type=int, default=100000)
+    parser.add_argument('--page-size', type=int, default=1000)
+    parser.add_argument('--rules', type=int, nargs='+', default=[0, 1, 24, 168])
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    catalog = generate_catalog(args.products)
+    pages = [catalog[i:i + args.page_size] for i in range(0, len(catalog), args.page_size)]
+    print(f"📊 {args.products} products in pages of {args.page_size}")
+
+    baseline = None
+    for count in args.rules:
+        rules = make_rules(count - 1) if count else []
+        pricing.use_rules(rules)
+        seconds, offers = min((project(pages) for _ in range(args.repeat)), key=lambda run: run[0])
+        baseline = baseline or seconds
+        changed = sum(offer.price != int(float(product['selling_price']))
+                      for offer, product in zip(offers, (p for p in catalog if float(p['quantity']) >= 0)))
+        print(f"  {len(rules):>4} rules  {seconds:7.3f}s  +{(seconds - baseline) * 1000:6.1f}ms  "
+              f"{changed} prices changed")
+
+if __name__ == "__main__":
+    main()
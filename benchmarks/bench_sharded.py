@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Benchmark sharded XML generation across worker counts
+"""
+
+import hashlib
+import io
+import os
+import sys
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from synthetic import generate_catalog
+from offers import page_to_offers
+from xml_writer import write_kaspi_xml
+
+DATE = "2026-01-01 00:00:00"
+
+def render(offers, workers, shard_size):
+    sink = io.BytesIO()
+    start = time.perf_counter()
+    write_kaspi_xml(offers, sink, date=DATE, workers=workers, shard_size=shard_size)
+    seconds = time.perf_counter() - start
+    return seconds, hashlib.sha256(sink.getvalue()).hexdigest()
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Benchmark sharded XML generation across worker counts')
+    parser.add_argument('--items', type=int, nargs='+', default=[100000, 500000])
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8])
+    parser.add_argument('--shard-size', type=int, default=5000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"🖥️  {os.cpu_count()} CPUs, shards of {args.shard_size} offers")
+    for items in args.items:
+        offers = page_to_offers(generate_catalog(items))
+        print(f"📊 {items} products, {len(offers)} offers")
+        baseline = reference = None
+        for workers in args.workers:
+            seconds, digest = min(render(offers, workers, args.shard_size) for _ in range(args.repeat))
+            reference = reference or digest
+            baseline = baseline or seconds
+            same = '✅ identical' if digest == reference else '❌ DIFFERENT'
+            print(f"  {workers:>2} workers  {seconds:7.3f}s  x{baseline / seconds:4.2f}  {same}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Benchmark every pipeline stage on synthetic catalogs and save the results
+
+Each stage runs in a fresh process so its peak memory is its own:
+
+  fetch     fetch_wipon_data() against a local fake Wipon server
+  decode    wipon_client.decode_page() on every page body
+  convert   convert_to_kaspi_xml() (ElementTree)
+  format    format_xml() (minidom pretty-printing)
+  write     write_kaspi_xml_file() (streaming writer)
+  validate  validate_kaspi_xml()
+
+Results go to a JSON file; ``--compare`` prints the ratio against an
+earlier results file, e.g. one saved on another commit.
+"""
+
+import contextlib
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from benchutil import peak_rss_kb, reset_peak_rss, rss_kb
+from synthetic import generate_catalog
+
+STAGES = ['fetch', 'decode', 'convert', 'format', 'write', 'validate']
+PAGE_SIZE = 1000
+
+def prepare_stage(stage, workdir):
+    """Load the inputs of ``stage``; returns ``(run, cleanup)``."""
+    from fetch_and_convert import fetch_wipon_data, convert_to_kaspi_xml, format_xml
+    from wipon_client import decode_page
+    from xml_writer import write_kaspi_xml_file
+    from validate_xml import validate_kaspi_xml
+    from config import WIPON_FIELDS
+    from fake_wipon import FakeWiponServer
+
+    xml_file = os.path.join(workdir, 'price.xml')
+    if stage == 'validate':
+        return lambda: validate_kaspi_xml(xml_file, quiet=True), None
+
+    with open(os.path.join(workdir, 'catalog.json'), 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    catalog = data['data']
+
+    if stage == 'fetch':
+        server = FakeWiponServer(catalog).start()
+        # Encode every page up front so only the client side is measured
+        pages = max(1, -(-len(catalog) // PAGE_SIZE))
+        for page in range(1, pages + 1):
+            server.page_body(page, PAGE_SIZE)
+        return lambda: len(fetch_wipon_data(url=server.url)['data']), server.stop
+    if stage == 'decode':
+        bodies = [json.dumps({'data': catalog[start:start + PAGE_SIZE]}).encode('utf-8')
+                  for start in range(0, len(catalog), PAGE_SIZE)]
+        return lambda: sum(len(decode_page(body, WIPON_FIELDS)['data']) for body in bodies), None
+    if stage == 'convert':
+        return lambda: len(convert_to_kaspi_xml(data).find('offers')), None
+    if stage == 'format':
+        root = convert_to_kaspi_xml(data)
+        return lambda: len(format_xml(root)), None
+    if stage == 'write':
+        out_file = os.path.join(workdir, 'write.xml')
+        return lambda: write_kaspi_xml_file(catalog, out_file), None
+    raise ValueError(f"unknown stage {stage}")
+
+def child(stage, workdir):
+    """Run one stage in this (fresh) process and print its measurements."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        run, cleanup = prepare_stage(stage, workdir)
+    # Loading the inputs may peak higher than the stage itself, so start the
+    # stage from a fresh peak
+    baseline_rss = rss_kb() if reset_peak_rss() else peak_rss_kb()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        output = run()
+    seconds = time.perf_counter() - start
+    extra_rss_kb = max(0, peak_rss_kb() - baseline_rss)
+    if cleanup is not None:
+        cleanup()
+    print(json.dumps({'seconds': seconds, 'peak_rss_mb': extra_rss_kb / 1024,
+                      'output': output if type(output) is int else None}))
+
+def prepare_workdir(workdir, items, seed):
+    """Write the synthetic catalog and its feed (the input of ``validate``)."""
+    from xml_writer import write_kaspi_xml_file
+
+    catalog = generate_catalog(items, seed)
+    with open(os.path.join(workdir, 'catalog.json'), 'w', encoding='utf-8') as f:
+        json.dump({'data': catalog}, f, ensure_ascii=False)
+    write_kaspi_xml_file(catalog, os.path.join(workdir, 'price.xml'))
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def run_suite(sizes, stages, seed=0, repeat=1):
+    """Benchmark ``stages`` at every size; returns the list of result rows."""
+    results = []
+    print(f"{'items':>8}  {'stage':<9} {'time':>9}  {'peak RSS':>9}  {'output':>8}")
+    for items in sizes:
+        with tempfile.TemporaryDirectory() as workdir:
+            prepare_workdir(workdir, items, seed)
+            for stage in stages:
+                runs = [json.loads(subprocess.run(
+                            [sys.executable, __file__, '--child', stage, workdir],
+                            check=True, capture_output=True, text=True
+                        ).stdout) for _ in range(repeat)]
+                best = min(runs, key=lambda run: run['seconds'])
+                row = {'stage': stage, 'items': items, 'seconds': round(best['seconds'], 6),
+                       'peak_rss_mb': round(max(run['peak_rss_mb'] for run in runs), 2),
+                       'output': best['output']}
+                results.append(row)
+                output = '' if row['output'] is None else row['output']
+                print(f"{items:>8}  {stage:<9} {row['seconds']:8.3f}s  "
+                      f"{row['peak_rss_mb']:7.1f}MB  {output:>8}")
+    return results
+
+def compare(results, baseline_file):
+    """Print time and memory ratios against an earlier results file."""
+    with open(baseline_file, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+    previous = {(row['stage'], row['items']): row for row in baseline['results']}
+    print(f"\nCompared with {baseline_file} ({baseline['meta'].get('commit') or 'unknown commit'}):")
+    for row in results:
+        old = previous.get((row['stage'], row['items']))
+        if old is None:
+            continue
+        time_ratio = row['seconds'] / old['seconds'] if old['seconds'] else float('inf')
+        flag = '⚠️ ' if time_ratio > 1.10 else '  '
+        print(f"{flag}{row['items']:>8}  {row['stage']:<9} time x{time_ratio:5.2f}  "
+              f"RSS {old['peak_rss_mb']:7.1f} -> {row['peak_rss_mb']:7.1f}MB")
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Benchmark every pipeline stage on synthetic catalogs')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--stages', nargs='+', choices=STAGES, default=STAGES)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=1, help='Runs per stage; the fastest is kept')
+    parser.add_argument('--output', default='bench_results.json', help='Results file (default: bench_results.json)')
+    parser.add_argument('--compare', metavar='FILE', help='Earlier results file to compare with')
+    parser.add_argument('--child', nargs=2, metavar=('STAGE', 'DIR'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(*args.child)
+        return
+
+    from wipon_client import JSON_BACKEND
+
+    results = run_suite(args.sizes, args.stages, args.seed, args.repeat)
+    report = {
+        'meta': {
+            'commit': git_commit(),
+            'date': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'json_backend': JSON_BACKEND,
+            'platform': platform.platform(),
+            'seed': args.seed,
+        },
+        'results': results,
+    }
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"\n✅ Results saved to {args.output}")
+
+    if args.compare:
+        compare(results, args.compare)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Benchmark XML validation on a large synthetic feed
+"""
+
+import contextlib
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import xml.etree.ElementTree as ET
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchutil import peak_rss_kb
+from fake_wipon import make_catalog
+from xml_writer import write_kaspi_xml_file
+import legacy_validate_xml
+import validate_xml
+
+def timed(function, *args, repeat=3, **kwargs):
+    """Best wall time of ``repeat`` runs, with output discarded."""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = function(*args, **kwargs)
+        seconds = time.perf_counter() - start
+        best = seconds if best is None else min(best, seconds)
+    return best, result
+
+def write_feed(xml_file, count):
+    catalog = make_catalog(count)
+    # Keep every product so the feed has exactly ``count`` offers
+    for item in catalog:
+        item['quantity'] = item['quantity'].lstrip('-')
+    write_kaspi_xml_file(catalog, xml_file)
+
+def child(mode, xml_file):
+    """Validate in a fresh process so peak RSS is this mode's own."""
+    check = validate_xml.check_kaspi_xml_streaming if mode == 'stream' else validate_xml.check_kaspi_xml
+    baseline_rss = peak_rss_kb()
+    start = time.perf_counter()
+    report = check(xml_file)
+    seconds = time.perf_counter() - start
+    print(json.dumps({'seconds': seconds, 'valid': report['valid'],
+                      'extra_rss_kb': peak_rss_kb() - baseline_rss}))
+
+def measure_memory(sizes):
+    """Compare peak memory of full-tree and streaming validation."""
+    print(f"{'offers':>8}  {'size':>8}  {'mode':<7} {'time':>8}  {'RSS growth':>10}")
+    for count in sizes:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            xml_file = os.path.join(tmp_dir, 'price.xml')
+            write_feed(xml_file, count)
+            size_mb = os.path.getsize(xml_file) / 1024 / 1024
+            for mode in ('tree', 'stream'):
+                result = json.loads(subprocess.run(
+                    [sys.executable, __file__, '--child', mode, xml_file],
+                    check=True, capture_output=True, text=True
+                ).stdout)
+                print(f"{count:>8}  {size_mb:6.1f}MB  {mode:<7} {result['seconds']:7.3f}s  "
+                      f"{result['extra_rss_kb'] / 1024:8.1f}MB")
+
+def main():
+    import argparse
+    
+    parser = argparse.ArgumentParser(description='Benchmark Kaspi XML validation')
+    parser.add_argument('--offers', type=int, default=50000)
+    parser.add_argument('--memory', type=int, nargs='+', metavar='OFFERS',
+                        help='Compare peak memory of tree and streaming validation at these sizes')
+    parser.add_argument('--child', nargs=2, metavar=('MODE', 'FILE'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    
+    if args.child:
+        child(*args.child)
+        return
+    if args.memory:
+        measure_memory(args.memory)
+        return
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        xml_file = os.path.join(tmp_dir, 'price.xml')
+        write_feed(xml_file, args.offers)
+        print(f"📊 {args.offers} offers, {os.path.getsize(xml_file) / 1024 / 1024:.1f} MB")
+        
+        runs = [
+            ('parse only', lambda path: ET.parse(path) is not None, {}),
+            ('original', legacy_validate_xml.validate_kaspi_xml, {}),
+            ('single-pass', validate_xml.validate_kaspi_xml, {}),
+            ('single-pass --quiet', validate_xml.validate_kaspi_xml, {'quiet': True}),
+            ('streaming', validate_xml.validate_kaspi_xml, {'stream': True}),
+        ]
+        # Both validators parse with ET.parse, so the difference is in the checks
+        parse_seconds = None
+        baseline = None
+        for name, function, kwargs in runs:
+            seconds, valid = timed(function, xml_file, **kwargs)
+            if parse_seconds is None:
+                parse_seconds = seconds
+                print(f"  {name:<20} {seconds:7.3f}s")
+                continue
+            checks = max(seconds - parse_seconds, 1e-6)
+            baseline = baseline or checks
+            print(f"  {name:<20} {seconds:7.3f}s  checks {checks:6.3f}s  x{baseline / checks:5.1f}  valid={valid}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Benchmark the streaming XML writer against ElementTree + minidom
+"""
+
+import io
+import json
+import os
+import subprocess
+import sys
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from benchutil import peak_rss_kb
+from fake_wipon import make_catalog
+
+DATE = "2026-01-01 00:00:00"
+
+def run_minidom(products, sink):
+    from fetch_and_convert import convert_to_kaspi_xml, format_xml
+    sink.write(format_xml(convert_to_kaspi_xml({'data': products}, date=DATE)))
+
+def run_streaming(products, sink):
+    from xml_writer import write_kaspi_xml
+    write_kaspi_xml(products, sink, date=DATE)
+
+IMPLEMENTATIONS = {
+    'minidom': run_minidom,
+    'streaming': run_streaming,
+}
+
+def child(impl, count):
+    """Measure one implementation in a fresh process so peak RSS is its own."""
+    products = make_catalog(count)
+    baseline_rss = peak_rss_kb()
+    with open(os.devnull, 'wb') as sink:
+        start = time.perf_counter()
+        IMPLEMENTATIONS[impl](products, sink)
+        seconds = time.perf_counter() - start
+    peak_rss = peak_rss_kb()
+    print(json.dumps({'seconds': seconds, 'peak_rss_kb': peak_rss,
+                      'extra_rss_kb': peak_rss - baseline_rss}))
+
+def measure(impl, count):
+    output = subprocess.run(
+        [sys.executable, __file__, '--child', impl, str(count)],
+        check=True, capture_output=True, text=True
+    ).stdout
+    return json.loads(output)
+
+def check_identical(count):
+    products = make_catalog(count)
+    outputs = []
+    for run in IMPLEMENTATIONS.values():
+        buf = io.BytesIO()
+        run(products, buf)
+        outputs.append(buf.getvalue())
+    return all(output == outputs[0] for output in outputs)
+
+def main():
+    import argparse
+    
+    parser = argparse.ArgumentParser(description='Benchmark Kaspi XML generation')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--child', nargs=2, metavar=('IMPL', 'COUNT'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    
+    if args.child:
+        child(args.child[0], int(args.child[1]))
+        return
+    
+    print(f"Byte-identical output: {'✅' if check_identical(1000) else '❌'}")
+    print(f"{'offers':>8}  {'impl':<10} {'time':>9}  {'peak RSS':>10}  {'RSS over input':>14}")
+    for count in args.sizes:
+        for impl in IMPLEMENTATIONS:
+            result = measure(impl, count)
+            print(f"{count:>8}  {impl:<10} {result['seconds']:8.3f}s  "
+                  f"{result['peak_rss_kb'] / 1024:8.1f}MB  {result['extra_rss_kb'] / 1024:12.1f}MB")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+"""
+Shared helpers for the benchmark scripts
+"""
+
+import resource
+
+def _status_kb(field):
+    try:
+        with open('/proc/self/status', 'r') as f:
+            for line in f:
+                if line.startswith(field):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+def rss_kb():
+    """Current resident set size of this process in KB (Linux only, else peak)."""
+    value = _status_kb('VmRSS:')
+    return value if value is not None else peak_rss_kb()
+
+def reset_peak_rss():
+    """Reset the peak RSS to the current RSS, so a later peak is a stage's own.
+    
+    Uses /proc/self/clear_refs (Linux 4.0+); returns False where unsupported.
+    """
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+        return True
+    except OSError:
+        return False
+
+def peak_rss_kb():
+    """Peak resident set size of this process in KB.
+    
+    Reads VmHWM on Linux because ru_maxrss survives exec() and would report
+    the parent's peak in a freshly spawned child process.
+    """
+    value = _status_kb('VmHWM:')
+    return value if value is not None else resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Local fake Wipon API server for benchmarks and offline testing
+"""
+
+import copy
+import hashlib
+import json
+import math
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def load_template():
+    """Load the first sample product as a template for synthetic items."""
+    with open(os.path.join(ROOT_DIR, 'sample_data.json'), 'r', encoding='utf-8') as f:
+        return json.load(f)['data'][0]
+
+def make_catalog(count):
+    """Build a deterministic synthetic catalog of ``count`` Wipon items."""
+    template = load_template()
+    catalog = []
+    for i in range(count):
+        item = copy.deepcopy(template)
+        item['id'] = 1000000 + i
+        item['vendor_code'] = f"S{i:06d}"
+        item['title'] = f"Brand{i % 37} | Товар {i} | П:{i % 90} | Р:{36 + i % 12}"
+        item['quantity'] = f"{(i % 7) - 1}.000"
+        item['selling_price'] = f"{1000 + (i * 37) % 90000}.00"
+        catalog.append(item)
+    return catalog
+
+class FakeWiponServer:
+    """Threaded HTTP server that serves a catalog page by page like Wipon.
+    
+    ``latency`` seconds are slept before each response to simulate the
+    round-trip cost of the real API. ``failures`` maps a page number to how
+    many times that page should answer 503 before succeeding. Every page is
+    served with an ETag and answers 304 to a matching ``If-None-Match``.
+    
+    ``max_per_page`` caps the page size whatever ``per_page`` asks for,
+    ``meta=False`` leaves out the ``meta`` block, and with ``max_in_flight``
+    requests beyond that many at once get a 429 with ``Retry-After: 1``.
+    """
+    
+    def __init__(self, catalog, latency=0.0, failures=None, host='127.0.0.1', port=0,
+                 max_per_page=None, meta=True, max_in_flight=None):
+        self.catalog = catalog
+        self.latency = latency
+        self.failures = dict(failures or {})
+        self.max_per_page = max_per_page
+        self.meta = meta
+        self.max_in_flight = max_in_flight
+        self.in_flight = 0
+        self.rate_limited = 0
+        self.requests_served = 0
+        self._bodies = {}
+        self._lock = threading.Lock()
+        self.httpd = ThreadingHTTPServer((host, port), self._make_handler())
+        self.httpd.daemon_threads = True
+        self._thread = None
+    
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/v2/employee/0/item"
+    
+    def _make_handler(self):
+        server = self
+        
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                query = parse_qs(urlparse(self.path).query)
+                page = int(query.get('page', ['1'])[0])
+                per_page = int(query.get('per_page', ['1000'])[0])
+                if server.max_per_page:
+                    per_page = min(per_page, server.max_per_page)
+                body = server.page_body(page, per_page)
+                
+                with server._lock:
+                    server.in_flight += 1
+                    limited = server.max_in_flight is not None and server.in_flight > server.max_in_flight
+                try:
+                    if server.latency:
+                        time.sleep(server.latency)
+                finally:
+                    with server._lock:
+                        server.in_flight -= 1
+                        server.requests_served += 1
+                        server.rate_limited += limited
+                        failing = not limited and server.failures.get(page, 0) > 0
+                        if failing:
+                            server.failures[page] -= 1
+                
+                if limited:
+                    self.send_response(429)
+                    self.send_header('Retry-After', '1')
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return
+                if failing:
+                    self.send_error(503)
+                    return
+                
+                etag = '"%s"' % hashlib.md5(body).hexdigest()
+                if self.headers.get('If-None-Match') == etag:
+                    self.send_response(304)
+                    self.send_header('ETag', etag)
+                    self.end_headers()
+                    return
+                
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('ETag', etag)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            
+            def log_message(self, format, *args):
+                pass
+        
+        return Handler
+    
+    def page(self, page, per_page):
+        """Return the JSON payload for one page."""
+        total = len(self.catalog)
+        start = (page - 1) * per_page
+        payload = {'data': self.catalog[start:start + per_page]}
+        if self.meta:
+            payload['meta'] = {
+                'current_page': page,
+                'per_page': per_page,
+                'total': total,
+                'last_page': max(1, math.ceil(total / per_page)),
+            }
+        return payload
+    
+    def update_item(self, index, **fields):
+        """Change one catalog item and invalidate the cached page bodies."""
+        self.catalog[index].update(fields)
+        self._bodies.clear()
+    
+    def page_body(self, page, per_page):
+        """Return the encoded JSON body for one page, cached after first use."""
+        key = (page, per_page)
+        if key not in self._bodies:
+            self._bodies[key] = json.dumps(self.page(page, per_page)).encode('utf-8')
+        return self._bodies[key]
+    
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+    
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+    
+    def __enter__(self):
+        return self.start()
+    
+    def __exit__(self, *exc):
+        self.stop()
+
+def main():
+    """Run the fake server in the foreground."""
+    import argparse
+    
+    parser = argparse.ArgumentParser(description='Serve a synthetic catalog through a fake Wipon API')
+    parser.add_argument('--items', type=int, default=10000, help='Number of synthetic products')
+    parser.add_argument('--latency', type=float, default=0.0, help='Seconds of delay per request')
+    parser.add_argument('--port', type=int, default=8765, help='Port to listen on')
+    args = parser.parse_args()
+    
+    server = FakeWiponServer(make_catalog(args.items), latency=args.latency, port=args.port)
+    print(f"Serving {args.items} products at {server.url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
+        sys.exit(0)
+
+if __name__ == "__main__":
+    main()
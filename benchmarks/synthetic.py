@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Deterministic synthetic Wipon catalogs for benchmarks
+
+Items have the full field set of a real Wipon item (see sample_data.json),
+titles in the shop's "Brand | Name (article) | П:NN | Р:NN" shape with
+Cyrillic text, and a realistic mix of quantities: mostly small integers,
+some zero, fractional and negative ones.
+"""
+
+import json
+import os
+import random
+import sys
+
+from fake_wipon import load_template
+
+BRANDS = ['Piena', 'Zarina', 'Мадина', 'Aliya', 'Жанна', 'Maison & Co', 'Lumière',
+          'Асель', 'Nomad', 'Қарлығаш', 'Orient "Style"', 'Tomiris']
+GARMENTS = ['Платье', 'Блузка', 'Юбка', 'Жакет', 'Брюки', 'Кардиган', 'Пальто',
+            'Костюм', 'Туника', 'Сарафан', 'Рубашка', 'Жилет']
+MATERIALS = ['из шелка-атласа', 'из льна', 'из хлопка', 'из вискозы', 'трикотажное',
+             'из шерсти', 'с кружевом', 'из органзы', 'плиссированное', '']
+COLORS = ['оранжевое', 'черное', 'белое', 'бежевое', 'синее', 'изумрудное',
+          'пудровое', 'бордовое', 'молочное', 'графитовое']
+STOCKS = [(81367, '334 бутик'), (81368, 'Склад'), (81369, 'ТРЦ Mega')]
+
+def make_title(rng, article):
+    brand = rng.choice(BRANDS)
+    name = ' '.join(part for part in (rng.choice(GARMENTS), rng.choice(MATERIALS),
+                                      rng.choice(COLORS)) if part)
+    shape = rng.random()
+    if shape < 0.05:
+        # A few titles have no brand segment at all
+        return f"{name} ({article})"
+    if shape < 0.10:
+        return f"{brand} | {name}"
+    return f"{brand} | {name} ({article}) | П:{rng.randint(1, 120)} | Р:{rng.choice(range(36, 58, 2))}"
+
+def make_quantity(rng):
+    roll = rng.random()
+    if roll < 0.03:
+        return f"-{rng.randint(1, 3)}.000"
+    if roll < 0.20:
+        return "0.000"
+    if roll < 0.25:
+        return f"{rng.randint(0, 4)}.{rng.choice(['250', '500', '750'])}"
+    return f"{rng.randint(1, 12)}.000"
+
+def generate_catalog(count, seed=0):
+    """Build ``count`` synthetic Wipon items; the same seed gives the same catalog."""
+    rng = random.Random(seed)
+    template = load_template()
+    catalog = []
+    for i in range(count):
+        article = f"{rng.randint(1000, 99999)}"
+        price = rng.randrange(2000, 250000, 100)
+        purchase = price * rng.choice([40, 50, 60]) // 100
+        quantity = make_quantity(rng)
+        stock_id, stock_name = rng.choice(STOCKS)
+        title = make_title(rng, article)
+        created = f"2025-{1 + i % 12:02d}-{1 + i % 28:02d}T{i % 24:02d}:{i % 60:02d}:00+05:00"
+
+        # Copy the template shallowly and give every item its own nested values
+        item = dict(template)
+        item.update({
+            'id': 70000000 + i,
+            'title': title,
+            'selling_price': f"{price}.00",
+            'vendor_code': f"{'OABK'[i % 4]}{i:06d}",
+            'barcode': f"{rng.randrange(10 ** 12, 10 ** 13)}",
+            'quantity': quantity,
+            'original_vendor_code': article,
+            'item_category_id': 150000 + i % 300,
+            'additional_percent': rng.choice([50, 80, 100, 120]),
+            'previous_purchase_price': f"{purchase}.00",
+            'old_selling_price': f"{price}.00",
+            'item_category_name': f"{title.split(' ', 1)[0]} | {rng.choice(BRANDS)}",
+            'arrival_balance_old': quantity,
+            'arrival_balance': quantity,
+            'arrivals_count': [{'stock': {'id': stock_id, 'name': stock_name}, 'count': quantity}],
+            'composites': [],
+            'images': [],
+            'additional_barcodes': [],
+            'properties': [],
+            'created_at': created,
+            'updated_at': created,
+        })
+        catalog.append(item)
+    return catalog
+
+def main():
+    """Write a synthetic catalog in the Wipon response shape."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Generate a synthetic Wipon catalog')
+    parser.add_argument('--items', type=int, default=10000, help='Number of products')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed')
+    parser.add_argument('--output', default='-', help='Output JSON file (default: stdout)')
+    args = parser.parse_args()
+
+    data = {'data': generate_catalog(args.items, args.seed)}
+    if args.output == '-':
+        json.dump(data, sys.stdout, ensure_ascii=False)
+    else:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+        print(f"✅ {args.items} products written to {args.output} "
+              f"({os.path.getsize(args.output) / 1024 / 1024:.1f} MB)")
+
+if __name__ == "__main__":
+    main()
@@ -27,5 +27,60 @@ API_PARAMS = {
 # Kaspi Store Configuration
 STORE_ID = "PP1"
 
+# Wipon stock id -> Kaspi storeId. With more than one entry every stock is
+# fetched concurrently and each offer gets one <availability> per store.
+STORE_MAPPING = {
+    STOCK_ID: STORE_ID,
+}
+
 # Output Configuration
 OUTPUT_FILE = "price.xml"
+
+# Item fields kept from each Wipon page (the rest of the ~40 fields is dropped
+# while decoding); set to None to keep full items
+WIPON_FIELDS = ("id", "vendor_code", "title", "quantity", "selling_price", "updated_at",
+                "previous_purchase_price", "additional_percent", "item_category_name")
+
+# Pricing Rules Configuration (see pricing.py; --pricing-rules FILE replaces them)
+# The most specific matching rule wins: brand + category, brand, category,
+# then the default rule without either. An empty list publishes selling_price.
+PRICING_RULES = [
+    # {"markup_percent": 5, "min_margin_percent": 30, "round_to": 100, "ending": 90},
+    # {"brand": "Piena", "markup_percent": 10},
+    # {"category": "Платье", "item_margin_floor": True},
+    # {"brand": "Piena", "category": "Костюм", "markup_percent": 0, "round_to": 1000, "ending": 990},
+]
+
+# XML Generation Configuration
+XML_WORKERS = 1  # Processes rendering offers; >1 renders shards in parallel (same output)
+XML_SHARD_SIZE = 5000  # Offers per shard handed to a worker process
+
+# Fetch Configuration
+FETCH_CONCURRENCY = 8  # Max pages in flight once meta.last_page is known (adapted to 429/5xx and latency)
+HTTP_TIMEOUT = 30  # Seconds per request (connect and read)
+HTTP_MAX_RETRIES = 4  # Retries per page before the run fails
+HTTP_BACKOFF_BASE = 0.5  # Seconds; doubled on every retry, with full jitter
+HTTP_BACKOFF_MAX = 30  # Upper bound for a single backoff delay
+FETCH_LATENCY_FACTOR = 4  # Pages this many times slower than the fastest one shrink the request window
+
+# Incremental Sync Configuration
+SNAPSHOT_FILE = "wipon_snapshot.json.gz"  # Local copy of the catalog used by --incremental
+FULL_REFRESH_HOURS = 24  # Re-download everything at least this often
+INCREMENTAL_SINCE_PARAM = None  # Wipon query parameter filtering by update time, if supported
+
+# History Configuration (--history)
+HISTORY_DIR = "history"  # Append-only price/stock history, queried with history.py
+
+# Page Cache Configuration (--cache / --offline)
+CACHE_DIR = ".wipon_cache"  # Directory of cached Wipon page responses
+CACHE_TTL = 3600  # Seconds a cached page is used instead of asking the API
+CACHE_MAX_MB = 200  # Least recently used pages are evicted beyond this size
+
+# Daemon Configuration
+REFRESH_INTERVAL = 300  # Seconds between feed refreshes in daemon mode
+REFRESH_JITTER = 0.1  # Each wait is randomly stretched or shrunk by up to this fraction
+
+# Feed Server Configuration
+SERVE_HOST = "0.0.0.0"
+SERVE_PORT = 8080
+SERVE_RELOAD_SECONDS = 2  # How often the server checks the feed file for a new version
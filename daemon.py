@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Daemon mode: keep the feed fresh from one long-running process.
+
+Instead of a cold start per update, the Wipon client (and its keep-alive
+connections) and the catalog snapshot stay in memory between refreshes, so
+each refresh only downloads what changed and rewrites price.xml when its
+offers did.
+"""
+
+import random
+import signal
+import sys
+import threading
+import time
+from datetime import datetime
+
+
+from config import (
+    COMPANY_NAME, MERCHANT_ID, OUTPUT_FILE, FETCH_CONCURRENCY, STORE_MAPPING,
+    REFRESH_INTERVAL, REFRESH_JITTER, SERVE_HOST
+)
+from wipon_client import WiponClient
+from snapshot import SnapshotStore
+from fetch_and_convert import sync_wipon_data, iter_store_offers
+from xml_writer import write_kaspi_xml_file
+from validate_xml import RecordValidator, print_report
+from feed_server import FeedStore, FeedServer
+
+class FeedDaemon:
+    """Refreshes the Kaspi feed every ``interval`` seconds, with jitter.
+
+    Single-store feeds are synced incrementally through a snapshot that is
+    loaded once and kept in memory; multi-store feeds fetch every stock on
+    each refresh. The feed is written to a temp file and swapped in with an
+    atomic rename only when its offers changed, so readers never see a
+    partial file. A failed refresh keeps the current feed and is retried at
+    the next interval.
+    """
+
+    def __init__(self, output=OUTPUT_FILE, interval=REFRESH_INTERVAL, jitter=REFRESH_JITTER,
+                 validate=False, url=None, snapshot_path=None, on_refresh=None):
+        self.output = output
+        self.on_refresh = on_refresh
+        self.interval = interval
+        self.jitter = jitter
+        self.validate = validate
+        self.client = WiponClient(url=url, pool_size=FETCH_CONCURRENCY * len(STORE_MAPPING))
+        self.snapshot = None
+        if len(STORE_MAPPING) == 1:
+            self.snapshot = SnapshotStore(snapshot_path) if snapshot_path else SnapshotStore()
+            self.snapshot.load()
+        self.runs = 0
+        self.failures = 0
+        self.last_stats = None
+        self._stop = threading.Event()
+
+    def refresh(self):
+        """Fetch the catalog once and swap in a new feed if offers changed."""
+        if self.snapshot is not None:
+            products = sync_wipon_data(client=self.client, snapshot=self.snapshot)['data']
+        else:
+            products = iter_store_offers(client=self.client)
+
+        validator = RecordValidator(COMPANY_NAME, MERCHANT_ID) if self.validate else None
+        stats = {}
+        write_kaspi_xml_file(products, self.output, if_changed=True, stats=stats,
+                             validator=validator)
+        if validator is not None and (not stats['valid'] or stats['invalid']):
+            print_report(validator.report, quiet=True)
+        return stats
+
+    def next_delay(self):
+        """The interval stretched or shrunk by a random ``jitter`` fraction."""
+        return max(0.0, self.interval * (1 + random.uniform(-self.jitter, self.jitter)))
+
+    def run(self, max_runs=None):
+        """Refresh until ``stop`` is called (or ``max_runs`` refreshes were done)."""
+        while not self._stop.is_set():
+            started = time.monotonic()
+            print(f"🔄 Refresh {self.runs + 1} at {datetime.now():%Y-%m-%d %H:%M:%S}")
+            try:
+                stats = self.refresh()
+            except Exception as e:  # KeyboardInterrupt and SystemExit still stop the daemon
+                self.failures += 1
+                print(f"❌ Refresh failed, keeping current {self.output}: {type(e).__name__}: {e}")
+            else:
+                self.last_stats = stats
+                if self.on_refresh is not None:
+                    self.on_refresh(stats)
+                elapsed = time.monotonic() - started
+                if not stats['valid']:
+                    print(f"❌ Validation failed, keeping current {self.output}")
+                elif stats['changed']:
+                    print(f"✅ {self.output} updated with {stats['offers']} offers in {elapsed:.1f}s")
+                else:
+                    print(f"✅ No offer changes in {elapsed:.1f}s, keeping current {self.output}")
+            self.runs += 1
+            if max_runs is not None and self.runs >= max_runs:
+                break
+            delay = self.next_delay()
+            print(f"⏳ Next refresh in {delay:.0f}s")
+            self._stop.wait(delay)
+
+    def stop(self, *_):
+        self._stop.set()
+
+    def close(self):
+        self.client.close()
+
+def main():
+    """Run the feed daemon until interrupted."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Keep the Kaspi XML price list fresh from a long-running process')
+    parser.add_argument('--interval', type=float, default=REFRESH_INTERVAL,
+                        help=f'Seconds between refreshes (default: {REFRESH_INTERVAL})')
+    parser.add_argument('--jitter', type=float, default=REFRESH_JITTER,
+                        help=f'Random fraction added to or taken from each interval (default: {REFRESH_JITTER})')
+    parser.add_argument('--output', default=OUTPUT_FILE, help=f'Feed file (default: {OUTPUT_FILE})')
+    parser.add_argument('--validate', action='store_true',
+                        help='Validate offers and leave invalid ones out of the feed')
+    parser.add_argument('--runs', type=int, help='Stop after this many refreshes')
+    parser.add_argument('--http', type=int, metavar='PORT',
+                        help='Also serve the feed over HTTP on this port (see feed_server.py)')
+    args = parser.parse_args()
+
+    server = None
+    on_refresh = None
+    if args.http:
+        # The daemon knows when it swapped the feed, so no file watcher is needed
+        store = FeedStore(args.output)
+        store.reload()
+        server = FeedServer(store, SERVE_HOST, args.http, reload_seconds=0).start()
+        on_refresh = lambda stats: store.reload()
+        print(f"🌐 Serving {args.output} at {server.url}")
+
+    daemon = FeedDaemon(output=args.output, interval=args.interval, jitter=args.jitter,
+                        validate=args.validate, on_refresh=on_refresh)
+    signal.signal(signal.SIGTERM, daemon.stop)
+    signal.signal(signal.SIGINT, daemon.stop)
+    print(f"🚀 Refreshing {args.output} every {args.interval:.0f}s (±{args.jitter:.0%})")
+    try:
+        daemon.run(max_runs=args.runs)
+    finally:
+        daemon.close()
+        if server is not None:
+            server.stop()
+    print(f"👋 Stopped after {daemon.runs} refreshes ({daemon.failures} failed)")
+    sys.exit(1 if daemon.runs and daemon.failures == daemon.runs else 0)
+
+if __name__ == "__main__":
+    main()
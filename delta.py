@@ -0,0 +1,127 @@
+"""
+Delta feeds: compare current offers with the previously published feed
+"""
+
+import json
+import xml.etree.ElementTree as ET
+
+from offers import Offer
+
+KASPI_NS = '{kaspiShopping}'
+
+def load_offers(xml_file):
+    """Read a published Kaspi feed into a dict of Offer records by SKU.
+
+    The file is parsed incrementally and each offer is cleared once read, so
+    only the compact records are kept. A missing file gives an empty dict.
+    """
+    offers = {}
+    try:
+        for _, elem in ET.iterparse(xml_file, events=('end',)):
+            if elem.tag != f'{KASPI_NS}offer':
+                continue
+            model = elem.findtext(f'{KASPI_NS}model') or ''
+            brand = elem.findtext(f'{KASPI_NS}brand') or ''
+            price = elem.findtext(f'{KASPI_NS}price') or '0'
+            stores = tuple(
+                (avail.get('storeId', ''), avail.get('available') == 'yes',
+                 int(avail.get('stockCount', 0)))
+                for avail in elem.iterfind(f'{KASPI_NS}availabilities/{KASPI_NS}availability')
+            )
+            available = any(store[1] for store in stores)
+            stock = sum(store[2] for store in stores)
+            sku = elem.get('sku', '')
+            # Single-store feeds keep stores=None, like freshly converted offers
+            offers[sku] = Offer(sku, model, brand, available, stock, int(float(price)),
+                                stores if len(stores) > 1 else None)
+            elem.clear()
+    except FileNotFoundError:
+        pass
+    return offers
+
+def diff_offers(previous, current):
+    """Compare two SKU-indexed offer dicts in a single pass over each.
+
+    Returns a report dict with the SKUs that were ``added``, ``changed`` or
+    ``removed``, the subset of changed and removed SKUs that became
+    ``unavailable``, per-field change counts and a ``summary`` of counts.
+    """
+    added = []
+    changed = []
+    unavailable = []
+    price_changes = 0
+    stock_changes = 0
+
+    for sku, offer in current.items():
+        old = previous.get(sku)
+        if old is None:
+            added.append(sku)
+        elif old != offer:
+            changed.append(sku)
+            if old.price != offer.price:
+                price_changes += 1
+            if (old.stock != offer.stock or old.available != offer.available
+                    or old.stores != offer.stores):
+                stock_changes += 1
+            if old.available and not offer.available:
+                unavailable.append(sku)
+
+    removed = [sku for sku in previous if sku not in current]
+    unavailable.extend(sku for sku in removed if previous[sku].available)
+
+    return {
+        'added': added,
+        'changed': changed,
+        'removed': removed,
+        'unavailable': unavailable,
+        'summary': {
+            'previous': len(previous),
+            'current': len(current),
+            'added': len(added),
+            'changed': len(changed),
+            'price_changed': price_changes,
+            'stock_changed': stock_changes,
+            'removed': len(removed),
+            'unavailable': len(unavailable),
+            'unchanged': len(current) - len(added) - len(changed),
+        }
+    }
+
+def delta_offers(previous, current, report):
+    """Yield the offers of a delta feed for ``report``.
+
+    Added and changed offers are published as they are now; removed offers
+    are published as unavailable so Kaspi stops selling them.
+    """
+    for sku in report['added']:
+        yield current[sku]
+    for sku in report['changed']:
+        yield current[sku]
+    for sku in report['removed']:
+        offer = previous[sku]
+        stores = tuple((store_id, False, 0) for store_id, _, _ in offer.stores) if offer.stores else None
+        yield offer._replace(available=False, stock=0, stores=stores)
+
+def change_report(previous, current, report):
+    """Build a compact JSON-serializable change report.
+
+    Each change is ``[sku, old_price, new_price, old_stock, new_stock]`` with
+    None for the side where the SKU does not exist.
+    """
+    def row(sku):
+        old = previous.get(sku)
+        new = current.get(sku)
+        return [sku,
+                old.price if old else None, new.price if new else None,
+                old.stock if old else None, new.stock if new else None]
+
+    return {
+        'summary': report['summary'],
+        'added': [row(sku) for sku in report['added']],
+        'changed': [row(sku) for sku in report['changed']],
+        'removed': [row(sku) for sku in report['removed']],
+    }
+
+def write_change_report(previous, current, report, path):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(change_report(previous, current, report), f, ensure_ascii=False)
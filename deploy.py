@@ -4,29 +4,22 @@ Deployment script for GitHub Pages
 This script prepares the files for GitHub Pages deployment
 """
 
+import gzip
+import hashlib
+import json
 import os
-import shutil
+import re
+import sys
 from datetime import datetime
 
-def deploy_to_gh_pages():
-    """Prepare files for GitHub Pages deployment."""
-    
-    # Create gh-pages directory
-    gh_pages_dir = "gh-pages"
-    if os.path.exists(gh_pages_dir):
-        shutil.rmtree(gh_pages_dir)
-    os.makedirs(gh_pages_dir)
-    
-    # Copy XML file to gh-pages directory
-    if os.path.exists("price.xml"):
-        shutil.copy2("price.xml", gh_pages_dir)
-        print("✅ Copied price.xml to gh-pages directory")
-    else:
-        print("❌ price.xml not found. Please run fetch_and_convert.py first.")
-        return False
-    
-    # Create index.html for GitHub Pages
-    index_content = f"""<!DOCTYPE html>
+from config import OUTPUT_FILE
+
+MANIFEST_FILE = "manifest.json"
+
+def render_index(updated=None):
+    """Build the index.html page linking to price.xml."""
+    updated = updated or datetime.now()
+    return f"""<!DOCTYPE html>
 <html lang="en">
 <head>
     <meta charset="UTF-8">
@@ -99,25 +92,120 @@ def deploy_to_gh_pages():
         </ol>
         
         <div class="timestamp">
-            Last updated: {datetime.now().strftime("%Y-%m-%d %H:%M:%S UTC")}
+            Last updated: {updated.strftime("%Y-%m-%d %H:%M:%S UTC")}
         </div>
     </div>
 </body>
 </html>"""
+
+def read_feed_date(path):
+    """Return the ``date`` stamp of a Kaspi feed, or None if it has none."""
+    with open(path, 'rb') as f:
+        head = f.read(512).decode('utf-8', 'replace')
+    match = re.search(r'<kaspi_catalog[^>]*\sdate="([^"]+)"', head)
+    if not match:
+        return None
+    try:
+        return datetime.strptime(match.group(1), "%Y-%m-%d %H:%M:%S")
+    except ValueError:
+        return None
+
+def load_manifest(path):
+    """Read a deploy manifest; a missing or unreadable one is empty."""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f).get('files', {})
+    except (FileNotFoundError, ValueError):
+        return {}
+
+def write_atomic(path, content):
+    """Write bytes to ``path`` through a temp file and a rename."""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(content)
+    os.replace(tmp_path, path)
+
+def deploy_to_gh_pages(source=OUTPUT_FILE, gh_pages_dir="gh-pages"):
+    """Prepare files for GitHub Pages deployment.
+    
+    Publishes the feed, a precompressed copy of it and index.html, and
+    records their SHA-256 and size in manifest.json. An artifact is only
+    rewritten (atomically, via temp file and rename) when its hash differs
+    from the manifest, so unchanged feeds cause no writes at all. Files that
+    an earlier deploy published but that are no longer produced are removed;
+    anything else in the directory is left alone.
+    """
+    if not os.path.exists(source):
+        print(f"❌ {source} not found. Please run fetch_and_convert.py first.")
+        return False
+    os.makedirs(gh_pages_dir, exist_ok=True)
     
-    with open(os.path.join(gh_pages_dir, "index.html"), "w", encoding="utf-8") as f:
-        f.write(index_content)
+    manifest_path = os.path.join(gh_pages_dir, MANIFEST_FILE)
+    previous = load_manifest(manifest_path)
     
-    print("✅ Created index.html for GitHub Pages")
+    def unchanged(name, digest):
+        return (previous.get(name, {}).get('sha256') == digest
+                and os.path.exists(os.path.join(gh_pages_dir, name)))
+    
+    with open(source, 'rb') as f:
+        feed = f.read()
+    feed_name = os.path.basename(source)
+    feed_digest = hashlib.sha256(feed).hexdigest()
+    
+    # The index shows the feed's own date stamp, so it only changes with the feed
+    index = render_index(read_feed_date(source)).encode('utf-8')
+    artifacts = {feed_name: feed, 'index.html': index}
+    files = {}
+    
+    gz_name = f"{feed_name}.gz"
+    if (gz_name in previous and unchanged(feed_name, feed_digest)
+            and unchanged(gz_name, previous[gz_name]['sha256'])):
+        # Compressing is the costly part, so reuse the published copy
+        files[gz_name] = previous[gz_name]
+    else:
+        artifacts[gz_name] = gzip.compress(feed, compresslevel=9, mtime=0)
+    
+    written = []
+    for name, content in artifacts.items():
+        digest = feed_digest if content is feed else hashlib.sha256(content).hexdigest()
+        files[name] = {'sha256': digest, 'size': len(content)}
+        if not unchanged(name, digest):
+            write_atomic(os.path.join(gh_pages_dir, name), content)
+            written.append(name)
+    
+    for name in previous:
+        if name not in files:
+            try:
+                os.remove(os.path.join(gh_pages_dir, name))
+                print(f"🗑️  Removed {name}")
+            except FileNotFoundError:
+                pass
+    
+    files = dict(sorted(files.items()))
+    if written or files != previous:
+        manifest = json.dumps({'files': files}, indent=2, sort_keys=True) + '\n'
+        write_atomic(manifest_path, manifest.encode('utf-8'))
+    
+    if written:
+        for name in written:
+            print(f"✅ Updated {name} ({files[name]['size']} bytes)")
+    else:
+        print("✅ No changes, nothing to deploy")
     print(f"✅ Deployment files ready in {gh_pages_dir}/ directory")
-    print("\n📝 Next steps:")
-    print("1. Commit and push your changes")
-    print("2. Enable GitHub Pages in repository settings")
-    print("3. Set source to 'gh-pages' branch")
-    print("4. Your price list will be available at:")
-    print("   https://YOUR_USERNAME.github.io/wipon-kaspi/price.xml")
     
     return True
 
+def main(argv=None):
+    """Prepare the GitHub Pages directory."""
+    import argparse
+    
+    parser = argparse.ArgumentParser(description='Prepare the price list for GitHub Pages')
+    parser.add_argument('--source', default=OUTPUT_FILE, help=f'Feed file to publish (default: {OUTPUT_FILE})')
+    parser.add_argument('--dir', default='gh-pages', help='Directory to publish from (default: gh-pages)')
+    args = parser.parse_args(argv)
+    
+    if not deploy_to_gh_pages(args.source, args.dir):
+        sys.exit(1)
+
 if __name__ == "__main__":
-    deploy_to_gh_pages()
+    main()
@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+Lightweight HTTP server for the generated feed
+
+Serves price.xml and index.html from memory with precomputed gzip bodies,
+ETag / Last-Modified validators and 304 answers to conditional GETs. The
+feed file is watched and reloaded when the generator swaps in a new one.
+"""
+
+import gzip
+import hashlib
+import os
+import sys
+import threading
+from datetime import datetime
+from email.utils import formatdate, parsedate_to_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from config import OUTPUT_FILE, SERVE_HOST, SERVE_PORT, SERVE_RELOAD_SECONDS
+from deploy import render_index
+
+def accepts_gzip(accept_encoding):
+    """True when an Accept-Encoding header allows a gzip response.
+
+    Codings are weighed by their q-value, and ``q=0`` refuses one. ``*``
+    covers gzip unless gzip is listed on its own.
+    """
+    weights = {}
+    for item in accept_encoding.split(','):
+        coding, *params = item.split(';')
+        weight = 1.0
+        for param in params:
+            name, _, value = param.partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    weight = float(value)
+                except ValueError:
+                    weight = 0.0
+        weights[coding.strip().lower()] = weight
+    weight = weights.get('gzip', weights.get('x-gzip', weights.get('*', 0.0)))
+    return weight > 0
+
+class Resource:
+    """One servable document: body, gzip body and validators, all precomputed."""
+
+    __slots__ = ('body', 'gzip_body', 'etag', 'mtime', 'last_modified', 'content_type')
+
+    def __init__(self, body, mtime, content_type):
+        self.body = body
+        self.gzip_body = gzip.compress(body, compresslevel=9, mtime=0)
+        self.etag = hashlib.sha256(body).hexdigest()[:32]
+        # HTTP dates have second precision
+        self.mtime = int(mtime)
+        self.last_modified = formatdate(self.mtime, usegmt=True)
+        self.content_type = content_type
+
+    def matches(self, if_none_match):
+        """True when an If-None-Match header lists this resource's ETag."""
+        for tag in if_none_match.split(','):
+            tag = tag.strip()
+            if tag == '*':
+                return True
+            if tag.startswith('W/'):
+                tag = tag[2:]
+            # Both the plain and the gzip representation validate the content
+            if tag.strip('"') in (self.etag, f"{self.etag}-gz"):
+                return True
+        return False
+
+    def not_modified_since(self, if_modified_since):
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        return since is not None and since.timestamp() >= self.mtime
+
+class FeedStore:
+    """In-memory copy of the feed and the index page.
+
+    ``reload`` re-reads the feed only when its file changed (mtime, size or
+    inode, which an atomic rename always changes), so a watcher can call it
+    often. Resources are replaced as a whole, so a request always sees one
+    consistent version.
+    """
+
+    def __init__(self, path=OUTPUT_FILE):
+        self.path = path
+        self.resources = {}
+        self._stat = None
+        self._lock = threading.Lock()
+
+    def reload(self):
+        """Load the feed if it changed on disk; returns True when it did."""
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return False
+        key = (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+        if key == self._stat:
+            return False
+        with self._lock:
+            with open(self.path, 'rb') as f:
+                body = f.read()
+            name = os.path.basename(self.path)
+            index = render_index(datetime.fromtimestamp(stat.st_mtime)).encode('utf-8')
+            self.resources = {
+                f'/{name}': Resource(body, stat.st_mtime, 'application/xml; charset=utf-8'),
+                '/': Resource(index, stat.st_mtime, 'text/html; charset=utf-8'),
+                '/index.html': Resource(index, stat.st_mtime, 'text/html; charset=utf-8'),
+            }
+            self._stat = key
+        print(f"🔁 Loaded {self.path} ({len(body)} bytes)")
+        return True
+
+    def get(self, path):
+        return self.resources.get(path.split('?', 1)[0])
+
+class FeedServer:
+    """Threaded HTTP server for a ``FeedStore``, with an optional file watcher."""
+
+    def __init__(self, store, host=SERVE_HOST, port=SERVE_PORT, reload_seconds=SERVE_RELOAD_SECONDS):
+        self.store = store
+        self.reload_seconds = reload_seconds
+        self.httpd = ThreadingHTTPServer((host, port), self._make_handler())
+        self.httpd.daemon_threads = True
+        self._stop = threading.Event()
+        self._threads = []
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _make_handler(self):
+        store = self.store
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                self.respond(send_body=True)
+
+            def do_HEAD(self):
+                self.respond(send_body=False)
+
+            def respond(self, send_body):
+                resource = store.get(self.path)
+                if resource is None:
+                    self.send_response(404)
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return
+
+                if_none_match = self.headers.get('If-None-Match')
+                if_modified_since = self.headers.get('If-Modified-Since')
+                # If-None-Match takes precedence over If-Modified-Since (RFC 9110)
+                if if_none_match is not None:
+                    not_modified = resource.matches(if_none_match)
+                else:
+                    not_modified = (if_modified_since is not None
+                                    and resource.not_modified_since(if_modified_since))
+
+                use_gzip = accepts_gzip(self.headers.get('Accept-Encoding', ''))
+                etag = f'"{resource.etag}-gz"' if use_gzip else f'"{resource.etag}"'
+                self.send_response(304 if not_modified else 200)
+                self.send_header('ETag', etag)
+                self.send_header('Last-Modified', resource.last_modified)
+                self.send_header('Cache-Control', 'no-cache')
+                self.send_header('Vary', 'Accept-Encoding')
+                if not_modified:
+                    self.end_headers()
+                    return
+
+                body = resource.gzip_body if use_gzip else resource.body
+                self.send_header('Content-Type', resource.content_type)
+                if use_gzip:
+                    self.send_header('Content-Encoding', 'gzip')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                if send_body:
+                    self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def _watch(self):
+        while not self._stop.wait(self.reload_seconds):
+            try:
+                self.store.reload()
+            except OSError as e:
+                print(f"⚠️  Could not reload {self.store.path}: {e}")
+
+    def _start_watcher(self):
+        if self.reload_seconds:
+            watcher = threading.Thread(target=self._watch, daemon=True)
+            watcher.start()
+            self._threads.append(watcher)
+
+    def start(self):
+        """Serve (and watch the feed, unless ``reload_seconds`` is 0) in background threads."""
+        self._start_watcher()
+        server = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        server.start()
+        self._threads.append(server)
+        return self
+
+    def serve_forever(self):
+        """Serve in the calling thread until interrupted."""
+        self._start_watcher()
+        try:
+            self.httpd.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self._stop.set()
+            self.httpd.server_close()
+
+    def stop(self):
+        self._stop.set()
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        for thread in self._threads:
+            thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+def main():
+    """Serve the generated feed until interrupted."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Serve the Kaspi XML price list over HTTP')
+    parser.add_argument('--host', default=SERVE_HOST, help=f'Address to listen on (default: {SERVE_HOST})')
+    parser.add_argument('--port', type=int, default=SERVE_PORT, help=f'Port to listen on (default: {SERVE_PORT})')
+    parser.add_argument('--file', default=OUTPUT_FILE, help=f'Feed file to serve (default: {OUTPUT_FILE})')
+    args = parser.parse_args()
+
+    store = FeedStore(args.file)
+    if not store.reload():
+        print(f"❌ {args.file} not found. Please run fetch_and_convert.py first.")
+        sys.exit(1)
+
+    server = FeedServer(store, args.host, args.port)
+    print(f"🌐 Serving {args.file} at {server.url}/{os.path.basename(args.file)}")
+    server.serve_forever()
+
+if __name__ == "__main__":
+    main()
@@ -3,108 +3,345 @@
 Script to fetch product data from Wipon API and convert to Kaspi XML format.
 """
 
-import requests
-import xml.etree.ElementTree as ET
-from xml.dom import minidom
 from datetime import datetime
 import json
 import sys
-import os
+from collections import deque
+from contextlib import nullcontext
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor
 from config import (
-    COMPANY_NAME, MERCHANT_ID, WIPON_API_URL, API_PARAMS, 
-    STORE_ID, OUTPUT_FILE
+    COMPANY_NAME, MERCHANT_ID, API_PARAMS, STORE_ID, OUTPUT_FILE,
+    FETCH_CONCURRENCY, INCREMENTAL_SINCE_PARAM, STORE_MAPPING, CACHE_DIR, CACHE_TTL,
+    XML_WORKERS, HISTORY_DIR
 )
+from xml_writer import write_kaspi_xml_file
+from offers import page_to_offers, join_store_offers
+import pricing
 
-def fetch_wipon_data(use_sample=False):
-    """Fetch product data from Wipon API or use sample data."""
-    if use_sample:
-        try:
-            with open('sample_data.json', 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except FileNotFoundError:
-            print("Sample data file not found. Please create sample_data.json")
-            sys.exit(1)
+def fetch_page(client, page, snapshot=None, params=None):
+    """Fetch a single page of products from Wipon API.
     
-    url = WIPON_API_URL
+    With a ``snapshot`` the page is requested conditionally and a 304 answer
+    is served from the snapshot.
+    """
+    print(f"Fetching page {page}...")
+    if snapshot is None:
+        return client.fetch_page(page, params)
     
-    # Add authentication headers
-    token = os.getenv('WIPON_API_TOKEN')
-    headers = {
-        'Accept': 'application/json'
-    }
-    if token:
-        headers['Authorization'] = f'Bearer {token}'
+    etag = snapshot.page_etag(page) if snapshot.can_reuse_page(page) else None
+    data, etag = client.fetch_page_conditional(page, etag, params)
+    if data is None:
+        print(f"Page {page} not modified, reusing snapshot")
+        return snapshot.reuse_page(page)
+    snapshot.store_page(page, etag, data)
+    return data
+
+def iter_wipon_pages(url=None, concurrency=None, client=None, snapshot=None, params=None,
+                     transform=None, stats=None):
+    """Yield the product list of each Wipon page, in page order.
+    
+    Page 1 is fetched first to learn ``meta.last_page``; the remaining pages
+    are then fetched concurrently (up to ``concurrency`` at a time, defaulting
+    to FETCH_CONCURRENCY) and yielded in page order as soon as each one is
+    next in line. At most ``concurrency`` pages are in flight or buffered, so
+    memory stays bounded by a few pages whatever the catalog size. Within
+    that bound the client's RateController sets how many pages are in
+    flight, backing off on 429/5xx answers and slow pages. Every page up to
+    ``meta.last_page`` is fetched; an empty page ends the walk early.
+    
+    Without ``meta`` pages are fetched one by one until a page is empty or
+    shorter than page 1, whose length is the API's real page size.
+    
+    ``transform`` is applied to each page's product list right after it is
+    downloaded (in the worker thread), so e.g. ``offers.page_to_offers`` lets
+    the raw dicts be dropped before the page is buffered. If ``stats`` is a
+    dict its ``products`` key counts the raw products received.
+    
+    All pages share one pooled ``WiponClient``; pass ``client`` to reuse an
+    existing one. Request errors propagate to the caller.
+    """
+    concurrency = max(1, concurrency or FETCH_CONCURRENCY)
+    owns_client = client is None
+    if owns_client:
+        from wipon_client import WiponClient, RateController
+        client = WiponClient(url=url, pool_size=concurrency, controller=RateController(concurrency))
+    if stats is not None:
+        stats.setdefault('products', 0)
+    
+    def project(products):
+        if stats is not None:
+            stats['products'] += len(products)
+        return transform(products) if transform is not None else products
+    
+    def load_page(p):
+        products = fetch_page(client, p, snapshot, params).get('data') or []
+        return len(products), transform(products) if transform is not None else products
     
-    all_products = []
     page = 1
+    controller = client.controller
     
     try:
-        while True:
-            params = API_PARAMS.copy()
-            params['page'] = page
-            
-            print(f"Fetching page {page}...")
-            response = requests.get(url, params=params, headers=headers)
-            response.raise_for_status()
+        data = fetch_page(client, page, snapshot, params)
+        page_products = data.get('data') or []
+        requested = int((params if params is not None else API_PARAMS).get('per_page') or 0)
+        
+        if 'meta' in data:
+            meta = data['meta']
+            print(f"API Info: {meta.get('total', 'unknown')} total products across {meta.get('last_page', 'unknown')} pages")
             
-            data = response.json()
+            if page_products:
+                print(f"Found {len(page_products)} products on page {page}")
+            else:
+                print(f"No more products found on page {page}")
+            yield project(page_products)
             
-            # Debug: Print API response structure for first page
-            if page == 1 and 'meta' in data:
-                meta = data['meta']
-                print(f"API Info: {meta.get('total', 'unknown')} total products across {meta.get('last_page', 'unknown')} pages")
+            last_page = meta.get('last_page', page) or page
+            if last_page > page and 0 < len(page_products) < requested:
+                print(f"📏 The API caps pages at {len(page_products)} products (asked for {requested})")
             
-            # Check if we have products in this page
-            if 'data' not in data or not data['data']:
-                print(f"No more products found on page {page}")
-                break
-                
-            # Add products from this page
-            page_products = data['data']
-            all_products.extend(page_products)
-            print(f"Found {len(page_products)} products on page {page}")
+            if page_products and last_page > page:
+                remaining = iter(range(page + 1, last_page + 1))
+                workers = min(concurrency, last_page - page)
+                print(f"Fetching pages {page + 1}-{last_page} with up to {workers} workers...")
+                with ThreadPoolExecutor(max_workers=workers) as executor:
+                    # Keep a sliding window of in-flight pages and always wait
+                    # on the oldest one, so pages come out in order. The
+                    # window follows the client's RateController, which
+                    # shrinks it on 429/5xx answers and slow pages.
+                    pending = deque()
+                    exhausted = False
+                    while True:
+                        while not exhausted and len(pending) < min(workers, controller.window):
+                            next_page = next(remaining, None)
+                            if next_page is None:
+                                exhausted = True
+                            else:
+                                pending.append((next_page, executor.submit(load_page, next_page)))
+                        if not pending:
+                            break
+                        page, future = pending.popleft()
+                        count, page_items = future.result()
+                        if count == 0:
+                            # meta.last_page was stale; later pages are empty too
+                            exhausted = True
+                        
+                        print(f"Found {count} products on page {page}")
+                        if stats is not None:
+                            stats['products'] += count
+                        yield page_items
             
-            # Check if this is the last page
-            if 'meta' in data:
-                meta = data['meta']
-                if page >= meta.get('last_page', page):
-                    print(f"Reached last page ({meta.get('last_page', page)})")
+            print(f"Reached last page ({last_page})")
+        else:
+            # Without meta the page count is unknown, so walk pages sequentially
+            # until a page comes back empty or shorter than the first one,
+            # whose length is the API's real page size
+            page_size = len(page_products)
+            first_item = page_products[0] if page_products else None
+            while True:
+                if not page_products:
+                    print(f"No more products found on page {page}")
                     break
-            else:
-                # Fallback: if no meta, check if we got fewer products than expected
-                if len(page_products) < 250:  # API seems to limit to 250 per page
-                    print(f"Last page reached (got {len(page_products)} < 250)")
+                if page > 1 and page_products[0] == first_item:
+                    print(f"⚠️  Page {page} repeats page 1, the API ignores the page parameter")
                     break
                 
-            page += 1
-            
-            # Safety limit to prevent infinite loops
-            if page > 50:
-                print("Reached safety limit of 50 pages")
-                break
-        
-        print(f"Total products fetched: {len(all_products)}")
+                print(f"Found {len(page_products)} products on page {page}")
+                yield project(page_products)
+                
+                if len(page_products) < page_size:
+                    print(f"Last page reached (got {len(page_products)} < {page_size})")
+                    break
+                
+                page += 1
+                page_products = fetch_page(client, page, snapshot, params).get('data') or []
         
-        # Return in the same format as the original API response
-        return {
-            'data': all_products,
-            'meta': {
-                'total': len(all_products),
-                'pages_fetched': page - 1,
-                'last_page': page - 1
-            }
+        if controller.stats['slowdowns']:
+            print(f"🚦 Slowed down {controller.stats['slowdowns']} times (window down to "
+                  f"{controller.stats['min_window']}, now {controller.window}; "
+                  f"paused {controller.stats['paused_seconds']:.1f}s for rate limits)")
+    finally:
+        if owns_client:
+            client.close()
+
+def iter_wipon_products(**kwargs):
+    """Yield Wipon products one by one as their pages arrive.
+    
+    Accepts the same keyword arguments as ``iter_wipon_pages``.
+    """
+    for page_products in iter_wipon_pages(**kwargs):
+        yield from page_products
+
+def iter_wipon_offers(rules=None, **kwargs):
+    """Yield Offer records as their pages arrive.
+    
+    Each page is projected onto compact Offer records in one batch as soon
+    as it is downloaded, so the raw Wipon dicts never leave the worker.
+    Prices follow ``rules`` (a pricing.PriceRules), by default the active
+    pricing rules. Accepts the same keyword arguments as ``iter_wipon_pages``.
+    """
+    transform = page_to_offers if rules is None else partial(page_to_offers, rules=rules)
+    for page_offers in iter_wipon_pages(transform=transform, **kwargs):
+        yield from page_offers
+
+def iter_store_offers(store_mapping=None, url=None, concurrency=None, client=None, stats=None,
+                      rules=None):
+    """Yield multi-store Offer records for every stock in ``store_mapping``.
+    
+    ``store_mapping`` maps Wipon stock ids to Kaspi storeIds (STORE_MAPPING
+    by default). Every stock is fetched concurrently through one shared
+    ``WiponClient``, each with its own window of ``concurrency`` pages, and
+    the per-stock offers are joined by SKU (see ``offers.join_store_offers``)
+    so each offer carries one availability per store. If ``stats`` is a dict
+    its ``products`` key counts the raw products received over all stocks.
+    ``rules`` are the pricing rules, as for ``iter_wipon_offers``.
+    """
+    store_mapping = store_mapping or STORE_MAPPING
+    concurrency = max(1, concurrency or FETCH_CONCURRENCY)
+    owns_client = client is None
+    if owns_client:
+        from wipon_client import WiponClient
+        client = WiponClient(url=url, pool_size=concurrency * len(store_mapping))
+    
+    def load_stock(stock_id):
+        params = dict(API_PARAMS)
+        params['stock_id'] = stock_id
+        stock_stats = {}
+        offers = list(iter_wipon_offers(client=client, concurrency=concurrency,
+                                        params=params, stats=stock_stats, rules=rules))
+        return offers, stock_stats['products']
+    
+    try:
+        print(f"Fetching {len(store_mapping)} stocks: "
+              + ", ".join(f"{stock_id} -> {store_id}" for stock_id, store_id in store_mapping.items()))
+        with ThreadPoolExecutor(max_workers=len(store_mapping)) as executor:
+            futures = [(store_id, executor.submit(load_stock, stock_id))
+                       for stock_id, store_id in store_mapping.items()]
+            store_offers = []
+            for store_id, future in futures:
+                offers, count = future.result()
+                print(f"Store {store_id}: {len(offers)} offers from {count} products")
+                if stats is not None:
+                    stats['products'] = stats.get('products', 0) + count
+                store_offers.append((store_id, offers))
+    finally:
+        if owns_client:
+            client.close()
+    
+    yield from join_store_offers(store_offers)
+
+def fetch_wipon_data(use_sample=False, url=None, concurrency=None, client=None,
+                     snapshot=None, params=None):
+    """Fetch product data from Wipon API or use sample data.
+    
+    Collects every page from ``iter_wipon_pages`` into one list and returns
+    it in the API's ``{'data', 'meta'}`` shape. Request errors propagate to
+    the caller.
+    """
+    if use_sample:
+        try:
+            with open('sample_data.json', 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            print("Sample data file not found. Please create sample_data.json")
+            sys.exit(1)
+    
+    all_products = []
+    pages = 0
+    
+    for page_products in iter_wipon_pages(url=url, concurrency=concurrency, client=client,
+                                          snapshot=snapshot, params=params):
+        all_products.extend(page_products)
+        pages += 1
+    
+    print(f"Total products fetched: {len(all_products)}")
+    
+    # Return in the same format as the original API response
+    return {
+        'data': all_products,
+        'meta': {
+            'total': len(all_products),
+            'pages_fetched': pages,
+            'last_page': pages
         }
+    }
+
+def sync_wipon_data(url=None, concurrency=None, client=None, full_refresh=None,
+                    snapshot_path=None, snapshot=None):
+    """Incrementally sync the Wipon catalog into the local snapshot.
+    
+    A full refresh (every FULL_REFRESH_HOURS, or when forced) downloads every
+    page unconditionally and rebuilds the snapshot, dropping removed items.
+    Otherwise only changed data is downloaded: with INCREMENTAL_SINCE_PARAM
+    set, the API is asked for items updated since the last sync and those are
+    merged in; without it, pages are requested with their stored ETags and
+    unchanged pages are reused from the snapshot.
+    
+    Pass an already loaded ``snapshot`` to keep it in memory between syncs
+    (it is still saved after every sync).
+    
+    Returns the complete catalog in the same format as ``fetch_wipon_data``.
+    """
+    if snapshot is None:
+        from snapshot import SnapshotStore
         
-    except requests.exceptions.RequestException as e:
-        print(f"Error fetching data from Wipon API: {e}")
-        print("Falling back to sample data...")
-        return fetch_wipon_data(use_sample=True)
+        snapshot = SnapshotStore(snapshot_path) if snapshot_path else SnapshotStore()
+        snapshot.load()
+    else:
+        snapshot.start_sync()
+    if full_refresh is None:
+        full_refresh = snapshot.needs_full_refresh()
+        if snapshot.items and snapshot.fields_changed():
+            print("📋 The snapshot was fetched with other WIPON_FIELDS, refreshing it in full")
+    started = datetime.now()
+    
+    if full_refresh:
+        print("Full refresh: downloading the whole catalog...")
+        snapshot.pages = {}
+        data = fetch_wipon_data(url=url, concurrency=concurrency, client=client,
+                                snapshot=snapshot)
+        snapshot.replace(data['data'])
+    elif INCREMENTAL_SINCE_PARAM:
+        print(f"Incremental sync: items updated since {snapshot.last_sync}...")
+        params = dict(API_PARAMS)
+        params[INCREMENTAL_SINCE_PARAM] = snapshot.last_sync
+        data = fetch_wipon_data(url=url, concurrency=concurrency, client=client,
+                                params=params)
+        snapshot.merge(data['data'])
+    else:
+        print("Incremental sync: conditional page requests...")
+        data = fetch_wipon_data(url=url, concurrency=concurrency, client=client,
+                                snapshot=snapshot)
+        snapshot.replace(data['data'])
+    
+    snapshot.mark_synced(full_refresh, started)
+    snapshot.save()
+    
+    stats = snapshot.stats
+    print(f"📦 Snapshot sync: fetched {stats['fetched']} items, reused {stats['reused']} "
+          f"({stats['added']} new, {stats['changed']} changed, {stats['removed']} removed)")
+    
+    products = snapshot.products()
+    return {
+        'data': products,
+        'meta': {
+            'total': len(products),
+            'fetched': stats['fetched'],
+            'reused': stats['reused'],
+        }
+    }
 
-def convert_to_kaspi_xml(data):
-    """Convert Wipon JSON data to Kaspi XML format."""
+def convert_to_kaspi_xml(data, date=None):
+    """Convert Wipon JSON data to Kaspi XML format.
+    
+    Builds the whole document as an ElementTree. ``main()`` streams the same
+    output through ``xml_writer.write_kaspi_xml`` instead.
+    """
+    import xml.etree.ElementTree as ET
+    
     # Create root element
     root = ET.Element("kaspi_catalog")
-    root.set("date", datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+    root.set("date", date or datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
     root.set("xmlns", "kaspiShopping")
     root.set("xmlns:xsi", "http://www.w3.org/2001/XMLSchema-instance")
     root.set("xsi:schemaLocation", "kaspiShopping http://kaspi.kz/kaspishopping.xsd")
@@ -153,51 +390,225 @@ def convert_to_kaspi_xml(data):
             availability.set("storeId", STORE_ID)
             availability.set("stockCount", str(int(quantity)))
             
-            # Price (must be integer according to XSD)
+            # Price (must be integer according to XSD), after the pricing rules
             price = ET.SubElement(offer, "price")
-            price_value = float(product.get('selling_price', 0))
-            price.text = str(int(price_value))
+            price.text = str(pricing.active_rules.price(product, brand_text))
     
     return root
 
 def format_xml(root):
     """Format XML with proper indentation."""
+    import xml.etree.ElementTree as ET
+    from xml.dom import minidom
+    
     rough_string = ET.tostring(root, encoding='utf-8')
     reparsed = minidom.parseString(rough_string)
     return reparsed.toprettyxml(indent="  ", encoding='utf-8')
 
-def main():
+def main(argv=None):
     """Main function to fetch data and generate XML."""
     import argparse
     
     parser = argparse.ArgumentParser(description='Generate Kaspi XML price list from Wipon API')
     parser.add_argument('--sample', action='store_true', help='Use sample data instead of API')
-    args = parser.parse_args()
+    parser.add_argument('--incremental', action='store_true',
+                        help='Only download items changed since the last run (uses the local snapshot)')
+    parser.add_argument('--full-refresh', action='store_true',
+                        help='With --incremental, force a full download and rebuild the snapshot')
+    parser.add_argument('--if-changed', action='store_true',
+                        help='Keep the existing output file when no offer changed')
+    parser.add_argument('--validate', action='store_true',
+                        help='Validate offers while converting and leave invalid ones out of the feed')
+    parser.add_argument('--delta', metavar='PATH',
+                        help='Also write a delta feed with only added, changed and now-unavailable offers')
+    parser.add_argument('--delta-report', metavar='PATH',
+                        help='Write a JSON report of offer changes since the previous feed')
+    parser.add_argument('--workers', type=int,
+                        help=f'Processes rendering XML offers in parallel shards (default: {XML_WORKERS})')
+    parser.add_argument('--cache', action='store_true',
+                        help=f'Reuse Wipon pages cached in {CACHE_DIR} for up to {CACHE_TTL}s, '
+                             'and fall back to cached pages when the API is down')
+    parser.add_argument('--offline', action='store_true',
+                        help='Only use cached Wipon pages, whatever their age; fails on a missing page')
+    parser.add_argument('--metrics', metavar='PATH',
+                        help='Write a JSON run report with stage timings, HTTP stats and counts')
+    parser.add_argument('--prometheus', metavar='PATH',
+                        help='Write the run metrics in Prometheus text format')
+    parser.add_argument('--history', action='store_true',
+                        help=f'Append the price and stock changes of this run to the history in {HISTORY_DIR}/')
+    parser.add_argument('--pricing-rules', metavar='PATH',
+                        help='JSON file of pricing rules to use instead of PRICING_RULES in config.py')
+    args = parser.parse_args(argv)
+    
+    metrics = None
+    if args.metrics or args.prometheus:
+        from metrics import RunMetrics
+        
+        metrics = RunMetrics()
+    try:
+        generate_feed(args, metrics)
+    except SystemExit as e:
+        if metrics is not None and e.code:
+            metrics.status = 'failed'
+        raise
+    except BaseException:
+        if metrics is not None:
+            metrics.status = 'failed'
+        raise
+    finally:
+        if args.metrics:
+            metrics.write_json(args.metrics)
+            print(f"📈 Run report saved to {args.metrics}")
+        if args.prometheus:
+            metrics.write_prometheus(args.prometheus)
+
+def generate_feed(args, metrics=None):
+    """Fetch, convert and write the feed for the parsed command line ``args``.
+    
+    With a ``metrics`` collector (see metrics.RunMetrics) the HTTP requests,
+    stage durations and counts of the run are recorded in it.
+    """
+    def stage(name):
+        return metrics.stage(name) if metrics is not None else nullcontext()
+    
+    if args.pricing_rules:
+        pricing.use_rules(pricing.load_rules_file(args.pricing_rules))
+    if pricing.active_rules:
+        print(f"💲 Applying {len(pricing.active_rules.rules)} pricing rules")
     
+    cache = None
+    if not args.sample and (args.cache or args.offline):
+        from page_cache import PageCache
+        
+        cache = PageCache()
     if args.sample:
-        print("Using sample data...")
-        data = fetch_wipon_data(use_sample=True)
+        # requests is only imported when the API is used; except () catches nothing
+        client, fetch_errors = None, ()
     else:
-        print("Fetching data from Wipon API...")
-        data = fetch_wipon_data()
+        from requests.exceptions import RequestException
+        from wipon_client import WiponClient
+        
+        # One client for the whole run, so its metrics cover every request
+        client = WiponClient(pool_size=FETCH_CONCURRENCY * len(STORE_MAPPING),
+                             metrics=metrics, cache=cache, offline=args.offline)
+        fetch_errors = RequestException
+    with client if client is not None else nullcontext():
+        fetch_stats = {}
+        if args.sample:
+            print("Using sample data...")
+            products = fetch_wipon_data(use_sample=True).get('data', [])
+        elif len(STORE_MAPPING) > 1:
+            if args.incremental:
+                print("⚠️  --incremental tracks a single stock; fetching all stores in full")
+            # Stocks are fetched concurrently and joined into per-store availabilities
+            print("Fetching data from Wipon API...")
+            products = iter_store_offers(client=client, stats=fetch_stats)
+        elif args.incremental:
+            print("Syncing data from Wipon API...")
+            try:
+                with stage('fetch'):
+                    products = sync_wipon_data(client=client,
+                                               full_refresh=True if args.full_refresh else None)['data']
+            except fetch_errors as e:
+                # Publishing sample products would replace the real feed on Kaspi,
+                # so fail the run and keep the previously published price.xml
+                print(f"❌ Error fetching data from Wipon API: {e}")
+                sys.exit(1)
+        else:
+            # Pages are projected to offers and written as they arrive
+            print("Fetching data from Wipon API...")
+            products = iter_wipon_offers(client=client, stats=fetch_stats)
+    
+        # The previous feed is read before it gets replaced
+        track_changes = args.delta or args.delta_report
+        previous = current = None
+        if track_changes:
+            from delta import load_offers, diff_offers, delta_offers, write_change_report
+            
+            with stage('load_previous'):
+                previous = load_offers(OUTPUT_FILE)
+        if track_changes or args.history:
+            current = {}
+    
+        validator = None
+        if args.validate:
+            from validate_xml import RecordValidator, print_report
+            
+            validator = RecordValidator(COMPANY_NAME, MERCHANT_ID)
     
-    print(f"Found {len(data.get('data', []))} products")
+        print("Converting to Kaspi XML format...")
+        stats = {}
+        if metrics is not None:
+            # Time spent waiting for the next product is the API (and decoding);
+            # the rest of the generate stage is conversion and writing
+            products = metrics.timed_iter('fetch_wait', products)
+        try:
+            with stage('generate'):
+                write_kaspi_xml_file(products, OUTPUT_FILE, if_changed=args.if_changed, stats=stats,
+                                     offers_index=current, validator=validator, workers=args.workers,
+                                     save_digest=True)
+        except fetch_errors as e:
+            # The feed is written to a temp file first, so price.xml is untouched
+            print(f"❌ Error fetching data from Wipon API: {e}")
+            sys.exit(1)
     
-    print("Converting to Kaspi XML format...")
-    xml_root = convert_to_kaspi_xml(data)
+        product_count = fetch_stats.get('products', stats['products'])
+        print(f"Found {product_count} products")
+        if cache is not None:
+            cache_stats = cache.stats
+            print(f"🗄️  Page cache: {cache_stats['hits']} fresh and {cache_stats['stale_hits']} stale hits, "
+                  f"{cache_stats['stored']} stored, {cache_stats['evicted']} evicted "
+                  f"({cache.size() / 1024 / 1024:.1f} MB)")
+        if metrics is not None:
+            metrics.add_stage('convert_write', metrics.stages['generate'] - metrics.stages.get('fetch_wait', 0.0))
+            metrics.count('products', product_count, add=False)
+            metrics.count('offers', stats['offers'], add=False)
+            if len(STORE_MAPPING) == 1 or args.sample:
+                # Besides invalid offers, only products with a negative quantity have no offer
+                metrics.count('skipped_negative', product_count - stats['offers'] - stats['invalid'],
+                              add=False)
+            metrics.count('feed_changed', int(stats['changed']), add=False)
     
-    print("Formatting XML...")
-    formatted_xml = format_xml(xml_root)
+        if validator is not None:
+            print_report(validator.report)
+            if metrics is not None:
+                metrics.count('invalid_offers', stats['invalid'], add=False)
+            if not stats['valid']:
+                print(f"❌ Validation failed, {OUTPUT_FILE} was not updated")
+                sys.exit(1)
+            if stats['invalid']:
+                print(f"⚠️  {stats['invalid']} invalid offers were left out of {OUTPUT_FILE}")
     
-    # Save to file
-    with open(OUTPUT_FILE, 'wb') as f:
-        f.write(formatted_xml)
+        if track_changes:
+            with stage('delta'):
+                report = diff_offers(previous, current)
+                summary = report['summary']
+                print(f"Changes since previous feed: {summary['added']} added, {summary['changed']} changed "
+                      f"({summary['price_changed']} price, {summary['stock_changed']} stock), "
+                      f"{summary['removed']} removed, {summary['unavailable']} now unavailable")
+                if args.delta:
+                    delta_count = write_kaspi_xml_file(delta_offers(previous, current, report), args.delta)
+                    print(f"Delta feed with {delta_count} offers saved to {args.delta}")
+                if args.delta_report:
+                    write_change_report(previous, current, report, args.delta_report)
+                    print(f"Change report saved to {args.delta_report}")
+    
+        if args.history:
+            from history import HistoryStore
+            
+            with stage('history'):
+                rows = HistoryStore().append(current.values())
+            print(f"🕰️  {rows} price/stock changes recorded in {HISTORY_DIR}/")
+            if metrics is not None:
+                metrics.count('history_rows', rows, add=False)
     
-    print(f"XML price list saved to {OUTPUT_FILE}")
+        if not stats['changed']:
+            print(f"No offer changes (digest {stats['digest'][:12]}), keeping existing {OUTPUT_FILE}")
+            return
+        print(f"XML price list saved to {OUTPUT_FILE}")
     
-    # Print summary
-    offers_count = len(xml_root.find('offers'))
-    print(f"Generated XML with {offers_count} offers")
+        # Print summary
+        print(f"Generated XML with {stats['offers']} offers")
 
 if __name__ == "__main__":
     main()
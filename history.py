@@ -0,0 +1,308 @@
+#!/usr/bin/env python3
+"""
+Append-only price and stock history of every SKU in the feed
+
+Each run appends one block with the (sku, price, stockCount) rows that
+changed since the previous run, so a year of runs costs little more than
+the changes themselves. A SKU that leaves the feed gets a row with stock
+-1. Files in the history directory:
+
+  skus.txt     SKU per line; a SKU's number is its line number
+  history.bin  blocks of four zlib-compressed columns: SKU numbers (sorted),
+               prices, stock counts and the run of the SKU's previous change
+  runs.idx     one fixed-size record per run: timestamp, offset, size, rows
+  state.bin    latest price, stock and last changed run of every SKU, in
+               the same block layout (a cache, rebuilt from the blocks when
+               missing or behind)
+
+Queries memory-map runs.idx and history.bin. A SKU's history follows the
+previous-change links from its last run, so only the blocks that contain
+the SKU are decompressed; a time window is found by binary search over
+the index.
+
+  python history.py sku O43897
+  python history.py changes --since 2026-01-01 --until 2026-02-01
+"""
+
+import mmap
+import os
+import struct
+import sys
+import time
+import zlib
+from array import array
+from bisect import bisect_left
+from datetime import datetime
+
+from config import HISTORY_DIR
+
+SKUS_FILE = "skus.txt"
+DATA_FILE = "history.bin"
+INDEX_FILE = "runs.idx"
+STATE_FILE = "state.bin"
+
+# timestamp, offset in history.bin, block size, rows
+RUN_RECORD = struct.Struct('<qQII')
+# Array typecodes of the block columns: SKU number, price, stock, run
+COLUMNS = ('I', 'q', 'i', 'i')
+# compressed size of every column
+BLOCK_HEADER = struct.Struct('<' + 'I' * len(COLUMNS))
+# runs covered by state.bin
+STATE_HEADER = struct.Struct('<I')
+REMOVED = -1
+NO_RUN = -1
+
+def _encode_block(rows):
+    """Encode ``{sku_id: (price, stock, run)}`` as a block sorted by SKU number."""
+    ids = sorted(rows)
+    columns = [ids] + [[rows[sku_id][i] for sku_id in ids] for i in range(len(COLUMNS) - 1)]
+    compressed = [zlib.compress(array(code, values).tobytes(), 6)
+                  for code, values in zip(COLUMNS, columns)]
+    return BLOCK_HEADER.pack(*map(len, compressed)) + b''.join(compressed)
+
+def _decode_columns(buffer, offset, which):
+    """Decompress the columns numbered in ``which`` of the block at ``offset``."""
+    sizes = BLOCK_HEADER.unpack_from(buffer, offset)
+    start = offset + BLOCK_HEADER.size
+    columns = []
+    for i in which:
+        column_start = start + sum(sizes[:i])
+        values = array(COLUMNS[i])
+        values.frombytes(zlib.decompress(buffer[column_start:column_start + sizes[i]]))
+        columns.append(values)
+    return columns
+
+def _find(ids, sku_id):
+    """Row of ``sku_id`` in a sorted ids column, or None."""
+    row = bisect_left(ids, sku_id)
+    return row if row < len(ids) and ids[row] == sku_id else None
+
+def _map(path):
+    """Read-only memory map of ``path``, or b'' for a missing or empty file."""
+    try:
+        with open(path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return b''
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except FileNotFoundError:
+        return b''
+
+class HistoryStore:
+    """Price and stock history kept in ``directory``.
+
+    ``append`` adds a run from an iterable of Offers; ``sku_history`` and
+    ``changes`` query it. Writes go to the end of the files only, and the
+    index record of a block is written after the block, so an interrupted
+    append leaves at most a tail that the next ``append`` cuts off.
+    """
+
+    def __init__(self, directory=HISTORY_DIR):
+        self.directory = directory
+
+    def _path(self, name):
+        return os.path.join(self.directory, name)
+
+    def _read_skus(self):
+        try:
+            with open(self._path(SKUS_FILE), 'rb') as f:
+                data = f.read()
+        except FileNotFoundError:
+            return []
+        return data.decode('utf-8').split('\n')[:-1]
+
+    def _sku_id(self, sku):
+        """Number of ``sku`` without decoding the whole SKU list, or None."""
+        try:
+            with open(self._path(SKUS_FILE), 'rb') as f:
+                skus = f.read()
+        except FileNotFoundError:
+            return None
+        needle = sku.encode('utf-8') + b'\n'
+        if skus.startswith(needle):
+            return 0
+        position = skus.find(b'\n' + needle)
+        return None if position < 0 else skus.count(b'\n', 0, position + 1)
+
+    def _runs(self):
+        """Index records (timestamp, offset, size, rows) of all complete blocks."""
+        index = _map(self._path(INDEX_FILE))
+        return [RUN_RECORD.unpack_from(index, i * RUN_RECORD.size)
+                for i in range(len(index) // RUN_RECORD.size)]
+
+    def _read_state(self, runs, which=range(len(COLUMNS))):
+        """``(covered_runs, columns)`` of state.bin, or ``(0, None)`` if unusable."""
+        try:
+            with open(self._path(STATE_FILE), 'rb') as f:
+                data = f.read()
+            covered, = STATE_HEADER.unpack_from(data)
+            if covered > len(runs):
+                raise ValueError("state is ahead of the index")
+            return covered, _decode_columns(data, STATE_HEADER.size, which)
+        except (FileNotFoundError, ValueError, struct.error, zlib.error):
+            return 0, None
+
+    def _load_state(self, runs):
+        """Latest ``{sku_id: (price, stock, run)}``, replaying the blocks state.bin lacks."""
+        covered, columns = self._read_state(runs)
+        state = {} if columns is None else dict(zip(columns[0], zip(*columns[1:])))
+        if covered < len(runs):
+            blocks = _map(self._path(DATA_FILE))
+            for run in range(covered, len(runs)):
+                ids, prices, stocks = _decode_columns(blocks, runs[run][1], (0, 1, 2))
+                state.update((sku_id, (price, stock, run))
+                             for sku_id, price, stock in zip(ids, prices, stocks))
+        return state
+
+    def append(self, offers, timestamp=None):
+        """Record a run's offers; returns the number of changed rows written."""
+        timestamp = int(time.time() if timestamp is None else timestamp)
+        os.makedirs(self.directory, exist_ok=True)
+        runs = self._runs()
+        if runs and timestamp < runs[-1][0]:
+            raise ValueError(f"timestamp {timestamp} is before the last recorded run {runs[-1][0]}")
+
+        skus = self._read_skus()
+        sku_ids = {sku: i for i, sku in enumerate(skus)}
+        new_skus = []
+        current = {}
+        for offer in offers:
+            sku_id = sku_ids.get(offer.sku)
+            if sku_id is None:
+                if '\n' in offer.sku:
+                    raise ValueError(f"SKU {offer.sku!r} contains a newline")
+                sku_id = sku_ids[offer.sku] = len(skus) + len(new_skus)
+                new_skus.append(offer.sku)
+            current[sku_id] = (offer.price, offer.stock)
+
+        # Rows link to the run of the SKU's previous change
+        state = self._load_state(runs)
+        changed = {}
+        for sku_id, value in current.items():
+            old = state.get(sku_id)
+            if old is None or old[:2] != value:
+                changed[sku_id] = value + (NO_RUN if old is None else old[2],)
+        for sku_id in state.keys() - current.keys():
+            old = state[sku_id]
+            if old[1] != REMOVED:
+                changed[sku_id] = (0, REMOVED, old[2])
+        if not changed:
+            return 0
+
+        if new_skus:
+            with open(self._path(SKUS_FILE), 'ab') as f:
+                f.write(''.join(f"{sku}\n" for sku in new_skus).encode('utf-8'))
+        block = _encode_block(changed)
+        # Cut off the tail of an interrupted append before adding a block
+        end = runs[-1][1] + runs[-1][2] if runs else 0
+        with open(self._path(DATA_FILE), 'ab') as f:
+            f.truncate(end)
+            f.write(block)
+            f.flush()
+            os.fsync(f.fileno())
+        run = len(runs)
+        with open(self._path(INDEX_FILE), 'ab') as f:
+            f.truncate(run * RUN_RECORD.size)
+            f.write(RUN_RECORD.pack(timestamp, end, len(block), len(changed)))
+
+        state.update((sku_id, (price, stock, run)) for sku_id, (price, stock, _) in changed.items())
+        tmp_path = f"{self._path(STATE_FILE)}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(STATE_HEADER.pack(run + 1) + _encode_block(state))
+        os.replace(tmp_path, self._path(STATE_FILE))
+        return len(changed)
+
+    def sku_history(self, sku):
+        """``[(timestamp, price, stock), ...]`` of every change of ``sku``, oldest first."""
+        sku_id = self._sku_id(sku)
+        if sku_id is None:
+            return []
+        runs = self._runs()
+        blocks = _map(self._path(DATA_FILE))
+
+        # The last change is in a block newer than state.bin, or in state.bin
+        covered, columns = self._read_state(runs, (0, 3))
+        run = NO_RUN
+        for newer in range(len(runs) - 1, covered - 1, -1):
+            if _find(_decode_columns(blocks, runs[newer][1], (0,))[0], sku_id) is not None:
+                run = newer
+                break
+        else:
+            row = None if columns is None else _find(columns[0], sku_id)
+            if row is not None:
+                run = columns[1][row]
+
+        history = []
+        while run != NO_RUN:
+            ids, prices, stocks, previous = _decode_columns(blocks, runs[run][1], (0, 1, 2, 3))
+            row = _find(ids, sku_id)
+            history.append((runs[run][0], prices[row], stocks[row]))
+            run = previous[row]
+        history.reverse()
+        return history
+
+    def changes(self, since=None, until=None):
+        """``[(timestamp, sku, price, stock), ...]`` recorded in ``since <= timestamp < until``."""
+        runs = self._runs()
+        timestamps = [run[0] for run in runs]
+        first = 0 if since is None else bisect_left(timestamps, since)
+        last = len(runs) if until is None else bisect_left(timestamps, until)
+        if first >= last:
+            return []
+        skus = self._read_skus()
+        blocks = _map(self._path(DATA_FILE))
+        rows = []
+        for timestamp, offset, _, _ in runs[first:last]:
+            ids, prices, stocks = _decode_columns(blocks, offset, (0, 1, 2))
+            rows.extend((timestamp, skus[sku_id], price, stock)
+                        for sku_id, price, stock in zip(ids, prices, stocks))
+        return rows
+
+def parse_time(text):
+    """Unix timestamp of an ISO date or date-time in local time."""
+    return int(datetime.fromisoformat(text).timestamp())
+
+def format_time(timestamp):
+    return datetime.fromtimestamp(timestamp).strftime('%Y-%m-%d %H:%M:%S')
+
+def format_row(price, stock):
+    return ('', 'removed') if stock == REMOVED else (price, stock)
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Query the price and stock history of the feed')
+    parser.add_argument('--dir', default=HISTORY_DIR, help=f'History directory (default: {HISTORY_DIR})')
+    commands = parser.add_subparsers(dest='command', required=True)
+    sku_parser = commands.add_parser('sku', help='Price and stock changes of one SKU')
+    sku_parser.add_argument('sku')
+    changes_parser = commands.add_parser('changes', help='All changes in a time window')
+    changes_parser.add_argument('--since', type=parse_time, help='Start (ISO date or date-time, inclusive)')
+    changes_parser.add_argument('--until', type=parse_time, help='End (ISO date or date-time, exclusive)')
+    changes_parser.add_argument('--out-of-stock', action='store_true',
+                                help='Only SKUs that went out of stock or left the feed')
+    args = parser.parse_args()
+
+    store = HistoryStore(args.dir)
+    start = time.perf_counter()
+    if args.command == 'sku':
+        history = store.sku_history(args.sku)
+        if not history:
+            print(f"❌ No history for SKU {args.sku}")
+            sys.exit(1)
+        print(f"{'time':<19}  {'price':>10}  {'stock':>7}")
+        for timestamp, price, stock in history:
+            price, stock = format_row(price, stock)
+            print(f"{format_time(timestamp):<19}  {price:>10}  {stock:>7}")
+    else:
+        rows = store.changes(args.since, args.until)
+        if args.out_of_stock:
+            rows = [row for row in rows if row[3] <= 0]
+        print(f"{'time':<19}  {'sku':<20}  {'price':>10}  {'stock':>7}")
+        for timestamp, sku, price, stock in rows:
+            price, stock = format_row(price, stock)
+            print(f"{format_time(timestamp):<19}  {sku:<20}  {price:>10}  {stock:>7}")
+        print(f"📊 {len(rows)} changes")
+    print(f"⏱️  {(time.perf_counter() - start) * 1000:.1f} ms")
+
+if __name__ == "__main__":
+    main()
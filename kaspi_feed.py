@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Single entry point for the Kaspi feed tools
+
+  kaspi_feed.py fetch      download the Wipon catalog to a JSON file
+  kaspi_feed.py convert    convert a catalog file (or the sample data) to price.xml
+  kaspi_feed.py validate   validate a Kaspi XML file (see validate_xml.py)
+  kaspi_feed.py deploy     prepare gh-pages/ (see deploy.py)
+  kaspi_feed.py run-all    fetch, convert, validate and deploy in one process
+
+Modules are imported by the command that needs them, so e.g. ``validate``
+never loads requests. ``run-all`` streams the catalog straight from the API
+into the writer and validates offers as they are written, instead of
+handing files from one script to the next.
+"""
+
+import sys
+
+def _exit_on_fetch_error(function):
+    """Run ``function()``, turning Wipon request errors into exit code 1."""
+    from requests.exceptions import RequestException
+
+    try:
+        return function()
+    except RequestException as e:
+        print(f"❌ Error fetching data from Wipon API: {e}")
+        sys.exit(1)
+
+def fetch(argv):
+    """Download the Wipon catalog (or the sample data) to a JSON file."""
+    import argparse
+    import json
+    import os
+
+    from config import STORE_MAPPING
+
+    parser = argparse.ArgumentParser(prog='kaspi_feed.py fetch', description=fetch.__doc__)
+    parser.add_argument('--sample', action='store_true', help='Use sample data instead of API')
+    parser.add_argument('--incremental', action='store_true',
+                        help='Only download items changed since the last run (uses the local snapshot)')
+    parser.add_argument('--output', default='catalog.json', help='Catalog file (default: catalog.json)')
+    args = parser.parse_args(argv)
+
+    from fetch_and_convert import fetch_wipon_data, sync_wipon_data
+
+    if args.sample:
+        data = fetch_wipon_data(use_sample=True)
+    else:
+        if len(STORE_MAPPING) > 1:
+            print("⚠️  Only the first stock is saved; use run-all for a multi-store feed")
+        data = _exit_on_fetch_error(sync_wipon_data if args.incremental else fetch_wipon_data)
+
+    tmp_path = f"{args.output}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({'data': data.get('data', []), 'meta': data.get('meta', {})}, f, ensure_ascii=False)
+    os.replace(tmp_path, args.output)
+    print(f"✅ Saved {len(data.get('data', []))} products to {args.output}")
+
+def convert(argv):
+    """Convert a catalog file written by ``fetch`` (or the sample data) to Kaspi XML."""
+    import argparse
+    import json
+
+    from config import COMPANY_NAME, MERCHANT_ID, OUTPUT_FILE, XML_WORKERS
+
+    parser = argparse.ArgumentParser(prog='kaspi_feed.py convert', description=convert.__doc__)
+    parser.add_argument('--input', default='catalog.json', help='Catalog file (default: catalog.json)')
+    parser.add_argument('--sample', action='store_true', help='Convert sample_data.json instead of --input')
+    parser.add_argument('--output', default=OUTPUT_FILE, help=f'Feed file (default: {OUTPUT_FILE})')
+    parser.add_argument('--if-changed', action='store_true',
+                        help='Keep the existing output file when no offer changed')
+    parser.add_argument('--validate', action='store_true',
+                        help='Validate offers while converting and leave invalid ones out of the feed')
+    parser.add_argument('--workers', type=int,
+                        help=f'Processes rendering XML offers in parallel shards (default: {XML_WORKERS})')
+    parser.add_argument('--pricing-rules', metavar='PATH',
+                        help='JSON file of pricing rules to use instead of PRICING_RULES in config.py')
+    args = parser.parse_args(argv)
+
+    import pricing
+    from validate_xml import RecordValidator, print_report
+    from xml_writer import write_kaspi_xml_file
+
+    if args.pricing_rules:
+        pricing.use_rules(pricing.load_rules_file(args.pricing_rules))
+    source = 'sample_data.json' if args.sample else args.input
+    try:
+        with open(source, 'r', encoding='utf-8') as f:
+            products = json.load(f).get('data', [])
+    except FileNotFoundError:
+        print(f"❌ {source} not found. Please run kaspi_feed.py fetch first.")
+        sys.exit(1)
+
+    validator = RecordValidator(COMPANY_NAME, MERCHANT_ID) if args.validate else None
+    stats = {}
+    write_kaspi_xml_file(products, args.output, if_changed=args.if_changed, stats=stats,
+                         validator=validator, workers=args.workers,
+                         save_digest=args.if_changed or args.output == OUTPUT_FILE)
+    print(f"Found {stats['products']} products")
+    if validator is not None:
+        print_report(validator.report)
+        if not stats['valid']:
+            print(f"❌ Validation failed, {args.output} was not updated")
+            sys.exit(1)
+        if stats['invalid']:
+            print(f"⚠️  {stats['invalid']} invalid offers were left out of {args.output}")
+    if not stats['changed']:
+        print(f"No offer changes (digest {stats['digest'][:12]}), keeping existing {args.output}")
+        return
+    print(f"Generated XML with {stats['offers']} offers in {args.output}")
+
+def validate(argv):
+    from validate_xml import main as validate_main
+
+    validate_main(argv)
+
+def deploy(argv):
+    from deploy import main as deploy_main
+
+    deploy_main(argv)
+
+def run_all(argv):
+    """Generate the feed with in-memory validation, then prepare gh-pages/.
+
+    Takes the options of fetch_and_convert.py. --validate is on unless
+    --no-validate is given: invalid offers are left out of the feed, and the
+    run only fails (before deploying) when the company or merchant ID is
+    missing.
+    """
+    from fetch_and_convert import main as generate_main
+    from deploy import main as deploy_main
+
+    if '--no-validate' in argv:
+        argv = [arg for arg in argv if arg != '--no-validate']
+    elif '--validate' not in argv:
+        argv = argv + ['--validate']
+    generate_main(argv)
+    deploy_main([])
+
+COMMANDS = {
+    'fetch': (fetch, 'Download the Wipon catalog to a JSON file'),
+    'convert': (convert, 'Convert a catalog file to Kaspi XML'),
+    'validate': (validate, 'Validate a Kaspi XML file'),
+    'deploy': (deploy, 'Prepare the GitHub Pages directory'),
+    'run-all': (run_all, 'Fetch, convert, validate and deploy in one process'),
+}
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        prog='kaspi_feed.py', description='Kaspi feed tools',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog='commands:\n' + '\n'.join(f'  {name:<10} {help_text}'
+                                         for name, (_, help_text) in COMMANDS.items())
+               + '\n\nRun "kaspi_feed.py COMMAND --help" for the options of a command.')
+    parser.add_argument('command', choices=COMMANDS, metavar='COMMAND')
+    parser.add_argument('args', nargs=argparse.REMAINDER, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    COMMANDS[args.command][0](args.args)
+
+if __name__ == "__main__":
+    main()
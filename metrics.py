@@ -0,0 +1,174 @@
+"""
+Run metrics: per-request HTTP stats, stage durations and counts for one run
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+PROMETHEUS_PREFIX = "kaspi_feed"
+
+class RunMetrics:
+    """Thread-safe collector for the metrics of one feed run.
+
+    ``record_request`` is called by WiponClient for every HTTP attempt,
+    ``stage`` times a block of the pipeline and ``count`` sets or adds to a
+    named counter. ``report`` turns everything into a JSON-serializable
+    dict, which ``write_json`` and ``write_prometheus`` save.
+    """
+
+    def __init__(self):
+        self.started = datetime.now()
+        self._clock = time.perf_counter()
+        self.requests = []
+        self.stages = {}
+        self.counts = {}
+        self.status = 'ok'
+        self._lock = threading.Lock()
+
+    def record_request(self, page, seconds, status=None, size=0, wire_size=None, error=None):
+        """Record one HTTP attempt; ``status`` is None when no response came back."""
+        with self._lock:
+            self.requests.append({
+                'page': page,
+                'seconds': round(seconds, 6),
+                'status': status,
+                'bytes': size,
+                'wire_bytes': size if wire_size is None else wire_size,
+                'error': error,
+            })
+
+    def count(self, name, value=1, add=True):
+        with self._lock:
+            self.counts[name] = self.counts.get(name, 0) + value if add else value
+
+    @contextmanager
+    def stage(self, name):
+        """Time the enclosed block; repeated stages add up."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_stage(name, time.perf_counter() - start)
+
+    def add_stage(self, name, seconds):
+        with self._lock:
+            self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    def timed_iter(self, name, iterable):
+        """Yield from ``iterable``, adding the time spent waiting on it to stage ``name``."""
+        iterator = iter(iterable)
+        while True:
+            start = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                self.add_stage(name, time.perf_counter() - start)
+                return
+            self.add_stage(name, time.perf_counter() - start)
+            yield item
+
+    def http_summary(self):
+        latencies = sorted(request['seconds'] for request in self.requests)
+        statuses = {}
+        for request in self.requests:
+            key = str(request['status']) if request['status'] is not None else 'error'
+            statuses[key] = statuses.get(key, 0) + 1
+
+        def quantile(q):
+            return latencies[min(len(latencies) - 1, int(q * len(latencies)))] if latencies else 0.0
+
+        return {
+            'requests': len(self.requests),
+            'pages': len({request['page'] for request in self.requests}),
+            'retries': self.counts.get('http_retries', 0),
+            'statuses': statuses,
+            'bytes': sum(request['bytes'] for request in self.requests),
+            'wire_bytes': sum(request['wire_bytes'] for request in self.requests),
+            'latency_seconds': {
+                'total': round(sum(latencies), 6),
+                'mean': round(sum(latencies) / len(latencies), 6) if latencies else 0.0,
+                'p50': quantile(0.50),
+                'p95': quantile(0.95),
+                'max': latencies[-1] if latencies else 0.0,
+            },
+        }
+
+    def report(self):
+        """The run report as a JSON-serializable dict."""
+        peak_kb = peak_rss_kb()
+        with self._lock:
+            counts = dict(self.counts)
+            counts.pop('http_retries', None)
+            return {
+                'status': self.status,
+                'started': self.started.isoformat(timespec='seconds'),
+                'duration_seconds': round(time.perf_counter() - self._clock, 6),
+                'peak_rss_mb': round(peak_kb / 1024, 1) if peak_kb is not None else None,
+                'stages': {name: round(seconds, 6) for name, seconds in self.stages.items()},
+                'counts': counts,
+                'http': self.http_summary(),
+                'requests': list(self.requests),
+            }
+
+    def write_json(self, path):
+        _write_atomic(path, json.dumps(self.report(), indent=2) + '\n')
+
+    def write_prometheus(self, path):
+        """Write the report in the Prometheus text format (e.g. for node_exporter's textfile collector)."""
+        _write_atomic(path, prometheus_text(self.report()))
+
+def prometheus_text(report):
+    """Render a run report in the Prometheus text exposition format."""
+    lines = []
+
+    def metric(name, help_text, samples, kind='gauge'):
+        lines.append(f"# HELP {PROMETHEUS_PREFIX}_{name} {help_text}")
+        lines.append(f"# TYPE {PROMETHEUS_PREFIX}_{name} {kind}")
+        for labels, value in samples:
+            label_text = ','.join(f'{key}="{val}"' for key, val in labels.items())
+            lines.append(f"{PROMETHEUS_PREFIX}_{name}{{{label_text}}} {value}" if label_text
+                         else f"{PROMETHEUS_PREFIX}_{name} {value}")
+
+    http = report['http']
+    metric('last_run_success', 'Whether the last run succeeded', [({}, int(report['status'] == 'ok'))])
+    metric('last_run_timestamp_seconds', 'Start time of the last run',
+           [({}, int(datetime.fromisoformat(report['started']).timestamp()))])
+    metric('run_duration_seconds', 'Wall time of the last run', [({}, report['duration_seconds'])])
+    metric('stage_duration_seconds', 'Time spent in each pipeline stage (decode is summed over worker threads)',
+           [({'stage': name}, seconds) for name, seconds in report['stages'].items()])
+    metric('items', 'Items counted in the last run',
+           [({'kind': name}, value) for name, value in report['counts'].items()])
+    metric('http_requests', 'HTTP requests to the Wipon API by status',
+           [({'status': status}, count) for status, count in http['statuses'].items()])
+    metric('http_retries', 'Retried Wipon API requests', [({}, http['retries'])])
+    metric('http_response_bytes', 'Wipon API response bytes',
+           [({'encoding': 'decoded'}, http['bytes']), ({'encoding': 'wire'}, http['wire_bytes'])])
+    metric('http_request_duration_seconds', 'Wipon API request latency',
+           [({'quantile': '0.5'}, http['latency_seconds']['p50']),
+            ({'quantile': '0.95'}, http['latency_seconds']['p95']),
+            ({'quantile': '1'}, http['latency_seconds']['max'])])
+    if report['peak_rss_mb'] is not None:
+        metric('peak_rss_bytes', 'Peak resident memory of the last run',
+               [({}, int(report['peak_rss_mb'] * 1024 * 1024))])
+    return '\n'.join(lines) + '\n'
+
+def peak_rss_kb():
+    """Peak resident set size of this process in KB, or None where it is unknown."""
+    try:
+        import resource
+    except ImportError:  # Unix only, e.g. not on Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in KB elsewhere
+    return peak // 1024 if sys.platform == 'darwin' else peak
+
+def _write_atomic(path, text):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(text)
+    os.replace(tmp_path, path)
@@ -0,0 +1,116 @@
+"""
+Offer records: the part of a Wipon product that ends up in the Kaspi feed
+"""
+
+from collections import namedtuple
+from functools import partial
+
+import pricing
+
+# A namedtuple has __slots__ = () and stores its fields in tuple slots, so an
+# Offer costs about 100 bytes against several KB for a raw Wipon item dict
+# with its ~40 fields and nested arrivals_count / virtual_item.
+#
+# available is kept separately from stock because a fractional quantity such
+# as 0.5 is published as available="yes" with stockCount="0".
+#
+# stores is None for a single-store feed. For a multi-store feed it is a tuple
+# of (storeId, available, stock) per store, and available/stock hold the
+# totals across stores.
+Offer = namedtuple('Offer', ['sku', 'model', 'brand', 'available', 'stock', 'price', 'stores'],
+                   defaults=(None,))
+
+def brand_of(title):
+    """Brand is the first part of the title before |."""
+    return title.split('|', 1)[0].strip() if '|' in title else title
+
+def product_to_offer(product, rules=None):
+    """Map a Wipon product to an Offer, or None if it is not published.
+
+    Prices follow ``rules`` (a pricing.PriceRules), by default the active
+    pricing rules.
+    """
+    quantity = float(product.get('quantity', 0))
+    # Skip products with negative quantity only (include zero quantity products)
+    if quantity < 0:
+        return None
+
+    sku = product.get('vendor_code', '')
+    title = product.get('title', '') or ''
+    brand = brand_of(title)
+    # Price (must be integer according to XSD), after the pricing rules
+    price = (pricing.active_rules if rules is None else rules).price(product, brand)
+    return Offer(str(sku or ''), title, brand, quantity > 0, int(quantity), price)
+
+# Builds an Offer straight from a field tuple without the Python-level
+# namedtuple __new__, for use with map()
+_offer_from_fields = partial(tuple.__new__, Offer)
+
+def page_to_offers(products, rules=None):
+    """Map a whole page of Wipon products to Offers in one batch.
+
+    Same result as ``product_to_offer`` applied to each product, but each
+    field is extracted for the whole page at once and converted with
+    C-level ``map`` calls, and every quantity, title and price is read only
+    once. Pricing rules (``rules``, by default the active ones) are applied
+    to the page in one batch as well.
+    """
+    quantities = list(map(float, [product.get('quantity', 0) for product in products]))
+    if any(quantity < 0 for quantity in quantities):
+        # Skip products with negative quantity only (include zero quantity products)
+        keep = [i for i, quantity in enumerate(quantities) if quantity >= 0]
+        products = [products[i] for i in keep]
+        quantities = [quantities[i] for i in keep]
+
+    skus = [str(product.get('vendor_code', '') or '') for product in products]
+    titles = [product.get('title', '') or '' for product in products]
+    brands = list(map(brand_of, titles))
+    available = [quantity > 0 for quantity in quantities]
+    stocks = list(map(int, quantities))
+    selling_prices = list(map(float, [product.get('selling_price', 0) for product in products]))
+    prices = (pricing.active_rules if rules is None else rules).prices(products, brands, selling_prices)
+    stores = [None] * len(products)
+
+    return list(map(_offer_from_fields, zip(skus, titles, brands, available, stocks, prices, stores)))
+
+def join_store_offers(store_offers):
+    """Join per-stock offer lists into multi-store Offers with a hash join.
+
+    ``store_offers`` is a list of ``(store_id, offers)`` pairs, one per
+    Wipon stock. Every offer is looked up by SKU once, so the join is a
+    single pass over all inputs. Offers keep the order in which their SKU
+    first appears; a SKU missing from a stock is unavailable in that store.
+    """
+    store_ids = [store_id for store_id, _ in store_offers]
+    joined = {}
+    for store_id, offers in store_offers:
+        for offer in offers:
+            entry = joined.get(offer.sku)
+            if entry is None:
+                joined[offer.sku] = entry = (offer, {})
+            entry[1][store_id] = (offer.available, offer.stock)
+
+    result = []
+    for offer, counts in joined.values():
+        stores = tuple((store_id,) + counts.get(store_id, (False, 0)) for store_id in store_ids)
+        result.append(offer._replace(
+            available=any(available for _, available, _ in stores),
+            stock=sum(stock for _, _, stock in stores),
+            stores=stores,
+        ))
+    return result
+
+def iter_offers(products, stats=None):
+    """Yield an Offer for every published product.
+
+    Items that already are Offer records pass through unchanged. If
+    ``stats`` is a dict its ``products`` key counts the items read.
+    """
+    seen = 0
+    for product in products:
+        seen += 1
+        offer = product if isinstance(product, Offer) else product_to_offer(product)
+        if offer is not None:
+            yield offer
+    if stats is not None:
+        stats['products'] = seen
@@ -0,0 +1,127 @@
+"""
+On-disk cache of Wipon page responses
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+
+from config import CACHE_DIR, CACHE_TTL, CACHE_MAX_MB
+
+INDEX_FILE = "index.json"
+
+class PageCache:
+    """Gzip-compressed Wipon response bodies keyed by URL and query params.
+
+    Entries older than ``ttl`` seconds are not returned by ``get`` unless
+    it is called with ``any_age`` (offline replays and outage fallbacks).
+    When the stored bodies exceed ``max_bytes`` the least recently used
+    entries are evicted. Bookkeeping lives in ``index.json``
+    next to the entries and is saved on every change, so a crashed run
+    leaves at most a few orphan files, which ``prune`` removes.
+    """
+
+    def __init__(self, directory=CACHE_DIR, ttl=CACHE_TTL, max_bytes=CACHE_MAX_MB * 1024 * 1024):
+        self.directory = directory
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.stats = {'hits': 0, 'stale_hits': 0, 'misses': 0, 'stored': 0, 'evicted': 0}
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self.index = self._load_index()
+        self.prune()
+
+    @staticmethod
+    def key(url, params):
+        """Stable cache key for a request URL and its query parameters."""
+        canonical = json.dumps([url, sorted((str(k), str(v)) for k, v in (params or {}).items())])
+        return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.json.gz")
+
+    def _load_index(self):
+        try:
+            with open(os.path.join(self.directory, INDEX_FILE), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def _save_index(self):
+        path = os.path.join(self.directory, INDEX_FILE)
+        tmp_path = f"{path}.tmp.{threading.get_ident()}"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.index, f)
+        os.replace(tmp_path, path)
+
+    def get(self, url, params, any_age=False):
+        """Return ``(body, etag)`` for a cached response, or None."""
+        key = self.key(url, params)
+        with self._lock:
+            entry = self.index.get(key)
+            if entry is None:
+                self.stats['misses'] += 1
+                return None
+            age = time.time() - entry['stored']
+            if age > self.ttl and not any_age:
+                self.stats['misses'] += 1
+                return None
+            try:
+                with open(self._path(key), 'rb') as f:
+                    body = gzip.decompress(f.read())
+            except (OSError, EOFError):
+                del self.index[key]
+                self.stats['misses'] += 1
+                return None
+            entry['accessed'] = time.time()
+            self.stats['hits' if age <= self.ttl else 'stale_hits'] += 1
+            self._save_index()
+        return body, entry.get('etag')
+
+    def put(self, url, params, body, etag=None):
+        """Store a response body, evicting old entries beyond ``max_bytes``."""
+        key = self.key(url, params)
+        compressed = gzip.compress(body, compresslevel=6, mtime=0)
+        path = self._path(key)
+        tmp_path = f"{path}.tmp.{threading.get_ident()}"
+        with open(tmp_path, 'wb') as f:
+            f.write(compressed)
+        os.replace(tmp_path, path)
+        now = time.time()
+        with self._lock:
+            self.index[key] = {'stored': now, 'accessed': now, 'size': len(compressed), 'etag': etag}
+            self.stats['stored'] += 1
+            self._evict()
+            self._save_index()
+
+    def _evict(self):
+        total = sum(entry['size'] for entry in self.index.values())
+        if total <= self.max_bytes:
+            return
+        for key, entry in sorted(self.index.items(), key=lambda item: item[1]['accessed']):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(self._path(key))
+            except FileNotFoundError:
+                pass
+            del self.index[key]
+            total -= entry['size']
+            self.stats['evicted'] += 1
+
+    def prune(self):
+        """Drop index entries without a file and files without an index entry."""
+        with self._lock:
+            for key in [key for key in self.index if not os.path.exists(self._path(key))]:
+                del self.index[key]
+            for name in os.listdir(self.directory):
+                if name.endswith('.json.gz') and name[:-len('.json.gz')] not in self.index:
+                    os.remove(os.path.join(self.directory, name))
+            self._evict()
+            self._save_index()
+
+    def size(self):
+        return sum(entry['size'] for entry in self.index.values())
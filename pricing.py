@@ -0,0 +1,144 @@
+"""
+Pricing rules: markups, minimum margins and retail price endings
+
+Rules are dicts, listed in PRICING_RULES in config.py or in a JSON rules
+file. A rule matches on ``brand`` (the part of the title before ``|``, as
+published in ``<brand>``), ``category`` (the part of ``item_category_name``
+before ``|``), both, or neither (the default rule), and sets:
+
+  markup_percent      raise (or with a negative value above -100, lower)
+                      selling_price
+  min_margin_percent  never sell below previous_purchase_price plus this margin
+  item_margin_floor   never sell below previous_purchase_price plus the
+                      item's own additional_percent
+  round_to, ending    round up to the next price ending in ``ending`` in steps
+                      of ``round_to``, e.g. round_to=100, ending=90 -> 12390
+
+For every product the most specific matching rule applies: brand and
+category, then brand, then category, then the default rule. Products that
+no rule matches keep their selling_price.
+"""
+
+import json
+import math
+
+from config import PRICING_RULES
+
+RULE_KEYS = {'brand', 'category', 'markup_percent', 'min_margin_percent',
+             'item_margin_floor', 'round_to', 'ending'}
+
+def category_of(name):
+    """Category is the first part of item_category_name before |."""
+    return (name or '').split('|', 1)[0].strip()
+
+def _number(value):
+    try:
+        return float(value or 0)
+    except (TypeError, ValueError):
+        return 0.0
+
+def compile_rule(rule):
+    """Turn a rule dict into a function of (selling_price, product) -> int price."""
+    unknown = set(rule) - RULE_KEYS
+    if unknown:
+        raise ValueError(f"unknown pricing rule keys: {', '.join(sorted(unknown))}")
+    multiplier = 1 + _number(rule.get('markup_percent')) / 100
+    if multiplier <= 0:
+        raise ValueError(f"markup_percent {rule['markup_percent']} would make prices zero or negative")
+    min_margin = 1 + _number(rule.get('min_margin_percent')) / 100 if 'min_margin_percent' in rule else None
+    item_floor = bool(rule.get('item_margin_floor'))
+    round_to = int(rule.get('round_to') or (100 if rule.get('ending') is not None else 0))
+    ending = int(rule.get('ending') or 0)
+    if round_to and not 0 <= ending < round_to:
+        raise ValueError(f"ending {ending} must be between 0 and round_to {round_to}")
+    floors = min_margin is not None or item_floor
+    ceil = math.ceil
+
+    def apply(selling_price, product):
+        price = selling_price * multiplier
+        if floors:
+            purchase = _number(product.get('previous_purchase_price'))
+            if purchase > 0:
+                if min_margin is not None and price < purchase * min_margin:
+                    price = purchase * min_margin
+                if item_floor:
+                    floor = purchase * (1 + _number(product.get('additional_percent')) / 100)
+                    if price < floor:
+                        price = floor
+        # Drop float noise such as 100 * 1.15 = 114.99999999999999
+        price = round(price, 2)
+        if round_to:
+            return ceil((price - ending) / round_to) * round_to + ending
+        return int(price)
+
+    return apply
+
+class PriceRules:
+    """Pricing rules compiled into a lookup table by (brand, category).
+
+    Every rule is compiled into a function once, and every (brand,
+    item_category_name) pair seen is resolved to its function once, so
+    pricing a product costs a dict lookup and a call whatever the number of
+    rules.
+    """
+
+    def __init__(self, rules=()):
+        self.rules = {}
+        for rule in rules:
+            key = (rule.get('brand'), rule.get('category'))
+            if key in self.rules:
+                raise ValueError(f"duplicate pricing rule for brand={key[0]!r}, category={key[1]!r}")
+            self.rules[key] = compile_rule(rule)
+        self._resolved = {}
+
+    def __bool__(self):
+        return bool(self.rules)
+
+    def resolve(self, brand, category_name):
+        """The compiled rule for a brand and item_category_name, or None."""
+        key = (brand, category_name)
+        if key not in self._resolved:
+            category = category_of(category_name)
+            rules = self.rules
+            self._resolved[key] = (rules.get((brand, category)) or rules.get((brand, None))
+                                   or rules.get((None, category)) or rules.get((None, None)))
+        return self._resolved[key]
+
+    def price(self, product, brand):
+        """Price of one Wipon product whose published brand is ``brand``."""
+        selling_price = float(product.get('selling_price', 0))
+        rule = self.resolve(brand, product.get('item_category_name')) if self.rules else None
+        return int(selling_price) if rule is None else rule(selling_price, product)
+
+    def prices(self, products, brands, selling_prices):
+        """Integer prices for a page of products in one batch.
+
+        ``brands`` and ``selling_prices`` (floats) are in product order.
+        """
+        if not self.rules:
+            return list(map(int, selling_prices))
+        keys = list(zip(brands, [product.get('item_category_name') for product in products]))
+        resolved = self._resolved
+        for key in set(keys).difference(resolved):
+            self.resolve(*key)
+        rules = list(map(resolved.__getitem__, keys))
+        return [int(selling_price) if rule is None else rule(selling_price, product)
+                for rule, selling_price, product in zip(rules, selling_prices, products)]
+
+def load_rules_file(path):
+    """Read a JSON list of pricing rules."""
+    with open(path, 'r', encoding='utf-8') as f:
+        rules = json.load(f)
+    if not isinstance(rules, list):
+        raise ValueError("a pricing rules file must contain a JSON list of rules")
+    return rules
+
+# Rules used by offers.page_to_offers and offers.product_to_offer unless they
+# are given other rules (e.g. a batch merchant's own)
+active_rules = PriceRules(PRICING_RULES)
+
+def use_rules(rules):
+    """Replace the active pricing rules (e.g. with those of a rules file)."""
+    global active_rules
+    active_rules = PriceRules(rules)
+    return active_rules
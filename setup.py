@@ -4,7 +4,6 @@ Setup script for Kaspi Price List Generator
 This script helps configure the system for your specific setup
 """
 
-import os
 import sys
 from pathlib import Path
 
@@ -65,17 +64,15 @@ def test_setup():
     print("\n🧪 Testing setup with sample data...")
     
     try:
-        # Run the script with sample data
-        result = os.system("python fetch_and_convert.py --sample")
-        if result != 0:
-            print("❌ Script execution failed!")
-            return False
+        from kaspi_feed import main as kaspi_feed
         
-        # Validate the generated XML
-        result = os.system("python validate_xml.py")
-        if result != 0:
-            print("❌ XML validation failed!")
-            return False
+        # Convert the sample data in-process, validating offers before writing
+        try:
+            kaspi_feed(['convert', '--sample', '--validate'])
+        except SystemExit as e:
+            if e.code:
+                print("❌ Script execution or XML validation failed!")
+                return False
         
         print("✅ Setup test completed successfully!")
         return True
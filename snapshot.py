@@ -0,0 +1,175 @@
+"""
+Persistent snapshot of Wipon items for incremental syncs
+"""
+
+import gzip
+import json
+import os
+import threading
+from datetime import datetime, timedelta
+
+from config import SNAPSHOT_FILE, FULL_REFRESH_HOURS, WIPON_FIELDS
+
+class SnapshotStore:
+    """Local copy of the Wipon catalog keyed by item ``id``.
+
+    Besides the items themselves the snapshot remembers, for every page of
+    the last run, the page's ETag, its item ids and its ``meta`` block. An
+    incremental run sends the ETag back as ``If-None-Match`` and rebuilds a
+    304 page from the snapshot instead of downloading it again.
+
+    Pages downloaded during a sync are staged and only become part of the
+    snapshot together with their items in ``replace`` or ``merge``, so a
+    sync that fails halfway never pairs new ETags with old items.
+
+    Items are stored as projected onto ``fields`` (see WiponClient). The
+    snapshot records the fields its items were fetched with, and a change
+    of ``fields`` (e.g. a new WIPON_FIELDS) forces a full refresh, so 304
+    pages are never rebuilt from items that lack a field.
+
+    Counters for the current run are kept in ``stats``.
+    """
+
+    def __init__(self, path=SNAPSHOT_FILE, fields=WIPON_FIELDS):
+        self.path = path
+        self.fields = list(fields) if fields is not None else None
+        self.item_fields = self.fields
+        self.items = {}
+        self.pages = {}
+        self._staged_pages = {}
+        self.last_sync = None
+        self.last_full_sync = None
+        self.stats = {}
+        self._lock = threading.Lock()
+        self.reset_stats()
+
+    def load(self):
+        """Load the snapshot from disk; a missing or corrupt file starts empty."""
+        try:
+            with gzip.open(self.path, 'rt', encoding='utf-8') as f:
+                state = json.load(f)
+        except FileNotFoundError:
+            return self
+        except (OSError, ValueError) as e:
+            print(f"⚠️  Ignoring unreadable snapshot {self.path}: {e}")
+            return self
+
+        self.items = {str(item['id']): item for item in state.get('items', [])}
+        self.pages = state.get('pages', {})
+        # Snapshots from before the field list was stored count as different
+        self.item_fields = state.get('fields')
+        self.last_sync = state.get('last_sync')
+        self.last_full_sync = state.get('last_full_sync')
+        return self
+
+    def save(self):
+        """Write the snapshot atomically (temp file + rename)."""
+        state = {
+            'last_sync': self.last_sync,
+            'last_full_sync': self.last_full_sync,
+            'fields': self.item_fields,
+            'pages': self.pages,
+            'items': list(self.items.values()),
+        }
+        tmp_path = f"{self.path}.tmp"
+        with gzip.open(tmp_path, 'wt', encoding='utf-8') as f:
+            json.dump(state, f, ensure_ascii=False, separators=(',', ':'))
+        os.replace(tmp_path, self.path)
+
+    def start_sync(self):
+        """Reset the counters and drop pages staged by an unfinished sync."""
+        self.reset_stats()
+        self._staged_pages = {}
+
+    def reset_stats(self):
+        self.stats = {'fetched': 0, 'reused': 0, 'added': 0, 'changed': 0, 'removed': 0}
+
+    def fields_changed(self):
+        """True when the stored items were fetched with other fields than ``fields``."""
+        return self.item_fields != self.fields
+
+    def needs_full_refresh(self, now=None):
+        """True when the snapshot is empty, has other fields or is older than FULL_REFRESH_HOURS."""
+        if not self.items or not self.last_full_sync or self.fields_changed():
+            return True
+        now = now or datetime.now()
+        last_full = datetime.fromisoformat(self.last_full_sync)
+        return now - last_full >= timedelta(hours=FULL_REFRESH_HOURS)
+
+    def page_etag(self, page):
+        entry = self.pages.get(str(page))
+        return entry.get('etag') if entry else None
+
+    def store_page(self, page, etag, data):
+        """Stage a freshly downloaded page until its items are stored."""
+        with self._lock:
+            self._staged_pages[str(page)] = {
+                'etag': etag,
+                'ids': [str(item['id']) for item in data.get('data') or []],
+                'meta': data.get('meta'),
+            }
+            self.stats['fetched'] += len(data.get('data') or [])
+
+    def reuse_page(self, page):
+        """Rebuild a 304 page from the snapshot in the API's response shape."""
+        with self._lock:
+            entry = self.pages[str(page)]
+            products = [self.items[item_id] for item_id in entry['ids']]
+            self.stats['reused'] += len(products)
+        data = {'data': products}
+        if entry.get('meta') is not None:
+            data['meta'] = entry['meta']
+        return data
+
+    def can_reuse_page(self, page):
+        """True when every item of a remembered page is still in the snapshot."""
+        entry = self.pages.get(str(page))
+        return bool(entry) and all(item_id in self.items for item_id in entry['ids'])
+
+    def _count_change(self, item):
+        previous = self.items.get(str(item['id']))
+        if previous is None:
+            self.stats['added'] += 1
+        elif not _same_version(previous, item):
+            self.stats['changed'] += 1
+
+    def replace(self, products):
+        """Make ``products`` (a complete catalog, in order) the new snapshot."""
+        seen = set()
+        for item in products:
+            self._count_change(item)
+            seen.add(str(item['id']))
+        self.stats['removed'] = sum(1 for item_id in self.items if item_id not in seen)
+        self.items = {str(item['id']): item for item in products}
+        self._commit_pages()
+
+    def merge(self, products):
+        """Upsert changed ``products`` into the snapshot, keeping item order."""
+        for item in products:
+            self._count_change(item)
+            self.items[str(item['id'])] = item
+        self.stats['fetched'] += len(products)
+        self.stats['reused'] += len(self.items) - len(products)
+        self._commit_pages()
+
+    def _commit_pages(self):
+        self.pages.update(self._staged_pages)
+        self._staged_pages = {}
+
+    def mark_synced(self, full, now=None):
+        timestamp = (now or datetime.now()).isoformat(timespec='seconds')
+        self.last_sync = timestamp
+        if full:
+            self.last_full_sync = timestamp
+            self.item_fields = self.fields
+
+    def products(self):
+        return list(self.items.values())
+
+def _same_version(previous, item):
+    """Compare two versions of an item, by ``updated_at`` when both have one."""
+    if previous.get('updated_at') and item.get('updated_at'):
+        return (previous['updated_at'] == item['updated_at']
+                and previous.get('quantity') == item.get('quantity')
+                and previous.get('selling_price') == item.get('selling_price'))
+    return previous == item
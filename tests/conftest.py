@@ -0,0 +1,34 @@
+"""
+Shared fixtures: a fake Wipon API server (benchmarks/fake_wipon.py) and
+clients that retry without waiting
+"""
+
+import os
+import sys
+
+import pytest
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+sys.path.insert(0, os.path.join(ROOT_DIR, 'benchmarks'))
+
+from fake_wipon import FakeWiponServer, make_catalog
+from wipon_client import WiponClient
+
+PER_PAGE = 1000  # the per_page of API_PARAMS
+
+@pytest.fixture
+def catalog():
+    """Five pages of items, the last one short."""
+    return make_catalog(4 * PER_PAGE + 250)
+
+@pytest.fixture
+def server(catalog):
+    with FakeWiponServer(catalog) as server:
+        yield server
+
+@pytest.fixture
+def client(server, monkeypatch):
+    monkeypatch.setattr(WiponClient, 'backoff_delay', staticmethod(lambda attempt: 0.0))
+    with WiponClient(url=server.url) as client:
+        yield client
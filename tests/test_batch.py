@@ -0,0 +1,76 @@
+import os
+
+import pytest
+
+from batch import build_feed, load_profiles, normalize_profile
+from delta import load_offers
+from wipon_client import new_session
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def profile(**fields):
+    return dict({'name': 'shop', 'company': 'Shop', 'merchant_id': '123'}, **fields)
+
+def test_single_store_mapping_sets_the_stock_and_store():
+    normalized = normalize_profile(profile(stores={'11111': 'PP7'}))
+    assert normalized['stock_id'] == '11111'
+    assert normalized['store_id'] == 'PP7'
+    assert normalized['stores'] == {'11111': 'PP7'}
+
+def test_stock_and_store_without_a_mapping():
+    normalized = normalize_profile(profile(stock_id=11111, store_id='PP7'))
+    assert normalized['stores'] == {'11111': 'PP7'}
+
+def test_stores_and_store_id_together_are_rejected():
+    with pytest.raises(ValueError):
+        normalize_profile(profile(stores={'11111': 'PP7'}, store_id='PP1'))
+
+@pytest.mark.parametrize('missing', ['company', 'merchant_id'])
+def test_merchant_identity_is_required(missing):
+    fields = profile()
+    del fields[missing]
+    with pytest.raises(ValueError, match=missing):
+        normalize_profile(fields)
+
+def test_pricing_rules_per_merchant(tmp_path):
+    path = tmp_path / 'rules.json'
+    path.write_text('[{"markup_percent": 10}]', encoding='utf-8')
+    from_file = normalize_profile(profile(pricing_rules=str(path)))['pricing_rules']
+    inline = normalize_profile(profile(pricing_rules=[{'markup_percent': 20}]))['pricing_rules']
+    item = {'selling_price': '1000.00'}
+    assert from_file.price(item, 'Brand') == 1100
+    assert inline.price(item, 'Brand') == 1200
+    assert normalize_profile(profile())['pricing_rules'] is None
+
+def test_example_profiles_load():
+    profiles, workers = load_profiles(os.path.join(ROOT_DIR, 'merchants.example.json'))
+    assert [item['name'] for item in profiles] == ['aliya-style', 'second-shop']
+    assert profiles[1]['stores'] == {'11111': 'PP1', '22222': 'PP2'}
+
+@pytest.mark.parametrize('stores', [{'11111': 'PP7'}, {'11111': 'PP7', '22222': 'PP8'}],
+                         ids=['one store', 'two stores'])
+def test_feed_is_published_under_the_profile_stores(catalog, server, tmp_path, stores):
+    output = str(tmp_path / 'price.xml')
+    shop = normalize_profile(profile(api_url=server.url, stores=stores, output=output,
+                                     pricing_rules=[{'markup_percent': 100}]))
+    session = new_session()
+    try:
+        result = build_feed(shop, session, validate=True)
+    finally:
+        session.close()
+    assert result['status'] == 'ok', result['error']
+
+    offers = load_offers(output)
+    assert result['offers'] == len(offers) > 0
+    prices = {item['vendor_code']: int(float(item['selling_price'])) * 2 for item in catalog}
+    assert all(offer.price == prices[offer.sku] for offer in offers.values())
+    # The fake server ignores stock_id, so every store has the whole catalog
+    for offer in offers.values():
+        if offer.stores:
+            assert [store_id for store_id, _, _ in offer.stores] == list(stores.values())
+        else:
+            assert len(stores) == 1
+    with open(output, encoding='utf-8') as f:
+        feed = f.read()
+    assert '<merchantid>123</merchantid>' in feed
+    assert 'storeId="PP1"' not in feed
@@ -0,0 +1,54 @@
+import io
+
+from delta import change_report, delta_offers, diff_offers, load_offers
+from offers import Offer
+from xml_writer import write_kaspi_xml
+
+def offer(sku, price, stock, stores=None):
+    return Offer(sku, f'Brand | Dress {sku}', 'Brand', stock > 0, stock, price, stores)
+
+PREVIOUS = {
+    'A': offer('A', 1000, 2),
+    'B': offer('B', 2000, 1),
+    'C': offer('C', 3000, 0),
+    'D': offer('D', 4000, 5),
+}
+CURRENT = {
+    'A': offer('A', 1000, 2),
+    'B': offer('B', 2500, 0),
+    'D': offer('D', 4000, 5),
+    'E': offer('E', 5000, 3),
+}
+
+def test_diff_reports_every_kind_of_change():
+    report = diff_offers(PREVIOUS, CURRENT)
+    assert report['added'] == ['E']
+    assert report['changed'] == ['B']
+    assert report['removed'] == ['C']
+    assert report['unavailable'] == ['B']
+    assert report['summary'] == {
+        'previous': 4, 'current': 4, 'added': 1, 'changed': 1, 'price_changed': 1,
+        'stock_changed': 1, 'removed': 1, 'unavailable': 1, 'unchanged': 2,
+    }
+
+def test_delta_publishes_removed_offers_as_unavailable():
+    previous = dict(PREVIOUS, F=offer('F', 100, 4, stores=(('PP1', True, 3), ('PP2', True, 1))))
+    report = diff_offers(previous, CURRENT)
+    delta = {item.sku: item for item in delta_offers(previous, CURRENT, report)}
+    assert sorted(delta) == ['B', 'C', 'E', 'F']
+    assert delta['B'] == CURRENT['B']
+    assert delta['C'].available is False and delta['C'].stock == 0
+    assert delta['F'].stores == (('PP1', False, 0), ('PP2', False, 0))
+
+def test_change_report_rows():
+    report = change_report(PREVIOUS, CURRENT, diff_offers(PREVIOUS, CURRENT))
+    assert report['added'] == [['E', None, 5000, None, 3]]
+    assert report['changed'] == [['B', 2000, 2500, 1, 0]]
+    assert report['removed'] == [['C', 3000, None, 0, None]]
+
+def test_published_feed_loads_back_as_the_same_offers(tmp_path):
+    path = tmp_path / 'price.xml'
+    with open(path, 'wb') as f:
+        write_kaspi_xml(CURRENT.values(), f)
+    assert load_offers(str(path)) == CURRENT
+    assert load_offers(str(tmp_path / 'missing.xml')) == {}
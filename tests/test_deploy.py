@@ -0,0 +1,56 @@
+import json
+import os
+
+from deploy import MANIFEST_FILE, deploy_to_gh_pages, read_feed_date
+
+FEED = '<?xml version="1.0" encoding="utf-8"?>\n<kaspi_catalog xmlns="kaspiShopping" date="{date}">\n</kaspi_catalog>\n'
+
+def write_feed(path, date="2026-01-01 00:00:00"):
+    path.write_text(FEED.format(date=date), encoding='utf-8')
+
+def mtimes(directory):
+    return {name: os.stat(directory / name).st_mtime_ns for name in os.listdir(directory)}
+
+def test_unchanged_feed_writes_nothing(tmp_path):
+    source, pages = tmp_path / 'price.xml', tmp_path / 'gh-pages'
+    write_feed(source)
+    assert deploy_to_gh_pages(str(source), str(pages))
+    assert sorted(os.listdir(pages)) == ['index.html', MANIFEST_FILE, 'price.xml', 'price.xml.gz']
+    before = mtimes(pages)
+
+    assert deploy_to_gh_pages(str(source), str(pages))
+    assert mtimes(pages) == before
+
+def test_changed_feed_rewrites_its_artifacts(tmp_path):
+    source, pages = tmp_path / 'price.xml', tmp_path / 'gh-pages'
+    write_feed(source)
+    deploy_to_gh_pages(str(source), str(pages))
+    write_feed(source, date="2026-01-02 00:00:00")
+    deploy_to_gh_pages(str(source), str(pages))
+
+    assert (pages / 'price.xml').read_bytes() == source.read_bytes()
+    assert '2026-01-02 00:00:00' in (pages / 'index.html').read_text(encoding='utf-8')
+    manifest = json.loads((pages / MANIFEST_FILE).read_text(encoding='utf-8'))['files']
+    assert manifest['price.xml']['size'] == source.stat().st_size
+
+def test_stale_artifacts_are_removed_and_others_kept(tmp_path):
+    source, pages = tmp_path / 'price.xml', tmp_path / 'gh-pages'
+    write_feed(source)
+    deploy_to_gh_pages(str(source), str(pages))
+    manifest_path = pages / MANIFEST_FILE
+    manifest = json.loads(manifest_path.read_text(encoding='utf-8'))
+    manifest['files']['old.xml'] = {'sha256': '0', 'size': 1}
+    manifest_path.write_text(json.dumps(manifest), encoding='utf-8')
+    (pages / 'old.xml').write_text('old', encoding='utf-8')
+    (pages / 'CNAME').write_text('example.com', encoding='utf-8')
+
+    deploy_to_gh_pages(str(source), str(pages))
+    assert not (pages / 'old.xml').exists()
+    assert (pages / 'CNAME').exists()
+
+def test_missing_feed_fails(tmp_path):
+    assert not deploy_to_gh_pages(str(tmp_path / 'price.xml'), str(tmp_path / 'gh-pages'))
+
+def test_feed_date(tmp_path):
+    write_feed(tmp_path / 'price.xml')
+    assert read_feed_date(str(tmp_path / 'price.xml')).isoformat() == '2026-01-01T00:00:00'
@@ -0,0 +1,58 @@
+import gzip
+
+import pytest
+import requests
+
+from feed_server import FeedServer, FeedStore, accepts_gzip
+
+@pytest.mark.parametrize('header, expected', [
+    ('gzip', True),
+    ('gzip, deflate, br', True),
+    ('br;q=1.0, gzip;q=0.8', True),
+    ('*', True),
+    ('', False),
+    ('identity', False),
+    ('gzip;q=0', False),
+    ('gzip; q=0.000', False),
+    ('*, gzip;q=0', False),
+    ('*;q=0', False),
+    ('x-gzip', True),
+    ('gzip;q=oops', False),
+])
+def test_accept_encoding(header, expected):
+    assert accepts_gzip(header) is expected
+
+@pytest.fixture
+def feed_server(tmp_path):
+    path = tmp_path / 'price.xml'
+    path.write_bytes(b'<kaspi_catalog date="2026-01-01 00:00:00"/>\n' * 50)
+    store = FeedStore(str(path))
+    store.reload()
+    with FeedServer(store, host='127.0.0.1', port=0, reload_seconds=0) as server:
+        yield server, path.read_bytes()
+
+def get(url, **headers):
+    # Without stream=True requests would decode the gzip body
+    response = requests.get(url, headers=headers, stream=True)
+    return response, response.raw.read()
+
+def test_gzip_is_only_sent_when_accepted(feed_server):
+    server, body = feed_server
+    response, raw = get(f'{server.url}/price.xml', **{'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert gzip.decompress(raw) == body
+
+    response, raw = get(f'{server.url}/price.xml', **{'Accept-Encoding': 'gzip;q=0, identity'})
+    assert 'Content-Encoding' not in response.headers
+    assert raw == body
+
+def test_conditional_get_answers_not_modified(feed_server):
+    server, _ = feed_server
+    response, _ = get(f'{server.url}/price.xml', **{'Accept-Encoding': 'identity'})
+    etag = response.headers['ETag']
+    response, raw = get(f'{server.url}/price.xml', **{'If-None-Match': etag})
+    assert response.status_code == 304 and raw == b''
+    response, _ = get(f'{server.url}/price.xml', **{'If-Modified-Since': response.headers['Last-Modified']})
+    assert response.status_code == 304
+    response, _ = get(f'{server.url}/missing.xml')
+    assert response.status_code == 404
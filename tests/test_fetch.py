@@ -0,0 +1,31 @@
+from fake_wipon import FakeWiponServer
+from fetch_and_convert import fetch_wipon_data
+from wipon_client import RateController, WiponClient
+
+import pytest
+
+def ids(products):
+    return [item['id'] for item in products]
+
+@pytest.mark.parametrize('concurrency', [1, 4, 8])
+def test_pages_come_back_in_order(catalog, server, client, concurrency):
+    data = fetch_wipon_data(client=client, concurrency=concurrency)
+    assert ids(data['data']) == ids(catalog)
+    assert data['meta']['pages_fetched'] == 5
+    assert server.requests_served == 5
+
+@pytest.mark.parametrize('options', [{'max_per_page': 250}, {'max_per_page': 250, 'meta': False}],
+                         ids=['meta', 'no meta'])
+def test_capped_pages_are_all_fetched(catalog, options):
+    with FakeWiponServer(catalog, **options) as server, WiponClient(url=server.url) as client:
+        data = fetch_wipon_data(client=client)
+    assert ids(data['data']) == ids(catalog)
+
+def test_rate_limited_fetch_shrinks_the_window(catalog):
+    controller = RateController(4)
+    with FakeWiponServer(catalog, latency=0.05, max_in_flight=2) as server, \
+            WiponClient(url=server.url, controller=controller) as client:
+        data = fetch_wipon_data(client=client, concurrency=4)
+    assert ids(data['data']) == ids(catalog)
+    assert server.rate_limited > 0
+    assert controller.stats['min_window'] <= 2
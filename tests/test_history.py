@@ -0,0 +1,32 @@
+from history import HistoryStore, REMOVED
+from offers import Offer
+
+def offer(sku, price, stock):
+    return Offer(sku, f"Model {sku}", "Brand", stock > 0, stock, price)
+
+def test_append_and_query_round_trip(tmp_path):
+    store = HistoryStore(str(tmp_path / 'history'))
+    assert store.append([offer('A1', 100, 5), offer('B2', 200, 0)], timestamp=1000) == 2
+    # Unchanged offers are not written again
+    assert store.append([offer('A1', 100, 5), offer('B2', 200, 0)], timestamp=2000) == 0
+    assert store.append([offer('A1', 120, 5), offer('B2', 200, 3)], timestamp=3000) == 2
+    assert store.append([offer('B2', 200, 3), offer('C3', 50, 1)], timestamp=4000) == 2
+
+    assert store.sku_history('A1') == [(1000, 100, 5), (3000, 120, 5), (4000, 0, REMOVED)]
+    assert store.sku_history('B2') == [(1000, 200, 0), (3000, 200, 3)]
+    assert store.sku_history('C3') == [(4000, 50, 1)]
+    assert store.sku_history('missing') == []
+
+    assert sorted(store.changes(since=3000, until=4000)) == [(3000, 'A1', 120, 5), (3000, 'B2', 200, 3)]
+    assert len(store.changes()) == 6
+
+def test_history_survives_a_lost_state_cache(tmp_path):
+    directory = tmp_path / 'history'
+    store = HistoryStore(str(directory))
+    store.append([offer('A1', 100, 5)], timestamp=1000)
+    store.append([offer('A1', 110, 4)], timestamp=2000)
+    (directory / 'state.bin').unlink()
+
+    store = HistoryStore(str(directory))
+    assert store.append([offer('A1', 110, 4)], timestamp=3000) == 0
+    assert store.sku_history('A1') == [(1000, 100, 5), (2000, 110, 4)]
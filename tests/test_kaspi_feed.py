@@ -0,0 +1,21 @@
+import pytest
+
+import deploy
+import fetch_and_convert
+import kaspi_feed
+
+@pytest.fixture
+def calls(monkeypatch):
+    calls = []
+    monkeypatch.setattr(fetch_and_convert, 'main', lambda argv: calls.append(('generate', argv)))
+    monkeypatch.setattr(deploy, 'main', lambda argv: calls.append(('deploy', argv)))
+    return calls
+
+@pytest.mark.parametrize('argv, generate_argv', [
+    (['--incremental'], ['--incremental', '--validate']),
+    (['--validate', '--history'], ['--validate', '--history']),
+    (['--no-validate', '--if-changed'], ['--if-changed']),
+])
+def test_run_all_validates_unless_told_not_to(calls, argv, generate_argv):
+    kaspi_feed.main(['run-all'] + argv)
+    assert calls == [('generate', generate_argv), ('deploy', [])]
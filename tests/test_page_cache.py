@@ -0,0 +1,45 @@
+import os
+import time
+
+from page_cache import PageCache
+
+URL = 'https://api.example/items'
+
+def test_entries_expire_after_the_ttl(tmp_path, monkeypatch):
+    cache = PageCache(str(tmp_path), ttl=60)
+    cache.put(URL, {'page': 1}, b'{"data": []}', etag='"v1"')
+    assert cache.get(URL, {'page': 1}) == (b'{"data": []}', '"v1"')
+    assert cache.get(URL, {'page': 2}) is None
+
+    later = time.time() + 120
+    monkeypatch.setattr(time, 'time', lambda: later)
+    assert cache.get(URL, {'page': 1}) is None
+    assert cache.get(URL, {'page': 1}, any_age=True) == (b'{"data": []}', '"v1"')
+    assert cache.stats['stale_hits'] == 1
+
+def test_least_recently_used_entries_are_evicted(tmp_path, monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(time, 'time', lambda: clock[0])
+    body = os.urandom(4000)  # incompressible, so every entry is about 4 KB
+    cache = PageCache(str(tmp_path), ttl=3600, max_bytes=10000)
+    for page in (1, 2):
+        clock[0] += 1
+        cache.put(URL, {'page': page}, body)
+    clock[0] += 1
+    cache.get(URL, {'page': 1})
+    clock[0] += 1
+    cache.put(URL, {'page': 3}, body)
+
+    assert cache.stats['evicted'] == 1
+    assert cache.get(URL, {'page': 2}) is None
+    assert cache.get(URL, {'page': 1}) is not None
+    assert cache.size() <= 10000
+
+def test_index_survives_a_reopen_and_orphans_are_pruned(tmp_path):
+    cache = PageCache(str(tmp_path))
+    cache.put(URL, {'page': 1}, b'page one')
+    (tmp_path / f"{'0' * 64}.json.gz").write_bytes(b'orphan')
+
+    reopened = PageCache(str(tmp_path))
+    assert reopened.get(URL, {'page': 1}) == (b'page one', None)
+    assert set(os.listdir(tmp_path)) == {'index.json', f"{PageCache.key(URL, {'page': 1})}.json.gz"}
@@ -0,0 +1,91 @@
+import json
+
+import pytest
+
+from pricing import PriceRules, compile_rule, load_rules_file
+
+def product(selling_price, purchase=0, additional=0, category='Платье | Вечерние'):
+    return {'selling_price': f'{selling_price:.2f}', 'previous_purchase_price': f'{purchase:.2f}',
+            'additional_percent': str(additional), 'item_category_name': category}
+
+def price(rule, selling_price, **fields):
+    return compile_rule(rule)(float(selling_price), product(selling_price, **fields))
+
+def test_without_rules_the_selling_price_is_kept():
+    assert PriceRules().price(product(12345.67), 'Piena') == 12345
+
+@pytest.mark.parametrize('markup, expected', [(15, 115), (-10, 90), (0, 100), (33.3, 133)])
+def test_markup(markup, expected):
+    assert price({'markup_percent': markup}, 100) == expected
+
+@pytest.mark.parametrize('selling_price, expected', [
+    (12345, 12390), (12390, 12390), (12391, 12490), (12300, 12390), (40, 90),
+])
+def test_price_ending(selling_price, expected):
+    assert price({'round_to': 100, 'ending': 90}, selling_price) == expected
+    # round_to defaults to 100 when an ending is set
+    assert price({'ending': 90}, selling_price) == expected
+
+def test_rounding_without_ending():
+    assert price({'round_to': 1000}, 12001) == 13000
+    assert price({'round_to': 1000, 'ending': 990}, 12001) == 12990
+
+def test_ending_must_fit_round_to():
+    with pytest.raises(ValueError):
+        compile_rule({'round_to': 100, 'ending': 100})
+
+def test_min_margin_over_purchase_price():
+    rule = {'min_margin_percent': 30}
+    assert price(rule, 1000, purchase=900) == 1170
+    assert price(rule, 2000, purchase=900) == 2000
+    # Without a purchase price there is nothing to keep a margin over
+    assert price(rule, 1000, purchase=0) == 1000
+
+def test_item_margin_floor():
+    rule = {'item_margin_floor': True}
+    assert price(rule, 1000, purchase=1000, additional=50) == 1500
+    assert price(rule, 2000, purchase=1000, additional=50) == 2000
+
+def test_floors_apply_after_markup_and_before_rounding():
+    rule = {'markup_percent': -20, 'min_margin_percent': 10, 'round_to': 100, 'ending': 90}
+    # 1000 * 0.8 = 800 is below 750 * 1.1 = 825, which rounds up to 890
+    assert price(rule, 1000, purchase=750) == 890
+
+@pytest.mark.parametrize('markup', [-100, -150])
+def test_markup_that_zeroes_prices_is_rejected(markup):
+    with pytest.raises(ValueError):
+        compile_rule({'markup_percent': markup})
+
+def test_unknown_and_duplicate_rules_are_rejected():
+    with pytest.raises(ValueError):
+        compile_rule({'markup': 10})
+    with pytest.raises(ValueError):
+        PriceRules([{'brand': 'Piena', 'markup_percent': 5}, {'brand': 'Piena', 'markup_percent': 10}])
+
+def test_most_specific_rule_applies():
+    rules = PriceRules([
+        {'markup_percent': 1},
+        {'category': 'Платье', 'markup_percent': 2},
+        {'brand': 'Piena', 'markup_percent': 3},
+        {'brand': 'Piena', 'category': 'Платье', 'markup_percent': 4},
+    ])
+    assert rules.price(product(100), 'Piena') == 104
+    assert rules.price(product(100, category='Юбка'), 'Piena') == 103
+    assert rules.price(product(100), 'Zarina') == 102
+    assert rules.price(product(100, category='Юбка'), 'Zarina') == 101
+
+def test_batch_prices_match_single_prices():
+    rules = PriceRules([{'markup_percent': 7, 'ending': 90}, {'brand': 'Piena', 'min_margin_percent': 40}])
+    products = [product(1000 + i * 37, purchase=900 + i) for i in range(50)]
+    brands = ['Piena' if i % 3 else 'Zarina' for i in range(50)]
+    selling_prices = [float(item['selling_price']) for item in products]
+    assert rules.prices(products, brands, selling_prices) == [
+        rules.price(item, brand) for item, brand in zip(products, brands)]
+
+def test_rules_file(tmp_path):
+    path = tmp_path / 'rules.json'
+    path.write_text(json.dumps([{'markup_percent': 5}]), encoding='utf-8')
+    assert load_rules_file(str(path)) == [{'markup_percent': 5}]
+    path.write_text(json.dumps({'markup_percent': 5}), encoding='utf-8')
+    with pytest.raises(ValueError):
+        load_rules_file(str(path))
@@ -0,0 +1,65 @@
+import pytest
+import requests
+
+from daemon import FeedDaemon
+from fetch_and_convert import sync_wipon_data
+from snapshot import SnapshotStore
+from wipon_client import WiponClient
+
+def ids(products):
+    return [item['id'] for item in products]
+
+def test_unchanged_pages_are_reused_from_the_snapshot(catalog, server, client, tmp_path):
+    snapshot = SnapshotStore(str(tmp_path / 'snapshot.json.gz'))
+    sync_wipon_data(client=client, snapshot=snapshot, full_refresh=True)
+
+    server.update_item(1500, selling_price='77777.00')
+    data = sync_wipon_data(client=client, snapshot=snapshot)
+    assert ids(data['data']) == ids(catalog)
+    assert data['data'][1500]['selling_price'] == '77777.00'
+    # Only page 2 changed; the other pages answered 304
+    assert data['meta']['fetched'] == 1000
+    assert data['meta']['reused'] == len(catalog) - 1000
+    assert snapshot.stats['changed'] == 1
+
+def test_snapshot_survives_a_reload(catalog, server, client, tmp_path):
+    path = str(tmp_path / 'snapshot.json.gz')
+    sync_wipon_data(client=client, snapshot_path=path, full_refresh=True)
+
+    snapshot = SnapshotStore(path).load()
+    assert ids(snapshot.products()) == ids(catalog)
+    assert snapshot.page_etag(1) is not None
+
+def test_failed_sync_does_not_pair_new_etags_with_old_items(catalog, server, client, tmp_path):
+    snapshot = SnapshotStore(str(tmp_path / 'snapshot.json.gz'))
+    sync_wipon_data(client=client, snapshot=snapshot, full_refresh=True)
+
+    server.update_item(1500, selling_price='77777.00')
+    server.failures[3] = client.max_retries + 1
+    with pytest.raises(requests.exceptions.RequestException):
+        sync_wipon_data(client=client, snapshot=snapshot)
+
+    data = sync_wipon_data(client=client, snapshot=snapshot)
+    assert data['data'][1500]['selling_price'] == '77777.00'
+
+def test_daemon_keeps_running_after_a_failed_refresh(catalog, server, tmp_path, monkeypatch):
+    monkeypatch.setattr(WiponClient, 'backoff_delay', staticmethod(lambda attempt: 0.0))
+    output = tmp_path / 'price.xml'
+    daemon = FeedDaemon(output=str(output), interval=0, jitter=0, url=server.url,
+                        snapshot_path=str(tmp_path / 'snapshot.json.gz'))
+    server.failures[2] = daemon.client.max_retries + 1
+    try:
+        daemon.run(max_runs=3)
+    finally:
+        daemon.close()
+    assert daemon.failures == 1
+    assert daemon.last_stats['offers'] > 0 and not daemon.last_stats['changed']
+    assert output.exists()
+
+def test_snapshot_with_other_fields_is_refreshed_in_full(catalog, server, client, tmp_path):
+    path = str(tmp_path / 'snapshot.json.gz')
+    sync_wipon_data(client=client, snapshot_path=path)
+    assert not SnapshotStore(path).load().needs_full_refresh()
+
+    snapshot = SnapshotStore(path, fields=('id', 'quantity')).load()
+    assert snapshot.needs_full_refresh()
@@ -0,0 +1,106 @@
+import pytest
+
+from offers import Offer
+from validate_xml import RecordValidator, check_kaspi_xml, check_kaspi_xml_streaming
+from xml_writer import write_kaspi_xml_file
+
+DATE = "2026-01-01 00:00:00"
+
+def offer_xml(sku, price='1000', model='Brand | Dress', brand='Brand'):
+    sku_attr = f' sku="{sku}"' if sku is not None else ''
+    return (f'<offer{sku_attr}><model>{model}</model><brand>{brand}</brand>'
+            '<availabilities><availability available="yes" storeId="PP1" stockCount="1"/>'
+            f'</availabilities><price>{price}</price></offer>')
+
+def feed(tmp_path, offers, company='Shop', merchant_id='123'):
+    path = tmp_path / 'price.xml'
+    path.write_text(
+        '<?xml version="1.0" encoding="utf-8"?>\n'
+        f'<kaspi_catalog xmlns="kaspiShopping" date="{DATE}">'
+        f'<company>{company}</company><merchantid>{merchant_id}</merchantid>'
+        f'<offers>{"".join(offers)}</offers></kaspi_catalog>', encoding='utf-8')
+    return str(path)
+
+INVALID_OFFERS = [
+    offer_xml('A'),
+    offer_xml('B', price='10.5'),
+    offer_xml('A'),
+    offer_xml(None, brand=''),
+    offer_xml('C', price='abc'),
+]
+
+def test_issues_are_counted_per_offer(tmp_path):
+    report = check_kaspi_xml(feed(tmp_path, INVALID_OFFERS))
+    assert report['valid']
+    assert report['offers'] == 5
+    assert report['valid_offers'] == 1
+    assert report['issues'] == {'non-integer price': 1, 'duplicate SKU': 1, 'missing SKU': 1,
+                                'missing brand': 1, 'invalid price format': 1}
+    assert report['failures'][0] == [2, 'B', ['non-integer price']]
+    assert report['failures'][1] == [3, 'A', ['duplicate SKU']]
+
+def test_broken_header_makes_the_feed_invalid(tmp_path):
+    report = check_kaspi_xml(feed(tmp_path, [offer_xml('A')], merchant_id=''))
+    assert not report['valid']
+    assert report['error'] == "Merchant ID is missing"
+
+def test_unparsable_file_makes_the_feed_invalid(tmp_path):
+    path = tmp_path / 'price.xml'
+    path.write_text('<kaspi_catalog><offers>', encoding='utf-8')
+    assert check_kaspi_xml(str(path))['error'].startswith("XML parsing error")
+    assert check_kaspi_xml(str(tmp_path / 'missing.xml'))['error'].endswith("not found")
+
+@pytest.mark.parametrize('offers, header', [
+    (INVALID_OFFERS, {}),
+    ([offer_xml(str(i)) for i in range(300)], {}),
+    ([], {}),
+    ([offer_xml('A')], {'company': ''}),
+], ids=['invalid offers', 'valid offers', 'no offers', 'no company'])
+def test_streaming_report_matches_the_tree_report(tmp_path, offers, header):
+    path = feed(tmp_path, offers, **header)
+    assert check_kaspi_xml_streaming(path) == check_kaspi_xml(path)
+
+def test_streaming_report_on_a_truncated_file(tmp_path):
+    path = feed(tmp_path, INVALID_OFFERS)
+    with open(path, 'r+b') as f:
+        f.truncate(f.seek(0, 2) - 40)
+    report = check_kaspi_xml_streaming(path)
+    assert not report['valid']
+    assert report['error'].startswith("XML parsing error")
+
+RECORDS = [
+    Offer('A', 'Brand | Dress', 'Brand', True, 1, 1000),
+    Offer('B', 'Brand | Skirt', 'Brand', True, 2, 10.5),
+    Offer('A', 'Brand | Dress', 'Brand', True, 1, 1000),
+    Offer('', 'Brand | Coat', '', False, 0, 3000),
+    Offer('C', 'Brand | Coat', 'Brand', True, 1, 3000),
+]
+
+def test_in_memory_and_file_validation_use_the_same_rule(tmp_path):
+    unchecked = str(tmp_path / 'unchecked.xml')
+    write_kaspi_xml_file(RECORDS, unchecked, company='Shop', merchant_id='123')
+    file_report = check_kaspi_xml(unchecked)
+
+    checked = str(tmp_path / 'price.xml')
+    validator = RecordValidator('Shop', '123')
+    stats = {}
+    written = write_kaspi_xml_file(RECORDS, checked, stats=stats, validator=validator,
+                                   company='Shop', merchant_id='123')
+    memory_report = validator.report
+    for key in ('valid', 'offers', 'valid_offers', 'issues', 'failures', 'error'):
+        assert memory_report[key] == file_report[key], key
+    assert memory_report['valid'] and stats['valid'] and stats['changed']
+
+    # Invalid offers are left out, so the written feed is clean
+    assert written == 2 and stats['invalid'] == 3
+    report = check_kaspi_xml(checked)
+    assert report['offers'] == report['valid_offers'] == 2
+
+def test_missing_header_keeps_the_existing_file(tmp_path):
+    path = tmp_path / 'price.xml'
+    path.write_bytes(b'previous')
+    stats = {}
+    write_kaspi_xml_file(RECORDS[:1], str(path), stats=stats, validator=RecordValidator('Shop', ''),
+                         company='Shop', merchant_id='')
+    assert not stats['valid'] and not stats['changed']
+    assert path.read_bytes() == b'previous'
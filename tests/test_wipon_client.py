@@ -0,0 +1,54 @@
+from fetch_and_convert import fetch_wipon_data
+from wipon_client import RateController
+
+import pytest
+import requests
+
+def ids(products):
+    return [item['id'] for item in products]
+
+def test_only_the_failed_page_is_retried(catalog, server, client):
+    server.failures[3] = 2
+    data = fetch_wipon_data(client=client)
+    assert ids(data['data']) == ids(catalog)
+    assert server.requests_served == 5 + 2
+
+def test_a_page_failing_every_retry_raises(server, client):
+    server.failures[2] = client.max_retries + 1
+    with pytest.raises(requests.exceptions.HTTPError):
+        client.fetch_page(2)
+    assert server.requests_served == client.max_retries + 1
+
+def test_unchanged_page_answers_not_modified(server, client):
+    data, etag = client.fetch_page_conditional(1, None)
+    assert len(data['data']) == 1000
+    assert client.fetch_page_conditional(1, etag) == (None, etag)
+
+def test_rejections_halve_the_window_once_per_burst():
+    controller = RateController(8)
+    controller.record(0.0, 0.1, 503)
+    assert controller.window == 4
+    # Another answer to a request sent before the slowdown
+    controller.record(0.0, 0.1, 429)
+    assert controller.window == 4
+    controller.record(float('inf'), 0.1, None)
+    assert controller.window == 2
+
+def test_window_grows_back_after_fast_pages():
+    controller = RateController(8, latency_factor=3)
+    controller.window = 2
+    for _ in range(2 + 3):
+        controller.record(float('inf'), 0.1, 200, 1000)
+    assert controller.window == 4
+
+def test_short_pages_are_not_latency_samples():
+    controller = RateController(8, latency_factor=3)
+    # A fast short last page must not make the full pages look slow
+    controller.record(0.0, 0.001, 200, 10)
+    for _ in range(20):
+        controller.record(float('inf'), 0.1, 200, 1000)
+    assert controller.stats['slowdowns'] == 0
+
+    for _ in range(20):
+        controller.record(float('inf'), 1.0, 200, 1000)
+    assert controller.stats['slowdowns'] > 0 and controller.window < 8
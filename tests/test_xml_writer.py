@@ -0,0 +1,84 @@
+import io
+
+import pytest
+
+from fake_wipon import make_catalog
+from fetch_and_convert import convert_to_kaspi_xml, format_xml
+from offers import page_to_offers
+from pricing import PriceRules
+from synthetic import generate_catalog
+from validate_xml import RecordValidator
+from xml_writer import digest_path, read_digest, write_kaspi_xml, write_kaspi_xml_file
+
+DATE = "2026-01-01 00:00:00"
+
+def render(offers, **kwargs):
+    sink = io.BytesIO()
+    write_kaspi_xml(offers, sink, date=DATE, **kwargs)
+    return sink.getvalue()
+
+@pytest.mark.parametrize('products', [make_catalog(300), generate_catalog(1000)],
+                         ids=['sample items', 'synthetic items'])
+def test_output_is_identical_to_minidom(products):
+    expected = format_xml(convert_to_kaspi_xml({'data': products}, date=DATE))
+    assert render(products) == expected
+
+def test_output_is_identical_to_minidom_with_pricing_rules(monkeypatch):
+    import pricing
+
+    monkeypatch.setattr(pricing, 'active_rules', PriceRules([
+        {'markup_percent': 12.5, 'min_margin_percent': 30, 'ending': 90},
+        {'brand': 'Piena', 'round_to': 1000, 'ending': 990},
+    ]))
+    products = generate_catalog(500)
+    expected = format_xml(convert_to_kaspi_xml({'data': products}, date=DATE))
+    assert b'990</price>' in expected
+    assert render(products) == expected
+
+def test_sharded_output_is_identical_to_sequential():
+    offers = page_to_offers(generate_catalog(2500))
+    sequential = render(offers, workers=1)
+    # Shard sizes that do and do not divide the offer count
+    assert render(offers, workers=2, shard_size=500) == sequential
+    assert render(iter(offers), workers=3, shard_size=333) == sequential
+
+def test_sharded_output_validates_and_indexes_the_same_offers():
+    offers = page_to_offers(generate_catalog(1200))
+    # An empty brand and a repeated SKU are left out by the validator
+    offers[5] = offers[5]._replace(brand='')
+    offers[700] = offers[700]._replace(sku=offers[3].sku)
+    results = []
+    for workers in (1, 2):
+        validator, index = RecordValidator('Shop', '123'), {}
+        body = render(offers, workers=workers, shard_size=250, validator=validator, offers_index=index)
+        results.append((body, validator.finish(), index))
+    assert results[0] == results[1]
+    assert len(results[0][2]) == len(offers) - 2
+
+def test_sharded_output_without_offers():
+    assert render([], workers=2) == render([], workers=1)
+
+def test_unchanged_offers_keep_the_existing_file(tmp_path):
+    path = str(tmp_path / 'price.xml')
+    products = make_catalog(50)
+    stats = {}
+    write_kaspi_xml_file(products, path, if_changed=True, stats=stats, date=DATE)
+    assert stats['changed'] and read_digest(path) == stats['digest']
+
+    # A new date stamp alone is not a change
+    write_kaspi_xml_file(products, path, if_changed=True, stats=stats, date="2026-01-02 00:00:00")
+    assert not stats['changed']
+    with open(path, 'rb') as f:
+        assert DATE.encode('utf-8') in f.read(200)
+
+    products[10]['selling_price'] = '12345.00'
+    write_kaspi_xml_file(products, path, if_changed=True, stats=stats, date=DATE)
+    assert stats['changed']
+
+def test_digest_file_is_only_written_when_asked(tmp_path):
+    path = str(tmp_path / 'price.xml')
+    write_kaspi_xml_file(make_catalog(5), path, date=DATE)
+    assert not (tmp_path / 'price.xml.sha256').exists()
+    write_kaspi_xml_file(make_catalog(5), path, save_digest=True, date=DATE)
+    assert digest_path(path) == str(tmp_path / 'price.xml.sha256')
+    assert read_digest(path) is not None
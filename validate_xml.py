@@ -4,154 +4,426 @@ XML validation script for Kaspi price list
 """
 
 import xml.etree.ElementTree as ET
+import hashlib
+import heapq
+import json
 import sys
+from array import array
+from bisect import bisect_left
+from collections import Counter
 from datetime import datetime
 
-def validate_kaspi_xml(xml_file):
-    """Validate the Kaspi XML format."""
-    try:
-        # Parse XML
-        tree = ET.parse(xml_file)
-        root = tree.getroot()
-        
-        print(f"✅ XML file '{xml_file}' is well-formed")
-        print(f"🔍 Root element tag: {root.tag}")
-        
-        # Check root element (handle namespaces)
-        if root.tag.endswith('kaspi_catalog') or root.tag == 'kaspi_catalog':
-            print("✅ Root element is correct")
-        else:
-            print(f"❌ Root element should be 'kaspi_catalog', got: {root.tag}")
-            return False
-        
-        # Debug: print all child elements
-        print(f"🔍 Root children: {[child.tag for child in root]}")
-        
-        # Check required attributes
-        required_attrs = ['date']
-        optional_attrs = ['xmlns', 'xmlns:xsi', 'xsi:schemaLocation']
-        
-        for attr in required_attrs:
-            if attr not in root.attrib:
-                print(f"❌ Missing required attribute: {attr}")
-                return False
-        
-        present_attrs = 0
-        for attr in optional_attrs:
-            if attr in root.attrib:
-                present_attrs += 1
-        
-        print("✅ All required attributes present")
-        print(f"✅ {present_attrs}/{len(optional_attrs)} optional namespace attributes present")
-        
-        # Check company element (handle namespaces)
-        company = root.find('.//{kaspiShopping}company')
-        if company is None or not company.text:
-            print("❌ Company name is missing")
-            return False
-        print(f"✅ Company: {company.text}")
-        
-        # Check merchant ID
-        merchant_id = root.find('.//{kaspiShopping}merchantid')
-        if merchant_id is None or not merchant_id.text:
-            print("❌ Merchant ID is missing")
-            return False
-        print(f"✅ Merchant ID: {merchant_id.text}")
-        
-        # Check offers
-        offers = root.find('.//{kaspiShopping}offers')
-        if offers is None:
-            print("❌ Offers section is missing")
-            return False
-        
-        offer_count = len(offers.findall('.//{kaspiShopping}offer'))
-        print(f"✅ Found {offer_count} offers")
-        
-        # Validate each offer
-        valid_offers = 0
-        for i, offer in enumerate(offers.findall('.//{kaspiShopping}offer')):
-            if validate_offer(offer, i + 1):
-                valid_offers += 1
-        
-        print(f"✅ {valid_offers}/{offer_count} offers are valid")
-        
-        # Check date format
-        date_str = root.get('date')
-        try:
-            datetime.strptime(date_str, '%Y-%m-%d %H:%M:%S')
-            print("✅ Date format is correct")
-        except ValueError:
-            print("⚠️  Date format might be incorrect")
-        
-        return True
-        
-    except ET.ParseError as e:
-        print(f"❌ XML parsing error: {e}")
-        return False
-    except FileNotFoundError:
-        print(f"❌ File '{xml_file}' not found")
-        return False
+KASPI_NS = '{kaspiShopping}'
+ROOT_TAG = f'{KASPI_NS}kaspi_catalog'
+COMPANY_TAG = f'{KASPI_NS}company'
+MERCHANTID_TAG = f'{KASPI_NS}merchantid'
+OFFERS_TAG = f'{KASPI_NS}offers'
+OFFER_TAG = f'{KASPI_NS}offer'
+MODEL_TAG = f'{KASPI_NS}model'
+BRAND_TAG = f'{KASPI_NS}brand'
+PRICE_TAG = f'{KASPI_NS}price'
+AVAILABILITIES_TAG = f'{KASPI_NS}availabilities'
+AVAILABILITY_TAG = f'{KASPI_NS}availability'
 
-def validate_offer(offer, offer_num):
-    """Validate individual offer."""
+REQUIRED_AVAIL_ATTRS = ('available', 'storeId', 'stockCount')
+
+# Report "file" name for offers validated before being written
+IN_MEMORY = '<in-memory>'
+
+def offer_issues(offer):
+    """Return the list of problems with one offer.
+
+    Walks the offer's direct children once instead of searching the subtree
+    for every required element.
+    """
     issues = []
-    
+
     # Check SKU
-    if 'sku' not in offer.attrib or not offer.attrib['sku']:
+    if not offer.get('sku'):
         issues.append("missing SKU")
-    
-    # Check model
-    model = offer.find('.//{kaspiShopping}model')
+
+    model = brand = price = availabilities = None
+    for child in offer:
+        tag = child.tag
+        if tag == MODEL_TAG and model is None:
+            model = child
+        elif tag == BRAND_TAG and brand is None:
+            brand = child
+        elif tag == PRICE_TAG and price is None:
+            price = child
+        elif tag == AVAILABILITIES_TAG and availabilities is None:
+            availabilities = child
+
     if model is None or not model.text:
         issues.append("missing model")
-    
-    # Check brand
-    brand = offer.find('.//{kaspiShopping}brand')
+
     if brand is None or not brand.text:
         issues.append("missing brand")
-    
-    # Check price
-    price = offer.find('.//{kaspiShopping}price')
+
+    # Price must be an integer according to the XSD
     if price is None or not price.text:
         issues.append("missing price")
     else:
         try:
-            float(price.text)
+            int(price.text)
         except ValueError:
-            issues.append("invalid price format")
-    
-    # Check availabilities
-    availabilities = offer.find('.//{kaspiShopping}availabilities')
+            try:
+                float(price.text)
+                issues.append("non-integer price")
+            except ValueError:
+                issues.append("invalid price format")
+
     if availabilities is None:
         issues.append("missing availabilities")
     else:
-        avail = availabilities.find('.//{kaspiShopping}availability')
+        avail = availabilities.find(AVAILABILITY_TAG)
         if avail is None:
             issues.append("missing availability details")
         else:
-            required_avail_attrs = ['available', 'storeId', 'stockCount']
-            for attr in required_avail_attrs:
+            for attr in REQUIRED_AVAIL_ATTRS:
                 if attr not in avail.attrib:
                     issues.append(f"missing {attr} in availability")
-    
+
+    return issues
+
+def offer_record_issues(offer):
+    """Return the list of problems with an in-memory Offer record.
+
+    Applies the same rules as ``offer_issues`` to the values the offer will
+    be written with, so a feed can be checked before it is written.
+    """
+    issues = []
+    if not offer.sku:
+        issues.append("missing SKU")
+    if not offer.model:
+        issues.append("missing model")
+    if not offer.brand:
+        issues.append("missing brand")
+    # Price must be an integer according to the XSD
+    if not isinstance(offer.price, int):
+        issues.append("non-integer price")
+    if not isinstance(offer.stock, int):
+        issues.append("invalid stockCount in availability")
+    for store_id, _, stock in offer.stores or ():
+        if not store_id:
+            issues.append("missing storeId in availability")
+        if not isinstance(stock, int):
+            issues.append("invalid stockCount in availability")
+    return issues
+
+def validate_offer(offer, offer_num):
+    """Validate individual offer, printing its problems if it has any."""
+    issues = offer_issues(offer)
     if issues:
         print(f"⚠️  Offer {offer_num}: {', '.join(issues)}")
         return False
-    else:
-        print(f"✅ Offer {offer_num}: Valid")
-        return True
+    return True
+
+def sku_key(sku):
+    """Compact 64-bit key for the duplicate-SKU seen-set.
+
+    Storing small ints instead of the SKU strings keeps the set small on
+    very large feeds; a false duplicate needs a 64-bit hash collision.
+    """
+    return int.from_bytes(hashlib.blake2b(sku.encode('utf-8'), digest_size=8).digest(), 'big')
+
+class CompactKeySet:
+    """Set of 64-bit keys stored in sorted ``array('Q')`` runs.
+
+    New keys collect in a small buffer set; when it fills up it is sorted
+    into a run, and runs of similar size are merged, so there are only a
+    few runs to binary-search and each key costs about 8 bytes instead of a
+    Python int plus a set slot.
+    """
+
+    BUFFER_SIZE = 65536
+
+    def __init__(self):
+        self.runs = []
+        self.buffer = set()
+
+    def __contains__(self, key):
+        if key in self.buffer:
+            return True
+        for run in self.runs:
+            i = bisect_left(run, key)
+            if i < len(run) and run[i] == key:
+                return True
+        return False
+
+    def add(self, key):
+        self.buffer.add(key)
+        if len(self.buffer) >= self.BUFFER_SIZE:
+            run = array('Q', sorted(self.buffer))
+            self.buffer.clear()
+            while self.runs and len(self.runs[-1]) <= len(run):
+                run = array('Q', heapq.merge(self.runs.pop(), run))
+            self.runs.append(run)
+
+def new_report(xml_file):
+    return {
+        'file': xml_file,
+        'valid': False,
+        'offers': 0,
+        'valid_offers': 0,
+        'issues': {},
+        'failures': [],
+        'warnings': [],
+        'error': None,
+    }
+
+class OfferChecker:
+    """Accumulates per-offer results, including duplicate SKU detection."""
+
+    def __init__(self, report):
+        self.report = report
+        self.issue_counts = Counter()
+        self.seen_skus = CompactKeySet()
+        self.count = 0
+
+    def check(self, offer):
+        """Check an ``<offer>`` element; returns True if it is valid."""
+        return self.record(offer.get('sku', ''), offer_issues(offer))
+
+    def check_record(self, offer):
+        """Check an in-memory Offer record (see offers.py); returns True if it is valid."""
+        return self.record(offer.sku, offer_record_issues(offer))
+
+    def record(self, sku, issues):
+        self.count += 1
+        if sku:
+            key = sku_key(sku)
+            if key in self.seen_skus:
+                issues.append("duplicate SKU")
+            else:
+                self.seen_skus.add(key)
+        if issues:
+            self.issue_counts.update(issues)
+            self.report['failures'].append([self.count, sku, issues])
+        return not issues
+
+    def finish(self):
+        self.report['offers'] = self.count
+        self.report['valid_offers'] = self.count - len(self.report['failures'])
+        self.report['issues'] = dict(self.issue_counts)
 
-def main():
+class RecordValidator(OfferChecker):
+    """Validates Offer records in memory while the feed is being converted.
+
+    Pass it as ``validator`` to the writers in xml_writer.py; every offer is
+    checked before it is rendered and invalid ones are left out of the feed.
+    After ``finish()`` the report is the one ``check_kaspi_xml`` gives for
+    the same offers: ``report['valid']`` is False only if the header has a
+    problem, and the left-out offers are listed in ``failures``.
+    """
+
+    def __init__(self, company, merchant_id):
+        super().__init__(new_report(IN_MEMORY))
+        self.company = company
+        self.merchant_id = merchant_id
+
+    def finish(self):
+        super().finish()
+        if not self.company:
+            self.report['error'] = "Company name is missing"
+        elif not self.merchant_id:
+            self.report['error'] = "Merchant ID is missing"
+        else:
+            self.report['company'] = self.company
+            self.report['merchant_id'] = self.merchant_id
+        self.report['valid'] = not self.report['error']
+        return self.report
+
+def validate_offers(offers, company, merchant_id):
+    """Validate an iterable of Offer records and return a report dict."""
+    validator = RecordValidator(company, merchant_id)
+    for offer in offers:
+        validator.check_record(offer)
+    return validator.finish()
+
+def check_date(report, date_str):
+    try:
+        datetime.strptime(date_str, '%Y-%m-%d %H:%M:%S')
+    except ValueError:
+        report['warnings'].append("Date format might be incorrect")
+
+def check_kaspi_xml(xml_file):
+    """Check a Kaspi XML file and return a report dict.
+
+    The report has ``valid`` (the document structure is correct; invalid
+    offers are reported, but Kaspi skips them without rejecting the feed), counts of
+    ``offers`` and ``valid_offers``, an ``issues`` counter, the
+    ``failures`` as ``[offer number, sku, issues]`` and, when the document
+    itself is broken, an ``error`` message.
+    """
+    report = new_report(xml_file)
+
+    try:
+        root = ET.parse(xml_file).getroot()
+    except ET.ParseError as e:
+        report['error'] = f"XML parsing error: {e}"
+        return report
+    except FileNotFoundError:
+        report['error'] = f"File '{xml_file}' not found"
+        return report
+
+    # Check root element (handle namespaces)
+    if not root.tag.endswith('kaspi_catalog'):
+        report['error'] = f"Root element should be 'kaspi_catalog', got: {root.tag}"
+        return report
+
+    if 'date' not in root.attrib:
+        report['error'] = "Missing required attribute: date"
+        return report
+
+    company = merchant_id = offers = None
+    for child in root:
+        if child.tag == COMPANY_TAG and company is None:
+            company = child
+        elif child.tag == MERCHANTID_TAG and merchant_id is None:
+            merchant_id = child
+        elif child.tag == OFFERS_TAG and offers is None:
+            offers = child
+
+    if company is None or not company.text:
+        report['error'] = "Company name is missing"
+        return report
+    report['company'] = company.text
+
+    if merchant_id is None or not merchant_id.text:
+        report['error'] = "Merchant ID is missing"
+        return report
+    report['merchant_id'] = merchant_id.text
+
+    if offers is None:
+        report['error'] = "Offers section is missing"
+        return report
+
+    checker = OfferChecker(report)
+    for offer in offers:
+        if offer.tag == OFFER_TAG:
+            checker.check(offer)
+    checker.finish()
+
+    check_date(report, root.get('date'))
+
+    report['valid'] = True
+    return report
+
+def check_kaspi_xml_streaming(xml_file):
+    """Check a Kaspi XML file incrementally with constant memory.
+
+    Same report as ``check_kaspi_xml``, but each ``<offer>`` is checked as
+    soon as it is closed and then dropped from the tree, so memory does not
+    grow with the file size (apart from the SKU seen-set and the failures).
+    """
+    report = new_report(xml_file)
+    checker = OfferChecker(report)
+    root = offers = None
+    company = merchant_id = None
+    depth = 0
+
+    try:
+        for event, elem in ET.iterparse(xml_file, events=('start', 'end')):
+            if event == 'start':
+                depth += 1
+                if root is None:
+                    root = elem
+                    # Check root element (handle namespaces)
+                    if not root.tag.endswith('kaspi_catalog'):
+                        report['error'] = f"Root element should be 'kaspi_catalog', got: {root.tag}"
+                        return report
+                    if 'date' not in root.attrib:
+                        report['error'] = "Missing required attribute: date"
+                        return report
+                elif depth == 2 and elem.tag == OFFERS_TAG and offers is None:
+                    offers = elem
+                continue
+
+            depth -= 1
+            if depth == 2 and elem.tag == OFFER_TAG and offers is not None and elem in offers:
+                checker.check(elem)
+                offers.remove(elem)
+            elif depth == 1:
+                if elem.tag == COMPANY_TAG and company is None:
+                    company = elem.text
+                elif elem.tag == MERCHANTID_TAG and merchant_id is None:
+                    merchant_id = elem.text
+    except ET.ParseError as e:
+        report['error'] = f"XML parsing error: {e}"
+        return report
+    except FileNotFoundError:
+        report['error'] = f"File '{xml_file}' not found"
+        return report
+
+    if not company:
+        report['error'] = "Company name is missing"
+        return report
+    report['company'] = company
+
+    if not merchant_id:
+        report['error'] = "Merchant ID is missing"
+        return report
+    report['merchant_id'] = merchant_id
+
+    if offers is None:
+        report['error'] = "Offers section is missing"
+        return report
+
+    checker.finish()
+    check_date(report, root.get('date'))
+
+    report['valid'] = True
+    return report
+
+def print_report(report, quiet=False):
+    """Print a report: failing offers (unless quiet) and a summary."""
+    if report['error']:
+        print(f"❌ {report['error']}")
+        return
+
+    if report['file'] != IN_MEMORY:
+        print(f"✅ XML file '{report['file']}' is well-formed")
+    if not quiet:
+        for offer_num, sku, issues in report['failures']:
+            print(f"⚠️  Offer {offer_num} ({sku or 'no SKU'}): {', '.join(issues)}")
+
+    print(f"✅ Company: {report['company']}")
+    print(f"✅ Merchant ID: {report['merchant_id']}")
+    print(f"✅ {report['valid_offers']}/{report['offers']} offers are valid")
+    for issue, count in sorted(report['issues'].items(), key=lambda item: -item[1]):
+        print(f"⚠️  {count} offers: {issue}")
+    for warning in report['warnings']:
+        print(f"⚠️  {warning}")
+
+def validate_kaspi_xml(xml_file, quiet=False, stream=False):
+    """Validate the Kaspi XML format."""
+    report = check_kaspi_xml_streaming(xml_file) if stream else check_kaspi_xml(xml_file)
+    print_report(report, quiet)
+    return report['valid']
+
+def main(argv=None):
     """Main validation function."""
-    xml_file = "price.xml"
-    
-    if len(sys.argv) > 1:
-        xml_file = sys.argv[1]
-    
-    print(f"🔍 Validating Kaspi XML: {xml_file}")
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Validate a Kaspi XML price list')
+    parser.add_argument('xml_file', nargs='?', default='price.xml', help='File to validate')
+    parser.add_argument('--quiet', action='store_true', help='Only print the summary')
+    parser.add_argument('--json', action='store_true', help='Print the report as JSON')
+    parser.add_argument('--stream', action='store_true',
+                        help='Validate incrementally with constant memory (for very large feeds)')
+    args = parser.parse_args(argv)
+
+    if args.json:
+        check = check_kaspi_xml_streaming if args.stream else check_kaspi_xml
+        report = check(args.xml_file)
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+        sys.exit(0 if report['valid'] else 1)
+
+    print(f"🔍 Validating Kaspi XML: {args.xml_file}")
     print("=" * 50)
-    
-    if validate_kaspi_xml(xml_file):
+
+    if validate_kaspi_xml(args.xml_file, quiet=args.quiet, stream=args.stream):
         print("=" * 50)
         print("✅ XML validation completed successfully!")
         sys.exit(0)
@@ -0,0 +1,336 @@
+"""
+HTTP client for the Wipon API with connection pooling and retries
+"""
+
+import json
+import os
+import random
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+try:
+    import orjson
+except ImportError:  # optional, see requirements.txt
+    orjson = None
+
+from config import (
+    WIPON_API_URL, API_PARAMS, FETCH_CONCURRENCY, WIPON_FIELDS,
+    HTTP_TIMEOUT, HTTP_MAX_RETRIES, HTTP_BACKOFF_BASE, HTTP_BACKOFF_MAX, FETCH_LATENCY_FACTOR
+)
+
+# Status codes worth retrying: rate limiting and transient server errors
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+JSON_BACKEND = 'orjson' if orjson is not None else 'json'
+
+def decode_page(body, fields=None):
+    """Decode a Wipon page body (bytes) into ``{'data': [...], 'meta': ...}``.
+    
+    Uses orjson when it is installed and the stdlib json module otherwise.
+    With ``fields``, every item in ``data`` is projected onto just those
+    keys right away, so the full ~40-field dicts are freed page by page.
+    """
+    data = orjson.loads(body) if orjson is not None else json.loads(body)
+    if fields is not None and isinstance(data, dict) and data.get('data'):
+        data['data'] = [{key: item[key] for key in fields if key in item}
+                        for item in data['data']]
+    return data
+
+def new_session(pool_size=FETCH_CONCURRENCY):
+    """Create a pooled ``requests.Session`` for Wipon requests.
+    
+    The session can be shared by several clients (e.g. one per merchant in
+    batch mode); credentials are kept on each client, not on the session.
+    """
+    session = requests.Session()
+    session.headers.update({
+        'Accept': 'application/json',
+        'Accept-Encoding': 'gzip, deflate',
+    })
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(1, pool_size))
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+class RateController:
+    """Adaptive window of Wipon pages in flight (additive increase, multiplicative decrease).
+    
+    The window starts at ``max_window``. A 429/5xx answer or a failed
+    connection halves it, and a moving average of page latency above
+    ``latency_factor`` times the fastest full page seen shrinks it by one.
+    A full page is one with as many items as the longest page seen so far,
+    so the short last page, empty pages and small stocks sharing the client
+    are not latency samples. Every ``window`` fast successes grow the
+    window by one page again, up to ``max_window``; growing back to a
+    window that was rejected with 429/5xx takes ``PROBE_ROUNDS`` times as
+    many, so a hard server limit is probed rarely. A slowdown is only
+    applied once per burst: responses to requests sent before the last
+    slowdown do not shrink the window further.
+    
+    ``pause`` stops every request of the client until a deadline, e.g. the
+    Retry-After of a 429, so other workers do not keep hitting the limit.
+    """
+    
+    PROBE_ROUNDS = 8
+    LATENCY_SMOOTHING = 0.2
+    
+    def __init__(self, max_window=FETCH_CONCURRENCY, latency_factor=FETCH_LATENCY_FACTOR):
+        self.max_window = max(1, max_window)
+        self.window = self.max_window
+        self.latency_factor = latency_factor
+        self.stats = {'slowdowns': 0, 'min_window': self.window, 'paused_seconds': 0.0}
+        self._fastest = None
+        self._average = None
+        self._page_items = 0
+        self._successes = 0
+        self._rejected = None
+        self._last_slowdown = float('-inf')
+        self._resume_at = 0.0
+        self._lock = threading.Lock()
+    
+    def wait(self):
+        """Sleep while the client is paused."""
+        while True:
+            with self._lock:
+                delay = self._resume_at - time.monotonic()
+            if delay <= 0:
+                return
+            time.sleep(delay)
+    
+    def pause(self, seconds):
+        with self._lock:
+            resume_at = time.monotonic() + seconds
+            if resume_at > self._resume_at:
+                self.stats['paused_seconds'] += resume_at - max(self._resume_at, time.monotonic())
+                self._resume_at = resume_at
+    
+    def record(self, started, seconds, status=None, items=None):
+        """Record a request sent at ``started`` (time.monotonic) that took ``seconds``.
+        
+        ``status`` is None when no response came back; ``items`` is the
+        number of items on a 200 page.
+        """
+        with self._lock:
+            if status is None or status in RETRY_STATUSES:
+                rejected = self.window
+                if self._slow_down(started, rejected // 2):
+                    self._rejected = rejected
+                return
+            # Only full pages are latency samples; shorter ones, and bodyless
+            # 304s, would make every full page look slow
+            if status == 200 and items and items >= self._page_items:
+                if items > self._page_items:
+                    # Earlier samples were shorter pages
+                    self._page_items = items
+                    self._fastest = None
+                if self._fastest is None or seconds < self._fastest:
+                    self._fastest = self._average = seconds
+                # A moving average, so a single slow page does not count
+                self._average += (seconds - self._average) * self.LATENCY_SMOOTHING
+                if self._average > self.latency_factor * self._fastest:
+                    if self._slow_down(started, self.window - 1):
+                        self._average = self._fastest
+                    return
+            self._successes += 1
+            needed = self.window
+            if self._rejected is not None and self.window + 1 >= self._rejected:
+                needed *= self.PROBE_ROUNDS
+            if self._successes >= needed and self.window < self.max_window:
+                self.window += 1
+                self._successes = 0
+    
+    def _slow_down(self, started, window):
+        """Shrink the window to ``window``; returns False for requests of an earlier burst."""
+        if started < self._last_slowdown:
+            return False
+        self._last_slowdown = time.monotonic()
+        self._successes = 0
+        self.window = max(1, window)
+        self.stats['slowdowns'] += 1
+        self.stats['min_window'] = min(self.stats['min_window'], self.window)
+        return True
+
+class WiponClient:
+    """Reusable Wipon API client.
+    
+    A single pooled ``requests.Session`` is shared by every page request, so
+    keep-alive connections (and their TLS handshakes) are reused across pages
+    and worker threads. Failed pages are retried individually with jittered
+    exponential backoff. Pass ``session`` to share an existing pool; it is
+    then left open by ``close``.
+    
+    Items are projected onto ``fields`` (WIPON_FIELDS by default) while
+    decoding; pass ``fields=None`` to keep the full payload. With a
+    ``metrics`` collector (see metrics.RunMetrics) every attempt's latency,
+    status and size is recorded, and so is every retry.
+    
+    With a ``cache`` (see page_cache.PageCache) fresh cached pages are used
+    without a request, downloaded pages are stored, and a page that still
+    fails after all retries is served from the cache whatever its age. With
+    ``offline`` only the cache is used, and a missing page is an error.
+    
+    Every request reports to ``controller`` (a RateController by default),
+    whose window bounds the pages that ``iter_wipon_pages`` keeps in flight.
+    """
+    
+    def __init__(self, url=None, token=None, timeout=HTTP_TIMEOUT,
+                 max_retries=HTTP_MAX_RETRIES, pool_size=FETCH_CONCURRENCY,
+                 fields=WIPON_FIELDS, session=None, metrics=None, cache=None, offline=False,
+                 controller=None):
+        self.url = url or WIPON_API_URL
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.fields = fields
+        self.metrics = metrics
+        self.cache = cache
+        self.offline = offline
+        self.controller = controller or RateController()
+        
+        token = token if token is not None else os.getenv('WIPON_API_TOKEN')
+        self.headers = {'Authorization': f'Bearer {token}'} if token else {}
+        
+        self.owns_session = session is None
+        self.session = new_session(pool_size) if self.owns_session else session
+    
+    def fetch_page(self, page, params=None):
+        """Fetch one page of products, retrying only this page on failure."""
+        return self.fetch_page_conditional(page, None, params)[0]
+    
+    def fetch_page_conditional(self, page, etag, params=None):
+        """Fetch one page unless it still matches ``etag``.
+        
+        Returns ``(data, etag)``; ``data`` is None when the server answered
+        304 Not Modified.
+        """
+        params = dict(params if params is not None else API_PARAMS)
+        params['page'] = page
+        
+        if self.cache is not None:
+            cached = self.cache.get(self.url, params, any_age=self.offline)
+            if cached is not None:
+                return self._cached_page(cached, etag)
+            if self.offline:
+                raise CacheMiss(f"Page {page} is not in the cache ({self.cache.directory})")
+            try:
+                return self._fetch(page, params, etag)
+            except requests.exceptions.RequestException as e:
+                # Only outages fall back to the cache, not e.g. a rejected token
+                response = getattr(e, 'response', None)
+                if response is not None and response.status_code not in RETRY_STATUSES:
+                    raise
+                stale = self.cache.get(self.url, params, any_age=True)
+                if stale is None:
+                    raise
+                print(f"⚠️  Page {page} failed ({e}), using the cached copy")
+                return self._cached_page(stale, etag)
+        return self._fetch(page, params, etag)
+    
+    def _cached_page(self, cached, etag):
+        body, cached_etag = cached
+        if self.metrics is not None:
+            self.metrics.count('cache_hits')
+        if etag and cached_etag == etag:
+            return None, etag
+        return decode_page(body, self.fields), cached_etag
+    
+    def _fetch(self, page, params, etag):
+        headers = dict(self.headers)
+        if etag:
+            headers['If-None-Match'] = etag
+        
+        attempt = 0
+        while True:
+            self.controller.wait()
+            started = time.monotonic()
+            try:
+                try:
+                    response = self.session.get(self.url, params=params, headers=headers,
+                                                timeout=self.timeout)
+                except requests.exceptions.RequestException as e:
+                    self.controller.record(started, time.monotonic() - started)
+                    if self.metrics is not None:
+                        self.metrics.record_request(page, time.monotonic() - started,
+                                                    error=type(e).__name__)
+                    raise
+                seconds = time.monotonic() - started
+                if response.status_code != 200:
+                    # Full pages are recorded once decoded, with their item count
+                    self.controller.record(started, seconds, response.status_code)
+                if self.metrics is not None:
+                    self.metrics.record_request(page, seconds, response.status_code,
+                                                len(response.content), _wire_size(response))
+                if response.status_code in RETRY_STATUSES and attempt < self.max_retries:
+                    delay = self._retry_after(response)
+                    if delay is not None and response.status_code == 429:
+                        # The limit applies to the whole client, not just this page
+                        self.controller.pause(delay)
+                    raise _Retry(f"HTTP {response.status_code}", delay)
+                response.raise_for_status()
+                if response.status_code == 304:
+                    return None, etag
+                if self.cache is not None:
+                    self.cache.put(self.url, params, response.content, response.headers.get('ETag'))
+                if self.metrics is None:
+                    data = decode_page(response.content, self.fields)
+                else:
+                    # Pages are decoded in worker threads, so this adds up per-page time
+                    with self.metrics.stage('decode'):
+                        data = decode_page(response.content, self.fields)
+                if response.status_code == 200:
+                    items = len(data.get('data') or []) if isinstance(data, dict) else None
+                    self.controller.record(started, seconds, 200, items)
+                return data, response.headers.get('ETag')
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout, _Retry) as e:
+                if attempt >= self.max_retries:
+                    raise
+                delay = getattr(e, 'delay', None)
+                if delay is None:
+                    delay = self.backoff_delay(attempt)
+                attempt += 1
+                if self.metrics is not None:
+                    self.metrics.count('http_retries')
+                print(f"⚠️  Page {page} failed ({e}), retry {attempt}/{self.max_retries} in {delay:.1f}s")
+                time.sleep(delay)
+    
+    @staticmethod
+    def backoff_delay(attempt):
+        """Full-jitter exponential backoff delay for the given attempt."""
+        return random.uniform(0, min(HTTP_BACKOFF_MAX, HTTP_BACKOFF_BASE * 2 ** attempt))
+    
+    @staticmethod
+    def _retry_after(response):
+        """Honor a numeric Retry-After header, capped at HTTP_BACKOFF_MAX."""
+        value = response.headers.get('Retry-After')
+        if value and value.isdigit():
+            return min(float(value), HTTP_BACKOFF_MAX)
+        return None
+    
+    def close(self):
+        if self.owns_session:
+            self.session.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        self.close()
+
+def _wire_size(response):
+    """Bytes read off the connection, before gzip decoding, if known."""
+    try:
+        return response.raw.tell()
+    except (AttributeError, OSError):
+        return None
+
+class CacheMiss(requests.exceptions.RequestException):
+    """An offline run needed a page that is not in the cache."""
+
+class _Retry(requests.exceptions.RequestException):
+    """Internal signal for a retryable HTTP status."""
+    
+    def __init__(self, message, delay=None):
+        super().__init__(message)
+        self.delay = delay
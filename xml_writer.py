@@ -0,0 +1,269 @@
+"""
+Streaming Kaspi XML writer
+
+Produces the same bytes as ``format_xml(convert_to_kaspi_xml(data))`` in
+fetch_and_convert.py, but emits each ``<offer>`` as soon as its product is
+read instead of building an ElementTree and pretty-printing it via minidom.
+"""
+
+import hashlib
+import os
+from collections import deque
+from datetime import datetime
+from itertools import islice
+
+from config import COMPANY_NAME, MERCHANT_ID, STORE_ID, XML_WORKERS, XML_SHARD_SIZE
+from offers import Offer, iter_offers
+
+XML_DECLARATION = '<?xml version="1.0" encoding="utf-8"?>\n'
+ROOT_ATTRIBUTES = (
+    'xmlns="kaspiShopping" '
+    'xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" '
+    'date="{date}" '
+    'xsi:schemaLocation="kaspiShopping http://kaspi.kz/kaspishopping.xsd"'
+)
+
+# Offers are joined and encoded in batches to keep write() calls cheap
+WRITE_BATCH_SIZE = 512
+
+def escape(value):
+    """Escape text the way minidom's pretty-printer does."""
+    if '&' in value:
+        value = value.replace('&', '&amp;')
+    if '<' in value:
+        value = value.replace('<', '&lt;')
+    if '"' in value:
+        value = value.replace('"', '&quot;')
+    if '>' in value:
+        value = value.replace('>', '&gt;')
+    return value
+
+def escape_text(value):
+    """Escape element text, normalizing line endings like an XML parser."""
+    if '\r' in value:
+        value = value.replace('\r\n', '\n').replace('\r', '\n')
+    return escape(value)
+
+def element(indent, tag, text):
+    """Render a single-line text element, or an empty one when text is empty."""
+    if not text:
+        return f'{indent}<{tag}/>\n'
+    return f'{indent}<{tag}>{escape_text(text)}</{tag}>\n'
+
+def render_availability(store_id, available, stock):
+    return (f'        <availability available="{"yes" if available else "no"}"'
+            f' storeId="{escape(store_id)}" stockCount="{stock}"/>\n')
+
+def render_offer(offer, store_id=STORE_ID):
+    """Render one Offer as an indented ``<offer>`` block.
+
+    Single-store offers are published under ``store_id``; multi-store
+    offers get one ``<availability>`` per entry in ``offer.stores``.
+    """
+    if offer.stores:
+        availabilities = ''.join(render_availability(*store) for store in offer.stores)
+    else:
+        availabilities = render_availability(store_id, offer.available, offer.stock)
+    return (
+        f'    <offer sku="{escape(offer.sku)}">\n'
+        + element('      ', 'model', offer.model)
+        + element('      ', 'brand', offer.brand)
+        + '      <availabilities>\n'
+        + availabilities
+        + '      </availabilities>\n'
+        f'      <price>{offer.price}</price>\n'
+        '    </offer>\n'
+    )
+
+def digest_path(path):
+    """Path of the offers digest stored next to a feed file."""
+    return f"{path}.sha256"
+
+def read_digest(path):
+    """Return the digest stored next to ``path``, or None if there is none."""
+    try:
+        with open(digest_path(path), 'r', encoding='utf-8') as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+def render_shard(rows, store_id=STORE_ID):
+    """Render a list of Offer field tuples to UTF-8 bytes (runs in a worker process).
+
+    Shards travel as plain tuples because pickling namedtuples goes through
+    a Python-level ``__reduce__`` per record and costs about 3x as much.
+    """
+    return ''.join([render_offer(Offer._make(row), store_id) for row in rows]).encode('utf-8')
+
+def iter_shards(items, size):
+    """Split an iterable into lists of ``size`` items."""
+    items = iter(items)
+    while True:
+        shard = list(islice(items, size))
+        if not shard:
+            return
+        yield shard
+
+def iter_rendered_shards(offers, store_id=STORE_ID, workers=XML_WORKERS, shard_size=XML_SHARD_SIZE):
+    """Yield ``(count, bytes)`` for every shard of ``offers``, in order.
+    
+    Shards are rendered by a pool of ``workers`` processes. At most two
+    shards per worker are in flight, so memory stays bounded while
+    ``offers`` is still streaming in.
+    
+    The pool starts while fetch threads may still be downloading pages, and
+    forking a process with live threads can deadlock, so workers come from
+    a forkserver (or are spawned where there is none, e.g. on Windows).
+    """
+    # multiprocessing is slow to import and most runs render in-process
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+    
+    method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context(method)) as executor:
+        pending = deque()
+        for shard in iter_shards(offers, shard_size):
+            rows = list(map(tuple, shard))
+            pending.append((len(rows), executor.submit(render_shard, rows, store_id)))
+            if len(pending) >= 2 * workers:
+                count, future = pending.popleft()
+                yield count, future.result()
+        while pending:
+            count, future = pending.popleft()
+            yield count, future.result()
+
+def iter_kaspi_xml(products, company=COMPANY_NAME, merchant_id=MERCHANT_ID,
+                   store_id=STORE_ID, date=None, stats=None, digest=None,
+                   offers_index=None, validator=None, workers=None, shard_size=XML_SHARD_SIZE):
+    """Yield the Kaspi XML document for ``products`` as UTF-8 byte chunks.
+
+    ``products`` can be any iterable of Wipon items or Offer records,
+    including a generator, so offers are produced as products arrive. If
+    ``stats`` is a dict its ``products`` and ``offers`` keys are set to the
+    number of products read and offers written. A ``validator`` (see
+    validate_xml.RecordValidator) checks every Offer before it is written,
+    and offers it rejects are left out. If ``offers_index`` is a dict,
+    every written Offer is stored in it by SKU.
+
+    ``digest`` is an optional hashlib object that is fed everything except
+    the ``date`` stamp, giving a content hash that only changes when the
+    company, merchant or offers change.
+
+    With more than one worker (``workers``, default XML_WORKERS) offers are
+    rendered in shards of ``shard_size`` by a process pool; the output is
+    the same bytes either way.
+    """
+    date = date or datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    # The root line is the only part carrying the date, so it is yielded on
+    # its own and everything after it goes into the digest
+    yield (XML_DECLARATION + f'<kaspi_catalog {ROOT_ATTRIBUTES.format(date=escape(date))}>\n').encode('utf-8')
+
+    workers = XML_WORKERS if workers is None else workers
+    count = 0
+    batch = [element('  ', 'company', company), element('  ', 'merchantid', merchant_id)]
+    if workers > 1:
+        def tracked_offers():
+            for offer in iter_offers(products, stats):
+                if validator is not None and not validator.check_record(offer):
+                    continue
+                if offers_index is not None:
+                    offers_index[offer.sku] = offer
+                yield offer
+
+        head = ''.join(batch).encode('utf-8')
+        batch = []
+        for shard_count, body in iter_rendered_shards(tracked_offers(), store_id, workers, shard_size):
+            if count == 0:
+                head += b'  <offers>\n'
+            chunk = head + body
+            head = b''
+            count += shard_count
+            if digest is not None:
+                digest.update(chunk)
+            yield chunk
+        if head:
+            batch.append(head.decode('utf-8'))
+    else:
+        for offer in iter_offers(products, stats):
+            if validator is not None and not validator.check_record(offer):
+                continue
+            if offers_index is not None:
+                offers_index[offer.sku] = offer
+            if count == 0:
+                batch.append('  <offers>\n')
+            batch.append(render_offer(offer, store_id))
+            count += 1
+            if len(batch) >= WRITE_BATCH_SIZE:
+                chunk = ''.join(batch).encode('utf-8')
+                if digest is not None:
+                    digest.update(chunk)
+                yield chunk
+                batch = []
+
+    batch.append('  </offers>\n' if count else '  <offers/>\n')
+    batch.append('</kaspi_catalog>\n')
+    chunk = ''.join(batch).encode('utf-8')
+    if digest is not None:
+        digest.update(chunk)
+    yield chunk
+
+    if stats is not None:
+        stats['offers'] = count
+
+def write_kaspi_xml(products, sink, stats=None, **kwargs):
+    """Stream the Kaspi XML document into a binary file object.
+
+    Accepts the same keyword arguments as ``iter_kaspi_xml`` and returns the
+    number of offers written.
+    """
+    stats = {} if stats is None else stats
+    for chunk in iter_kaspi_xml(products, stats=stats, **kwargs):
+        sink.write(chunk)
+    return stats['offers']
+
+def write_kaspi_xml_file(products, path, if_changed=False, stats=None, validator=None,
+                         save_digest=None, **kwargs):
+    """Stream the Kaspi XML document into ``path`` atomically.
+
+    The document goes to a temp file that replaces ``path`` only once it is
+    complete, so an error halfway through (e.g. a failed page while
+    ``products`` is still streaming from the API) leaves the previous file
+    in place. ``stats['digest']`` is a SHA-256 digest of the content
+    (without the date stamp); with ``save_digest`` (by default whenever
+    ``if_changed`` is set) it is also saved next to the file.
+
+    With ``if_changed`` the existing file is kept, date stamp included, when
+    its stored digest matches the new content. With a ``validator`` invalid
+    offers are left out and counted in ``stats['invalid']``; the existing
+    file is kept only when the header (company or merchant ID) is invalid,
+    and then ``stats['valid']`` is False. ``stats['changed']`` tells whether
+    the file was replaced. Returns the number of offers written.
+    """
+    stats = {} if stats is None else stats
+    digest = hashlib.sha256()
+    tmp_path = f"{path}.tmp"
+    try:
+        with open(tmp_path, 'wb') as f:
+            count = write_kaspi_xml(products, f, stats=stats, digest=digest,
+                                    validator=validator, **kwargs)
+        stats['digest'] = digest.hexdigest()
+        stats['valid'] = True
+        stats['invalid'] = 0
+        if validator is not None:
+            report = validator.finish()
+            stats['valid'] = report['valid']
+            stats['invalid'] = report['offers'] - report['valid_offers']
+        stats['changed'] = stats['valid'] and not (if_changed and os.path.exists(path)
+                                                   and read_digest(path) == stats['digest'])
+        if stats['changed']:
+            os.replace(tmp_path, path)
+            if save_digest if save_digest is not None else if_changed:
+                with open(digest_path(path), 'w', encoding='utf-8') as f:
+                    f.write(stats['digest'] + '\n')
+        else:
+            os.remove(tmp_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return count